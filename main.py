@@ -1,4 +1,5 @@
 import logging
+import os
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -6,6 +7,8 @@ from dotenv import load_dotenv
 # Import your scripts
 from scripts.data_collection.api_collector import main as collect_api_data
 from scripts.data_collection.fake_data_generator import main as generate_fake_data
+from scripts.database.bulk_loader import main as load_staging
+from scripts.pipeline import Pipeline, Stage
 
 # Configure logging
 logging.basicConfig(
@@ -15,19 +18,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def load_staging_stage(api_data, fake_data):
+    """Bulk load data/external into staging once collection and generation have both finished.
+
+    The upstream stages write their files to data/external, so their
+    artifacts only order this stage after them; the loader picks up the files itself.
+    """
+    return load_staging()
+
+def build_pipeline() -> Pipeline:
+    """Declare the pipeline stages and the datasets they exchange through data/external."""
+    stages = [
+        # API collection waits on the network; fake data generation is CPU-bound, so it gets its own process
+        Stage("collect_api_data", collect_api_data, outputs=["api_data"]),
+        Stage("generate_fake_data", generate_fake_data, outputs=["fake_data"], executor="process"),
+    ]
+    if os.getenv("PIPELINE_LOAD_STAGING", "false").lower() in ("1", "true", "yes"):
+        stages.append(Stage("load_staging", load_staging_stage, inputs=["api_data", "fake_data"]))
+    return Pipeline(stages)
+
 def main():
     """Main data collection pipeline."""
     logger.info("🚀 Starting Data Collection Pipeline")
 
     try:
-        # Step 1: Collect data from API
-        logger.info("📡 Step 1: Collecting real data from API")
-        collect_api_data()
-
-        # Step 2: Generate fake data for testing
-        logger.info("🎭 Step 2: Generating fake data for testing")
-        generate_fake_data()
+        # Independent stages (API collection, fake data generation) run concurrently
+        logger.info("📡 Collecting real data from API and 🎭 generating fake data for testing")
+        report = build_pipeline().run()
 
+        for name, stats in report["stages"].items():
+            logger.info(f"⏱️ {name}: {stats['wall_seconds']:.2f}s wall, {stats['cpu_seconds']:.2f}s cpu, "
+                        f"peak rss {stats['peak_rss_mb']} MB")
         logger.info("🎉 Data collection completed successfully!")
         logger.info("📁 Check the 'data/external' folder for your collected data files")
 
@@ -10,7 +10,7 @@ from pathlib import Path
 # Add the scripts directory to the path
 sys.path.append(str(Path(__file__).parent / "scripts" / "database"))
 
-from scripts.database.connection_test import test_connection
+from scripts.database.connection_test import close_pool, test_connection
 from scripts.database.crud_demo import demonstrate_crud
 
 def main():
@@ -34,5 +34,8 @@ def main():
     return True
 
 if __name__ == "__main__":
-    success = main()
+    try:
+        success = main()
+    finally:
+        close_pool()
     sys.exit(0 if success else 1)
\ No newline at end of file
@@ -4,12 +4,15 @@ Simple database connection test for Week 02 Lab
 """
 
 import os
-import psycopg
 from dotenv import load_dotenv
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import ConnectionPool
 
 # Load environment variables
 load_dotenv()
 
+_pool = None
+
 def get_connection_params():
     """Get database connection parameters from environment variables."""
     return {
@@ -20,13 +23,43 @@ def get_connection_params():
         "password": os.getenv("POSTGRES_PASSWORD"),
     }
 
+def configure_connection(conn):
+    """Prepare statements run DB_PREPARE_THRESHOLD times (psycopg's default of 5) server-side."""
+    conn.prepare_threshold = int(os.getenv("DB_PREPARE_THRESHOLD", 5))
+
+def get_pool():
+    """Get the shared connection pool, opening it on first use."""
+    global _pool
+    if _pool is None:
+        min_size = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+        max_size = max(int(os.getenv("DB_POOL_MAX_SIZE", 10)), min_size, 1)
+        params = {k: v for k, v in get_connection_params().items() if v is not None}
+        _pool = ConnectionPool(
+            conninfo=make_conninfo(**params),
+            min_size=min_size,
+            max_size=max_size,
+            timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+            max_idle=float(os.getenv("DB_POOL_MAX_IDLE", 600)),
+            check=ConnectionPool.check_connection,
+            configure=configure_connection,
+            name="staging",
+        )
+    return _pool
+
+def close_pool():
+    """Close the shared pool if it was opened."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
 def test_connection():
     """Test database connection and return True if successful."""
     try:
         params = get_connection_params()
         print(f"🔌 Connecting to PostgreSQL at {params['host']}:{params['port']}...")
 
-        with psycopg.connect(**params) as conn:
+        with get_pool().connection() as conn:
             with conn.cursor() as cur:
                 # Test basic query
                 cur.execute("SELECT version()")
@@ -3,23 +3,16 @@
 Simple CRUD operations demo for Week 02 Lab
 """
 
-import os
-import psycopg
 from dotenv import load_dotenv
 
+from scripts.database.connection_test import get_pool
+
 # Load environment variables
 load_dotenv()
 
 def get_connection():
-    """Get database connection."""
-    params = {
-        "host": os.getenv("POSTGRES_HOST", "localhost"),
-        "port": os.getenv("POSTGRES_PORT", "5432"),
-        "dbname": os.getenv("POSTGRES_DB", "staging_db"),
-        "user": os.getenv("POSTGRES_USER", "staging_user"),
-        "password": os.getenv("POSTGRES_PASSWORD"),
-    }
-    return psycopg.connect(**params)
+    """Borrow a connection from the shared pool."""
+    return get_pool().connection()
 
 def demonstrate_crud():
     """Demonstrate basic CRUD operations."""
@@ -12,7 +12,90 @@ CREATE TABLE IF NOT EXISTS staging.raw_data (
     loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Typed staging table: JSONB payloads keyed by source, entity type and natural ID,
+-- range-partitioned by month on ingestion time so old loads can be dropped cheaply
+CREATE TABLE IF NOT EXISTS staging.records (
+    id BIGINT GENERATED ALWAYS AS IDENTITY,
+    source TEXT NOT NULL,
+    entity_type TEXT NOT NULL,
+    natural_id TEXT,
+    payload JSONB NOT NULL,
+    content_hash TEXT GENERATED ALWAYS AS (md5(payload::text)) STORED,
+    file_name VARCHAR(255),
+    ingested_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, ingested_at)
+) PARTITION BY RANGE (ingested_at);
+
+-- Latest snapshot per entity: DISTINCT ON (source, entity_type, natural_id) ORDER BY ingested_at DESC
+CREATE INDEX IF NOT EXISTS records_entity_latest_idx
+    ON staging.records (source, entity_type, natural_id, ingested_at DESC);
+
+-- Deduplication: has this exact payload already been loaded for the entity?
+CREATE INDEX IF NOT EXISTS records_entity_hash_idx
+    ON staging.records (source, entity_type, natural_id, content_hash);
+
+-- Create the monthly partition holding ts (no-op if it already exists)
+CREATE OR REPLACE FUNCTION staging.ensure_records_partition(ts TIMESTAMPTZ)
+RETURNS TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start DATE := date_trunc('month', ts)::DATE;
+    partition_name TEXT := format('records_%s', to_char(month_start, 'YYYY_MM'));
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS staging.%I PARTITION OF staging.records FOR VALUES FROM (%L) TO (%L)',
+        partition_name, month_start, (month_start + INTERVAL '1 month')::DATE
+    );
+    RETURN partition_name;
+END;
+$$;
+
+-- Retention: drop whole monthly partitions that end before cutoff instead of DELETE-ing rows
+CREATE OR REPLACE FUNCTION staging.drop_records_partitions_before(cutoff TIMESTAMPTZ)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    part RECORD;
+    dropped INTEGER := 0;
+BEGIN
+    FOR part IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+        WHERE ns.nspname = 'staging' AND parent.relname = 'records'
+    LOOP
+        IF to_date(substring(part.relname FROM 'records_(\d{4}_\d{2})'), 'YYYY_MM') + INTERVAL '1 month' <= cutoff THEN
+            EXECUTE format('DROP TABLE staging.%I', part.relname);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+    RETURN dropped;
+END;
+$$;
+
+SELECT staging.ensure_records_partition(now());
+SELECT staging.ensure_records_partition(now() + INTERVAL '1 month');
+
+-- Current version of every entity, upserted on its natural ID. Loads only
+-- touch rows whose payload changed, and only those changes reach staging.records.
+CREATE TABLE IF NOT EXISTS staging.current_records (
+    source TEXT NOT NULL,
+    entity_type TEXT NOT NULL,
+    natural_id TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    content_hash TEXT GENERATED ALWAYS AS (md5(payload::text)) STORED,
+    file_name VARCHAR(255),
+    first_seen_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (source, entity_type, natural_id)
+);
+
 -- Grant permissions (user already exists from Docker environment)
 GRANT ALL PRIVILEGES ON SCHEMA staging TO staging_user;
 GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA staging TO staging_user;
-GRANT USAGE, SELECT ON ALL SEQUENCES IN SCHEMA staging TO staging_user;
\ No newline at end of file
+GRANT USAGE, SELECT ON ALL SEQUENCES IN SCHEMA staging TO staging_user;
+GRANT EXECUTE ON ALL FUNCTIONS IN SCHEMA staging TO staging_user;
\ No newline at end of file
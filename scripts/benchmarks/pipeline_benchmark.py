@@ -0,0 +1,394 @@
+# scripts/benchmarks/pipeline_benchmark.py
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import polars as pl
+import psycopg
+from dotenv import load_dotenv
+
+from scripts.data_collection.fake_data_generator import FakeDataGenerator
+from scripts.data_collection.http_session import create_session
+from scripts.data_collection.lastfm_api_collector import LastFMAPICollector
+from scripts.data_collection.mock_api_server import HISTORY_START, MockAPIServer, create_app
+from scripts.data_collection.rate_limiter import TokenBucket
+from scripts.data_collection.scrobble_generator import ScrobbleGenerator
+from scripts.data_collection.spotify_api_collector import SpotifyAPICollector
+from scripts.data_collection.watermark_store import WatermarkStore
+from scripts.data_collection.writers import save_records, zstandard
+from scripts.database.bulk_loader import BulkLoader, natural_id
+from scripts.database.connection import close_pool, get_connection, get_connection_params
+from scripts.recommendation.engine import FEATURES, RecommendationEngine
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SUITES = ("collector", "writer", "fake_data", "recommendation", "staging")
+
+LOOKUP_SQL = """
+SELECT payload FROM staging.current_records
+WHERE source = %s AND entity_type = %s AND natural_id = %s
+"""
+
+# Benchmark rows are removed from both staging tables after every run
+CLEANUP_SQL = (
+    "DELETE FROM staging.records WHERE source = %s",
+    "DELETE FROM staging.current_records WHERE source = %s",
+)
+BENCHMARK_SOURCE = "benchmark"
+
+
+def _metric(value: float, unit: str, higher_is_better: bool = True) -> Dict:
+    return {"value": round(value, 3), "unit": unit, "higher_is_better": higher_is_better}
+
+
+def _rate(count: float, seconds: float) -> float:
+    return count / seconds if seconds else 0.0
+
+
+def _timed(func: Callable, *args, **kwargs) -> Tuple[object, float]:
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+@contextmanager
+def _patched_env(values: Dict[str, str]) -> Iterator[None]:
+    """Temporarily set environment variables, restoring the previous values afterwards."""
+    previous = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _scrobbles(count: int) -> List[Dict]:
+    return list(ScrobbleGenerator(users=1_000, artists=1_000, seed=0, start=HISTORY_START).iter_events(count))
+
+
+def bench_collector(requests: int, latency_ms: float) -> Dict[str, Dict]:
+    """Collector throughput against the mock API with ``latency_ms`` of simulated network latency.
+
+    The collectors' rate limiters are lifted, so this measures how fast the
+    client side (session pool, worker threads, JSON decoding) can go rather
+    than the production API budget.
+    """
+    app = create_app(latency_ms=latency_ms, error_rate=0, rate_limit=0, seed=0)
+    catalog = app.extensions["mock_api"]["catalog"]
+    metrics = {}
+
+    with MockAPIServer(app) as server, tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **server.env(),
+            "RESPONSE_CACHE_ENABLED": "false",
+            "LASTFM_API_KEY": "benchmark",
+            "SPOTIFY_CLIENT_ID": "benchmark",
+            "SPOTIFY_CLIENT_SECRET": "benchmark",
+        }
+        with _patched_env(env):
+            lastfm = LastFMAPICollector(session=create_session(), watermarks=WatermarkStore(Path(tmp) / "watermarks.json"))
+            lastfm.rate_limiter = TokenBucket(1e9)
+            names = [catalog.chart_artists[i % len(catalog.chart_artists)]["name"] for i in range(requests)]
+            with ThreadPoolExecutor(max_workers=lastfm.max_workers) as executor:
+                _, seconds = _timed(lambda: list(executor.map(lastfm.get_artist_info, names)))
+            metrics["collector.lastfm_requests_per_sec"] = _metric(_rate(requests, seconds), "req/s")
+
+            spotify = SpotifyAPICollector(session=create_session())
+            spotify.rate_limiter = TokenBucket(1e9)
+            limit = SpotifyAPICollector.BATCH_LIMITS["audio-features"]
+            ids = [catalog.tracks[i % len(catalog.tracks)]["id"] for i in range(min(requests, len(catalog.tracks) // limit) * limit)]
+            _, seconds = _timed(spotify.get_audio_features, ids)
+            metrics["collector.spotify_ids_per_sec"] = _metric(_rate(len(ids), seconds), "ids/s")
+
+    return metrics
+
+
+def bench_writer(rows: int) -> Dict[str, Dict]:
+    """save_records throughput per format and compression.
+
+    MB/s is measured against the uncompressed NDJSON size of the records, so
+    compressed variants are comparable with plain ones.
+    """
+    records = _scrobbles(rows)
+    variants = [("ndjson", "none"), ("json", "none"), ("ndjson", "gzip")]
+    if zstandard is not None:
+        variants.append(("ndjson", "zstd"))
+
+    metrics = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        payload_mb = None
+        for fmt, compression in variants:
+            path, seconds = _timed(save_records, records, Path(tmp) / f"{fmt}_{compression}", "benchmark",
+                                   fmt=fmt, compression=compression)
+            if payload_mb is None:
+                payload_mb = path.stat().st_size / 1e6
+            metrics[f"writer.{fmt}_{compression}_mb_per_sec"] = _metric(_rate(payload_mb, seconds), "MB/s")
+            metrics[f"writer.{fmt}_{compression}_rows_per_sec"] = _metric(_rate(rows, seconds), "rows/s")
+    return metrics
+
+
+def bench_fake_data(rows: int) -> Dict[str, Dict]:
+    """Synthetic data generation rate: vectorised bulk mode, per-record Faker and scrobble events."""
+    generator = FakeDataGenerator()
+    chunks, seconds = _timed(lambda: sum(chunk.height for chunk in generator.iter_chunks("users", rows, bulk=True)))
+    metrics = {"fake_data.bulk_rows_per_sec": _metric(_rate(chunks, seconds), "rows/s")}
+
+    faker_rows = max(rows // 100, 1)
+    _, seconds = _timed(lambda: sum(1 for _ in generator.iter_user_data(faker_rows)))
+    metrics["fake_data.faker_rows_per_sec"] = _metric(_rate(faker_rows, seconds), "rows/s")
+
+    scrobbles = ScrobbleGenerator(users=1_000, artists=1_000, seed=0, start=HISTORY_START)
+    _, seconds = _timed(lambda: sum(1 for _ in scrobbles.iter_events(rows)))
+    metrics["fake_data.scrobble_events_per_sec"] = _metric(_rate(rows, seconds), "events/s")
+    return metrics
+
+
+def _synthetic_tracks(count: int, genres: int = 114, artists: int = 30_000, seed: int = 0) -> pl.DataFrame:
+    """Random audio features shaped like the Kaggle tracks (114 genres in the real dataset)."""
+    rng = np.random.default_rng(seed)
+    frame = pl.DataFrame({name: rng.random(count, dtype=np.float32) for name in FEATURES})
+    return frame.with_columns(
+        pl.format("track{}", pl.int_range(count)).alias("id"),
+        pl.format("Song {}", pl.int_range(count)).alias("name"),
+        pl.concat_list(pl.format("Artist {}", pl.Series(rng.integers(0, artists, count)))).alias("artists"),
+        pl.format("genre{}", pl.Series(rng.integers(0, genres, count))).alias("genre"),
+    )
+
+
+def bench_recommendation(tracks: int, queries: int) -> Dict[str, Dict]:
+    """Recommendation latency over a synthetic catalog of ``tracks`` tracks.
+
+    Single queries are timed one by one, as a request handler would issue
+    them; the batch metric scores all ``queries`` seeds in one call.
+    """
+    engine = RecommendationEngine(_synthetic_tracks(tracks))
+    seeds = random.Random(0).choices(engine.ids, k=queries)
+    genres = sorted(engine.genre_code_of)[:3]
+    metrics = {}
+
+    for name, filters in (("query", {}), ("genre_query", {"genres": genres})):
+        samples = []
+        for seed in seeds:
+            start = time.perf_counter()
+            engine.recommend(seed, k=10, **filters)
+            samples.append((time.perf_counter() - start) * 1000)
+        metrics[f"recommendation.{name}_p50_ms"] = _metric(_percentile(samples, 50), "ms", higher_is_better=False)
+        metrics[f"recommendation.{name}_p95_ms"] = _metric(_percentile(samples, 95), "ms", higher_is_better=False)
+
+    _, seconds = _timed(engine.recommend_batch, seeds, 10)
+    metrics["recommendation.batch_queries_per_sec"] = _metric(_rate(queries, seconds), "queries/s")
+    return metrics
+
+
+def postgres_available(timeout: int = 3) -> bool:
+    """Return True if the staging database accepts connections."""
+    params = {name: value for name, value in get_connection_params().items() if value is not None}
+    try:
+        with psycopg.connect(connect_timeout=timeout, **params):
+            return True
+    except psycopg.OperationalError:
+        return False
+
+
+def _delete_benchmark_rows() -> None:
+    """Remove every staging row written by the staging benchmark."""
+    with get_connection() as conn:
+        for sql in CLEANUP_SQL:
+            conn.execute(sql, (BENCHMARK_SOURCE,), prepare=False)
+
+
+def bench_staging(rows: int, lookups: int) -> Dict[str, Dict]:
+    """Staging load rate (first load and unchanged reload) and point-lookup latency.
+
+    Rows are loaded as source "benchmark", entity type "scrobbles", so they
+    never mix with collected data. They are deleted before the run (in case
+    an earlier run was killed) and again when it ends, even on failure.
+    """
+    records = _scrobbles(rows)
+    loader = BulkLoader()
+    _delete_benchmark_rows()
+    try:
+        first = loader.load_records(records, BENCHMARK_SOURCE, "scrobbles", "benchmark")
+        reload = loader.load_records(records, BENCHMARK_SOURCE, "scrobbles", "benchmark")
+        metrics = {
+            "staging.load_rows_per_sec": _metric(first["rows_per_sec"], "rows/s"),
+            "staging.reload_rows_per_sec": _metric(reload["rows_per_sec"], "rows/s"),
+        }
+
+        keys = [natural_id(record) for record in random.Random(0).choices(records, k=lookups)]
+        samples = []
+        with get_connection() as conn:
+            for key in keys:
+                start = time.perf_counter()
+                conn.execute(LOOKUP_SQL, (BENCHMARK_SOURCE, "scrobbles", key), prepare=True).fetchone()
+                samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        _delete_benchmark_rows()
+    metrics["staging.lookup_p50_ms"] = _metric(_percentile(samples, 50), "ms", higher_is_better=False)
+    metrics["staging.lookup_p95_ms"] = _metric(_percentile(samples, 95), "ms", higher_is_better=False)
+    metrics["staging.lookup_mean_ms"] = _metric(statistics.fmean(samples), "ms", higher_is_better=False)
+    return metrics
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(suites: Optional[List[str]] = None, rows: Optional[int] = None,
+                   requests: Optional[int] = None, lookups: Optional[int] = None,
+                   latency_ms: Optional[float] = None, tracks: Optional[int] = None) -> Dict:
+    """Run the selected benchmark suites and return the report.
+
+    Args:
+        suites: Suites to run, any of SUITES (BENCH_SUITES, default all)
+        rows: Rows per writer, fake data and staging benchmark (BENCH_ROWS)
+        requests: Requests per collector benchmark (BENCH_REQUESTS)
+        lookups: Point lookups / recommendation queries for the latency benchmarks (BENCH_LOOKUPS)
+        latency_ms: Mock API latency per request (BENCH_MOCK_LATENCY_MS)
+        tracks: Catalog size for the recommendation benchmark (BENCH_TRACKS)
+
+    Returns:
+        Report with the environment, parameters, metrics and skipped suites
+    """
+    suites = suites or [s.strip() for s in os.getenv("BENCH_SUITES", ",".join(SUITES)).split(",") if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        raise ValueError(f"Invalid benchmark suite {sorted(unknown)}. Must be one of: {list(SUITES)}")
+    parameters = {
+        "rows": rows or int(os.getenv("BENCH_ROWS", 100_000)),
+        "requests": requests or int(os.getenv("BENCH_REQUESTS", 500)),
+        "lookups": lookups or int(os.getenv("BENCH_LOOKUPS", 1_000)),
+        "latency_ms": float(os.getenv("BENCH_MOCK_LATENCY_MS", 20)) if latency_ms is None else latency_ms,
+        "tracks": tracks or int(os.getenv("BENCH_TRACKS", 230_000)),
+    }
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": parameters,
+        "metrics": {},
+        "skipped": {},
+    }
+    for suite in suites:
+        logger.info(f"Running {suite} benchmarks")
+        if suite == "collector":
+            metrics = bench_collector(parameters["requests"], parameters["latency_ms"])
+        elif suite == "writer":
+            metrics = bench_writer(parameters["rows"])
+        elif suite == "fake_data":
+            metrics = bench_fake_data(parameters["rows"])
+        elif suite == "recommendation":
+            metrics = bench_recommendation(parameters["tracks"], parameters["lookups"])
+        elif not postgres_available():
+            report["skipped"][suite] = "PostgreSQL is not reachable"
+            logger.warning(f"Skipping {suite} benchmarks: PostgreSQL is not reachable")
+            continue
+        else:
+            metrics = bench_staging(parameters["rows"], parameters["lookups"])
+        report["metrics"].update(metrics)
+    return report
+
+
+def compare_reports(current: Dict, baseline: Dict, threshold: Optional[float] = None) -> List[Dict]:
+    """Return the metrics that got worse than ``baseline`` by more than ``threshold``.
+
+    Args:
+        current: Report of this run
+        baseline: Report to compare against
+        threshold: Tolerated relative slowdown, e.g. 0.1 for 10% (BENCH_REGRESSION_THRESHOLD)
+
+    Returns:
+        One entry per regressed metric: metric, baseline, current and change
+    """
+    threshold = float(os.getenv("BENCH_REGRESSION_THRESHOLD", 0.1)) if threshold is None else threshold
+    regressions = []
+    for name, metric in current["metrics"].items():
+        before = baseline.get("metrics", {}).get(name)
+        if not before or not before["value"]:
+            continue
+        change = (metric["value"] - before["value"]) / before["value"]
+        worse = -change if metric["higher_is_better"] else change
+        if worse > threshold:
+            regressions.append({"metric": name, "baseline": before["value"], "current": metric["value"],
+                                "change": round(change, 3)})
+    return regressions
+
+
+def find_baseline(output_dir: Path, exclude: Optional[Path] = None) -> Optional[Path]:
+    """Return BENCH_BASELINE if set, else the most recent report in ``output_dir``."""
+    if os.getenv("BENCH_BASELINE"):
+        return Path(os.getenv("BENCH_BASELINE"))
+    reports = sorted(p for p in Path(output_dir).glob("benchmark_*.json") if p != exclude)
+    return reports[-1] if reports else None
+
+
+def main():
+    """Run the benchmark suites, save the report and flag regressions against the baseline."""
+    logging.basicConfig(level=logging.INFO)
+    # Per-request collector and mock server logging would dominate the collector benchmark
+    logging.getLogger("scripts.data_collection.lastfm_api_collector").setLevel(logging.WARNING)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    output_dir = Path(os.getenv("BENCH_OUTPUT_DIR", "data/benchmarks"))
+
+    try:
+        baseline_path = find_baseline(output_dir)
+        report = run_benchmarks()
+        report_path = save_records(report, output_dir, "benchmark", fmt="json", compression="none")
+
+        for name, metric in sorted(report["metrics"].items()):
+            print(f"{name:45} {metric['value']:>14,.3f} {metric['unit']}")
+        for suite, reason in report["skipped"].items():
+            print(f"{suite:45} skipped: {reason}")
+        print(f"Benchmark report saved to: {report_path}")
+
+        if baseline_path is None:
+            return
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            regressions = compare_reports(report, json.load(f))
+        for regression in regressions:
+            print(f"REGRESSION {regression['metric']}: {regression['baseline']} -> {regression['current']} "
+                  f"({regression['change']:+.1%})")
+        if regressions:
+            raise SystemExit(f"{len(regressions)} metric(s) regressed against {baseline_path}")
+        print(f"No regressions against {baseline_path}")
+
+    except Exception as e:
+        print(f"Benchmark run failed: {e}")
+        raise
+
+    finally:
+        close_pool()
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,29 @@
 # scripts/data_collection/api_collector.py
-import json
 import logging
 import os
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional
 
 import requests
 from dotenv import load_dotenv
 
+from scripts.data_collection.collector_metrics import CollectorMetrics, export_collector_metrics, get_collector_metrics, response_size
+from scripts.data_collection.http_session import get_session
+from scripts.data_collection.parquet_sink import get_parquet_sink
+from scripts.data_collection.snapshot_manifest import get_snapshot_manifest
+from scripts.data_collection.writers import iter_records, save_records
+
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class APIDataCollector:
-    def __init__(self, api_name: str):
+    def __init__(self, api_name: str, session: Optional[requests.Session] = None,
+                 metrics: Optional[CollectorMetrics] = None):
         self.api_name = api_name
         self.api_url = os.getenv("API_URL")
         if not self.api_url:
@@ -22,41 +32,87 @@ class APIDataCollector:
         self.max_records = int(os.getenv("MAX_RECORDS", 100))
         self.batch_size = int(os.getenv("BATCH_SIZE", 10))
         self.max_retries = int(os.getenv("MAX_RETRIES", 3))
+        self.prefetch_pages = int(os.getenv("PREFETCH_PAGES", 0))
         self.data_dir = Path("data/external")
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.session = session or get_session()
+        self.metrics = metrics or get_collector_metrics()
 
     def collect_data(self, endpoint: str) -> List[Dict]:
         """Collect data from API endpoint."""
+        return list(self.iter_data(endpoint))
+
+    def iter_data(self, endpoint: str, prefetch: Optional[int] = None) -> Iterator[Dict]:
+        """Yield records from an API endpoint page by page as they arrive.
+
+        With ``prefetch`` > 0 the next pages of the offset-paginated (``_start``)
+        endpoint are requested concurrently while the current page is consumed,
+        overlapping network latency. At most ``prefetch + 1`` pages are held.
+        """
+        prefetch = self.prefetch_pages if prefetch is None else prefetch
         url = f"{self.api_url}{endpoint}"
+        endpoint = endpoint or "/"
         headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
-        all_data = []
-        params = {"_limit": self.batch_size, "_start": 0}
+        yielded = 0
+
+        with ThreadPoolExecutor(max_workers=max(prefetch, 1)) as executor:
+            pending = deque()
+            next_start = 0
+            while len(pending) <= prefetch and (not pending or next_start < self.max_records):
+                pending.append(executor.submit(self._fetch_page, url, endpoint, headers, next_start))
+                next_start += self.batch_size
+
+            try:
+                while pending and yielded < self.max_records:
+                    batch = pending.popleft().result()
+                    for record in batch[:self.max_records - yielded]:
+                        yield record
+                        yielded += 1
+                    if len(batch) < self.batch_size:
+                        break
+                    if next_start < self.max_records:
+                        pending.append(executor.submit(self._fetch_page, url, endpoint, headers, next_start))
+                        next_start += self.batch_size
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _fetch_page(self, url: str, endpoint: str, headers: Dict, start: int) -> List[Dict]:
+        """Fetch one page starting at offset ``start``, retrying with exponential backoff."""
+        params = {"_limit": self.batch_size, "_start": start}
         retries = 0
-        while len(all_data) < self.max_records:
+        while True:
             try:
-                response = requests.get(url, headers=headers, params=params)
+                request_start = time.perf_counter()
+                response = self.session.get(url, headers=headers, params=params)
+                self.metrics.observe_request(self.api_name, endpoint, time.perf_counter() - request_start,
+                                             response.status_code, response_size(response))
                 response.raise_for_status()
-                batch = response.json()
-                if not batch:
-                    break
-                all_data.extend(batch)
-                if len(batch) < self.batch_size:
-                    break
-                params["_start"] += self.batch_size
-                retries = 0
+                return response.json() or []
             except Exception as e:
                 retries += 1
                 if retries > self.max_retries:
+                    self.metrics.record_error(self.api_name, endpoint, str(e))
                     raise e
+                self.metrics.record_retry(self.api_name, endpoint, str(e), backoff=2 ** retries)
                 time.sleep(2 ** retries)
-        return all_data[:self.max_records]
-
-    def save_data(self, data: List[Dict], filename: str) -> Path:
-        """Save data to timestamped JSON file."""
-        timestamp = int(time.time())
-        file_path = self.data_dir / f"{filename}_{timestamp}.json"
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def save_data(self, data: Iterable[Dict], filename: str, fmt: Optional[str] = None,
+                  compression: Optional[str] = None) -> Optional[Path]:
+        """Save data to a timestamped JSON/NDJSON file.
+
+        ``data`` may be a list or a record stream such as ``iter_data``; records
+        are written one at a time so the payload is never held in memory.
+        Returns None, and writes nothing, if the data matches the last snapshot.
+        """
+        file_path = save_records(data, self.data_dir, filename, fmt=fmt, compression=compression,
+                                 manifest=get_snapshot_manifest())
+        if file_path is None:
+            logger.info(f"{filename} unchanged since the last snapshot, not saved")
+            return None
+        parquet_sink = get_parquet_sink()
+        if parquet_sink:
+            parquet_sink.write(iter_records(file_path), self.api_name, filename)
         return file_path
 
 def main():
@@ -64,11 +120,8 @@ def main():
     collector = APIDataCollector("your_api_name")
 
     try:
-        # Collect data from your chosen endpoint
-        data = collector.collect_data("")
-
-        # Save the data
-        collector.save_data(data, "your_data")
+        # Stream records from your chosen endpoint straight into the output file
+        collector.save_data(collector.iter_data(""), "your_data")
 
         print("Data collection completed successfully!")
 
@@ -76,5 +129,8 @@ def main():
         print(f"Data collection failed: {e}")
         raise
 
+    finally:
+        export_collector_metrics()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
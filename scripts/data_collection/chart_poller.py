@@ -0,0 +1,207 @@
+# scripts/data_collection/chart_poller.py
+import json
+import logging
+import os
+import random
+import signal
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from scripts.data_collection.collector_metrics import export_collector_metrics
+from scripts.data_collection.lastfm_api_collector import LastFMAPICollector
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Chart name -> collector method returning the chart entries in rank order
+CHARTS = {
+    "tracks": "get_top_tracks",
+    "artists": "get_top_artists",
+}
+
+CHANGE_TYPES = ("new", "moved", "updated", "dropped")
+
+
+def _count(entry: Dict, field: str) -> int:
+    return int(entry.get(field) or 0)
+
+
+def chart_key(entry: Dict) -> str:
+    """Stable identity of a chart entry: its MBID, else ``artist|name`` (many entries have no MBID)."""
+    if entry.get("mbid"):
+        return entry["mbid"]
+    artist = entry.get("artist")
+    if isinstance(artist, dict):
+        artist = artist.get("name", "")
+    return f"{artist or ''}|{entry.get('name', '')}"
+
+
+def diff_chart(previous: Dict[str, Dict], current: Dict[str, Dict], min_playcount_delta: int = 1) -> List[Dict]:
+    """Compare two chart states (``chart_key`` -> entry with ``rank``) and describe what changed.
+
+    An entry is reported when it enters or leaves the chart, changes rank, or
+    its playcount grows by at least ``min_playcount_delta``. Rank deltas are
+    positive when an entry moves up. Unchanged entries produce no event.
+
+    Returns:
+        Change dicts in current rank order, followed by dropped entries
+    """
+    changes = []
+    for key, entry in current.items():
+        before = previous.get(key)
+        change = {
+            "key": key,
+            "name": entry.get("name"),
+            "rank": entry["rank"],
+            "playcount": _count(entry, "playcount"),
+            "listeners": _count(entry, "listeners"),
+        }
+        if isinstance(entry.get("artist"), dict):
+            change["artist"] = entry["artist"].get("name")
+        if before is None:
+            changes.append({"change": "new", **change, "previous_rank": None, "rank_delta": None,
+                            "playcount_delta": None, "listeners_delta": None})
+            continue
+        rank_delta = before["rank"] - entry["rank"]
+        playcount_delta = change["playcount"] - _count(before, "playcount")
+        if rank_delta or abs(playcount_delta) >= min_playcount_delta:
+            changes.append({"change": "moved" if rank_delta else "updated", **change, "previous_rank": before["rank"],
+                            "rank_delta": rank_delta, "playcount_delta": playcount_delta,
+                            "listeners_delta": change["listeners"] - _count(before, "listeners")})
+    for key, before in previous.items():
+        if key not in current:
+            changes.append({"change": "dropped", "key": key, "name": before.get("name"), "rank": None,
+                            "previous_rank": before["rank"], "playcount": _count(before, "playcount")})
+    return changes
+
+
+class ChartPoller:
+    """Poll the Last.fm charts on a fixed interval and emit only the entries that changed.
+
+    The previous state of each chart is kept in memory, so a tick costs one
+    request per chart and appends a line per changed entry to the day's
+    NDJSON event file (data/stream/lastfm_chart_events_<date>.ndjson). Chart
+    requests bypass the response cache. The first tick reports every entry
+    as new, since there is nothing to compare against yet.
+
+    Ticks are scheduled on a fixed grid with a random offset of up to
+    ``jitter`` times the interval, so several pollers don't hit the API in
+    lockstep and slow ticks don't make the schedule drift. ``stop()`` (also
+    wired to SIGINT/SIGTERM by main) ends the loop after the current tick.
+    """
+
+    def __init__(self, collector: Optional[LastFMAPICollector] = None, interval: Optional[float] = None,
+                 jitter: Optional[float] = None, limit: Optional[int] = None, min_playcount_delta: Optional[int] = None,
+                 output_dir: Optional[Path] = None, on_events: Optional[Callable[[List[Dict]], None]] = None,
+                 seed: Optional[int] = None):
+        self.collector = collector or LastFMAPICollector()
+        self.interval = interval or float(os.getenv("CHART_POLL_INTERVAL", 300))
+        self.jitter = jitter if jitter is not None else float(os.getenv("CHART_POLL_JITTER", 0.1))
+        self.limit = limit or int(os.getenv("CHART_POLL_LIMIT", 100))
+        self.min_playcount_delta = (min_playcount_delta if min_playcount_delta is not None
+                                    else int(os.getenv("CHART_POLL_MIN_PLAYCOUNT_DELTA", 1)))
+        self.output_dir = Path(output_dir or os.getenv("CHART_POLL_OUTPUT_DIR", "data/stream"))
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.on_events = on_events
+        self.random = random.Random(seed)
+        self.state: Dict[str, Dict[str, Dict]] = {}
+        self.ticks = 0
+        self._stop = threading.Event()
+
+    def poll_once(self) -> List[Dict]:
+        """Fetch every chart once, diff it against the previous state and emit the changes.
+
+        A chart that fails to load keeps its previous state and is retried on
+        the next tick; the other charts are still processed.
+
+        Returns:
+            The events emitted for this tick
+        """
+        polled_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        events = []
+        for chart, method in CHARTS.items():
+            try:
+                entries = getattr(self.collector, method)(limit=self.limit)
+            except Exception as e:
+                logger.warning(f"Failed to poll {chart} chart: {e}")
+                continue
+            current = {}
+            for rank, entry in enumerate(entries, 1):
+                current.setdefault(chart_key(entry), {**entry, "rank": rank})
+            changes = diff_chart(self.state.get(chart, {}), current, self.min_playcount_delta)
+            self.state[chart] = current
+            events.extend({"type": "chart_change", "chart": chart, "polled_at": polled_at, **change}
+                          for change in changes)
+
+        self.ticks += 1
+        if events:
+            self._emit(events)
+        logger.info(f"Chart poll {self.ticks}: {len(events)} changed entries")
+        return events
+
+    def _emit(self, events: List[Dict]) -> Path:
+        """Append the events to the day's NDJSON file in a single write."""
+        path = self.output_dir / f"lastfm_chart_events_{datetime.now(timezone.utc):%Y%m%d}.ndjson"
+        lines = "".join(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n" for event in events)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        if self.on_events:
+            self.on_events(events)
+        return path
+
+    def next_delay(self, started: float, tick: int) -> float:
+        """Seconds until tick number ``tick`` of a schedule that started at ``started`` (monotonic)."""
+        offset = self.random.uniform(-self.jitter, self.jitter) * self.interval
+        return max(0.0, started + tick * self.interval + offset - time.monotonic())
+
+    def run(self, max_ticks: Optional[int] = None) -> None:
+        """Poll until ``stop()`` is called (or ``max_ticks`` ticks have run)."""
+        logger.info(f"Polling Last.fm charts every {self.interval:.0f}s (jitter ±{self.jitter:.0%}, top {self.limit})")
+        started, tick = time.monotonic(), 0
+        while not self._stop.is_set():
+            self.poll_once()
+            tick += 1
+            if max_ticks is not None and tick >= max_ticks:
+                break
+            # Skip slots a slow tick overran rather than firing them back to back
+            while started + tick * self.interval < time.monotonic():
+                tick += 1
+            self._stop.wait(self.next_delay(started, tick))
+        logger.info(f"Chart poller stopped after {self.ticks} ticks")
+
+    def stop(self) -> None:
+        """Ask the poll loop to exit; an in-flight tick is finished first."""
+        self._stop.set()
+
+
+def main():
+    """Run the chart poller until interrupted (SIGINT/SIGTERM)."""
+    logging.basicConfig(level=logging.INFO)
+    poller = ChartPoller()
+
+    def handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}, stopping after the current tick")
+        poller.stop()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    try:
+        poller.run()
+
+    except Exception as e:
+        print(f"Chart polling failed: {e}")
+        raise
+
+    finally:
+        export_collector_metrics()
+
+if __name__ == "__main__":
+    main()
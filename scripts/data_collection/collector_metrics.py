@@ -0,0 +1,253 @@
+# scripts/data_collection/collector_metrics.py
+import bisect
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from scripts.data_collection.writers import atomic_open
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Request latency histogram bucket upper bounds in seconds (the Prometheus client defaults)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+METRICS_FORMATS = ("json", "prometheus")
+
+# Counter name -> Prometheus help text
+COUNTERS = {
+    "requests": "HTTP requests sent, by response status",
+    "retries": "Requests retried after a failure or a 401/429 response",
+    "errors": "Calls that failed after the last retry",
+    "cache_hits": "Calls answered from the response cache",
+    "cache_misses": "Calls the response cache could not answer",
+    "response_bytes": "Decoded response body bytes received",
+    "rate_limit_wait_seconds": "Seconds spent waiting on the client-side rate limiter",
+    "backoff_seconds": "Seconds spent sleeping between retries",
+}
+
+# Spotify object IDs in request paths, collapsed so each endpoint is a single series
+_SPOTIFY_ID_PATTERN = re.compile(r"/[0-9A-Za-z]{22}(?=/|$)")
+
+_shared_metrics: Optional["CollectorMetrics"] = None
+_metrics_lock = threading.Lock()
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def endpoint_name(path: str) -> str:
+    """Normalise a request path into an endpoint label (``/artists/<id>/albums`` -> ``/artists/{id}/albums``)."""
+    return _SPOTIFY_ID_PATTERN.sub("/{id}", path.split("?", 1)[0]) or "/"
+
+
+def response_size(response) -> int:
+    """Decoded body size of a ``requests`` response."""
+    return len(response.content or b"")
+
+
+class CollectorMetrics:
+    """Thread-safe request metrics shared by the collectors.
+
+    Keeps a latency histogram per (api, endpoint) and the counters listed in
+    COUNTERS. Every observation is also passed to subscribers as an event
+    dict, e.g. ``{"type": "request", "api": "lastfm", "endpoint":
+    "chart.gettoptracks", "seconds": 0.12, "status": 200, "bytes": 5120}``.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: Dict[Labels, Dict] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._subscribers: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[Dict], None]) -> Callable[[Dict], None]:
+        """Call ``callback(event)`` for every observation from now on; returns the callback."""
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable[[Dict], None]) -> None:
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _publish(self, event: Dict) -> None:
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"Metrics subscriber {callback!r} failed: {e}")
+
+    def _inc(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe_request(self, api: str, endpoint: str, seconds: float, status: Optional[int] = None,
+                        response_bytes: int = 0) -> None:
+        """Record one HTTP request: its latency, status and response size."""
+        labels = (("api", api), ("endpoint", endpoint))
+        with self._lock:
+            histogram = self._histograms.setdefault(
+                labels, {"buckets": [0] * (len(self.buckets) + 1), "count": 0, "sum": 0.0, "max": 0.0}
+            )
+            histogram["buckets"][bisect.bisect_left(self.buckets, seconds)] += 1
+            histogram["count"] += 1
+            histogram["sum"] += seconds
+            histogram["max"] = max(histogram["max"], seconds)
+            self._inc("requests", 1, api=api, endpoint=endpoint, status=status if status is not None else "none")
+            self._inc("response_bytes", response_bytes, api=api, endpoint=endpoint)
+        self._publish({"type": "request", "api": api, "endpoint": endpoint, "seconds": seconds,
+                       "status": status, "bytes": response_bytes})
+
+    def record_retry(self, api: str, endpoint: str, reason: str, backoff: float = 0.0) -> None:
+        """Record a retried call and the backoff slept before retrying."""
+        with self._lock:
+            self._inc("retries", 1, api=api, endpoint=endpoint)
+            if backoff:
+                self._inc("backoff_seconds", backoff, api=api, endpoint=endpoint)
+        self._publish({"type": "retry", "api": api, "endpoint": endpoint, "reason": reason, "backoff": backoff})
+
+    def record_error(self, api: str, endpoint: str, reason: str) -> None:
+        """Record a call that failed for good."""
+        with self._lock:
+            self._inc("errors", 1, api=api, endpoint=endpoint)
+        self._publish({"type": "error", "api": api, "endpoint": endpoint, "reason": reason})
+
+    def record_cache(self, api: str, endpoint: str, hit: bool) -> None:
+        """Record a response cache lookup."""
+        with self._lock:
+            self._inc("cache_hits" if hit else "cache_misses", 1, api=api, endpoint=endpoint)
+        self._publish({"type": "cache_hit" if hit else "cache_miss", "api": api, "endpoint": endpoint})
+
+    def record_rate_limit_wait(self, api: str, seconds: float) -> None:
+        """Record time blocked on the client-side rate limiter (zero waits are ignored)."""
+        if not seconds:
+            return
+        with self._lock:
+            self._inc("rate_limit_wait_seconds", seconds, api=api)
+        self._publish({"type": "rate_limit_wait", "api": api, "seconds": seconds})
+
+    def _quantile(self, histogram: Dict, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the max for the overflow bucket)."""
+        rank = q * histogram["count"]
+        seen = 0
+        for bound, count in zip(self.buckets, histogram["buckets"]):
+            seen += count
+            if seen >= rank:
+                return min(bound, histogram["max"])
+        return histogram["max"]
+
+    def snapshot(self) -> Dict:
+        """Return every counter and latency histogram as a JSON-ready dict."""
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": round(value, 6)}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            latency = []
+            for labels, histogram in sorted(self._histograms.items()):
+                cumulative, buckets = 0, {}
+                for bound, count in zip(self.buckets + (math.inf,), histogram["buckets"]):
+                    cumulative += count
+                    buckets["+Inf" if bound == math.inf else str(bound)] = cumulative
+                latency.append({
+                    **dict(labels),
+                    "count": histogram["count"],
+                    "sum_seconds": round(histogram["sum"], 6),
+                    "mean_seconds": round(histogram["sum"] / histogram["count"], 6),
+                    "p50_seconds": self._quantile(histogram, 0.5),
+                    "p95_seconds": self._quantile(histogram, 0.95),
+                    "max_seconds": round(histogram["max"], 6),
+                    "buckets": buckets,
+                })
+        return {"created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "counters": counters, "latency": latency}
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+
+        def label_text(labels: Dict) -> str:
+            return ",".join(f'{k}="{v}"' for k, v in labels.items())
+
+        lines = [
+            "# HELP collector_request_duration_seconds HTTP request latency",
+            "# TYPE collector_request_duration_seconds histogram",
+        ]
+        for series in snapshot["latency"]:
+            labels = label_text({"api": series["api"], "endpoint": series["endpoint"]})
+            for bound, count in series["buckets"].items():
+                lines.append(f'collector_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"collector_request_duration_seconds_sum{{{labels}}} {series['sum_seconds']}")
+            lines.append(f"collector_request_duration_seconds_count{{{labels}}} {series['count']}")
+
+        for name, help_text in COUNTERS.items():
+            series = [c for c in snapshot["counters"] if c["name"] == name]
+            if not series:
+                continue
+            lines.append(f"# HELP collector_{name}_total {help_text}")
+            lines.append(f"# TYPE collector_{name}_total counter")
+            lines.extend(f"collector_{name}_total{{{label_text(c['labels'])}}} {c['value']}" for c in series)
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: Optional[Path] = None, fmt: Optional[str] = None) -> Path:
+        """Write the metrics to ``path`` as JSON or Prometheus text.
+
+        Args:
+            path: Output file (defaults to COLLECTOR_METRICS_DIR/collector_metrics_<timestamp>.json|.prom)
+            fmt: "json" or "prometheus" (defaults to COLLECTOR_METRICS_FORMAT, else "json")
+
+        Returns:
+            Path of the written file
+        """
+        fmt = (fmt or os.getenv("COLLECTOR_METRICS_FORMAT", "json")).lower()
+        if fmt not in METRICS_FORMATS:
+            raise ValueError(f"Invalid metrics format. Must be one of: {list(METRICS_FORMATS)}")
+        if path is None:
+            directory = Path(os.getenv("COLLECTOR_METRICS_DIR", "data/metrics"))
+            path = directory / f"collector_metrics_{int(time.time())}.{'json' if fmt == 'json' else 'prom'}"
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_open(path) as f:
+            if fmt == "json":
+                json.dump(self.snapshot(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
+        return path
+
+    def reset(self) -> None:
+        """Drop every recorded observation (subscribers stay registered)."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def get_collector_metrics() -> CollectorMetrics:
+    """Return the process-wide metrics shared by all collectors, creating them on first use."""
+    global _shared_metrics
+    if _shared_metrics is None:
+        with _metrics_lock:
+            if _shared_metrics is None:
+                _shared_metrics = CollectorMetrics()
+    return _shared_metrics
+
+
+def export_collector_metrics() -> Optional[Path]:
+    """Export the shared metrics at the end of a run, unless COLLECTOR_METRICS_FORMAT is "none"."""
+    if os.getenv("COLLECTOR_METRICS_FORMAT", "json").lower() == "none":
+        return None
+    path = get_collector_metrics().export()
+    logger.info(f"Collector metrics saved to: {path}")
+    return path
@@ -1,24 +1,209 @@
 # scripts/data_collection/fake_data_generator.py
-import json
 import csv
 import logging
-from datetime import datetime
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional
 
+import numpy as np
+import polars as pl
+from dotenv import load_dotenv
 from faker import Faker
 
+from scripts.data_collection.parquet_sink import ParquetSink
+from scripts.data_collection.writers import atomic_open, write_json
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Bulk mode: distinct Faker values per text column, sampled by NumPy for every row
+POOL_SIZE = 10_000
+BULK_KINDS = ("users", "transactions", "data_quality")
+
+# Lookup table turning bytes into two hex digits
+_HEX_DIGITS = np.array([f"{i:02x}" for i in range(256)])
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _uuid4_column(rng: np.random.Generator, count: int) -> pl.Series:
+    """Return ``count`` random version-4 UUID strings built without a Python loop."""
+    raw = rng.integers(0, 256, size=(count, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    hex_digits = pl.Series(np.ascontiguousarray(_HEX_DIGITS[raw]).view("<U32").ravel())
+    parts = [hex_digits.str.slice(start, length) for start, length in ((0, 8), (8, 4), (12, 4), (16, 4), (20, 12))]
+    return pl.select(pl.concat_str(parts, separator="-")).to_series()
+
+
+def _faker_pool(fake: Faker, method: str, size: int = POOL_SIZE) -> pl.Series:
+    """Call a Faker provider ``size`` times once, so rows can sample it by index."""
+    provider = getattr(fake, method)
+    return pl.Series([provider() for _ in range(size)])
+
+
+def _sample(rng: np.random.Generator, pool: pl.Series, count: int) -> pl.Series:
+    """Draw ``count`` values from ``pool`` uniformly with replacement."""
+    return pool.gather(rng.integers(0, pool.len(), size=count))
+
+
+def _timestamps(rng: np.random.Generator, count: int, start: datetime, end: datetime) -> pl.Series:
+    """Return ``count`` ISO-formatted timestamps uniformly drawn from [start, end)."""
+    # Naive arithmetic, not .timestamp(): that reads a naive datetime as local time,
+    # while the Datetime cast below reads the number back as UTC
+    start_us = (start - _EPOCH) // timedelta(microseconds=1)
+    end_us = (end - _EPOCH) // timedelta(microseconds=1)
+    micros = pl.Series(rng.integers(start_us, end_us, size=count))
+    return micros.cast(pl.Datetime("us")).dt.strftime("%Y-%m-%dT%H:%M:%S%.6f")
+
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    return np.round(values, 2)
+
+
+def generate_bulk_shard(kind: str, count: int, seed: int, now: Optional[datetime] = None) -> pl.DataFrame:
+    """Generate one shard of bulk rows with the same columns as the per-record generators.
+
+    Numeric and categorical columns are drawn with NumPy; text columns sample
+    pools of Faker values. The same (kind, count, seed, now) always gives the same rows.
+    """
+    rng = np.random.default_rng(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+    now = now or datetime.now()
+
+    if kind == "users":
+        dob_days = rng.integers(18 * 365, 90 * 365, size=count).astype("timedelta64[D]")
+        return pl.DataFrame({
+            "user_id": _uuid4_column(rng, count),
+            "name": _sample(rng, _faker_pool(fake, "name"), count),
+            "email": _sample(rng, _faker_pool(fake, "email"), count),
+            "address": _sample(rng, _faker_pool(fake, "address"), count).str.replace_all("\n", ", ", literal=True),
+            "phone": _sample(rng, _faker_pool(fake, "phone_number"), count),
+            "dob": pl.Series(np.datetime64(now.date(), "D") - dob_days).dt.to_string("%Y-%m-%d"),
+            "created_at": _timestamps(rng, count, datetime(now.year - now.year % 10, 1, 1), now),
+        })
+
+    if kind == "transactions":
+        currencies = pl.Series([fake.currency_code() for _ in range(200)])
+        return pl.DataFrame({
+            "transaction_id": _uuid4_column(rng, count),
+            "user_id": _uuid4_column(rng, count),
+            "amount": _round2(rng.uniform(0.01, 1000, size=count)),
+            "currency": _sample(rng, currencies, count),
+            "timestamp": _timestamps(rng, count, datetime(now.year, 1, 1), now),
+            "status": rng.choice(["completed", "pending", "failed"], size=count),
+        })
+
+    if kind == "data_quality":
+        return pl.DataFrame({
+            "sensor_id": _uuid4_column(rng, count),
+            "timestamp": _timestamps(rng, count, datetime(now.year, 1, 1), now),
+            "pm25": _round2(rng.uniform(0, 500, size=count)),
+            "pm10": _round2(rng.uniform(0, 600, size=count)),
+            "co": _round2(rng.uniform(0, 50, size=count)),
+            "no2": _round2(rng.uniform(0, 200, size=count)),
+            "o3": _round2(rng.uniform(0, 300, size=count)),
+            "temperature": _round2(rng.uniform(-20, 50, size=count)),
+            "humidity": _round2(rng.uniform(0, 100, size=count)),
+            "quality_flag": rng.choice(["good", "moderate", "unhealthy", "hazardous"], size=count),
+        })
+
+    raise ValueError(f"Invalid bulk kind. Must be one of: {list(BULK_KINDS)}")
+
+
+def generate_bulk(kind: str, count: int, seed: int = 0, shard_size: Optional[int] = None,
+                  workers: Optional[int] = None, now: Optional[datetime] = None) -> Iterator[pl.DataFrame]:
+    """Yield ``count`` bulk rows as DataFrame shards generated across processes.
+
+    Shard seeds are spawned from ``seed`` and every shard shares one ``now``
+    anchor, so a run with the same seed and ``now`` is reproducible regardless
+    of the number of workers. At most two shards per worker are in flight, so
+    memory stays bounded however slowly the caller consumes them.
+
+    Args:
+        kind: "users", "transactions" or "data_quality"
+        count: Total number of rows
+        seed: Root seed of the run
+        shard_size: Rows per shard (FAKE_BULK_SHARD_SIZE)
+        workers: Worker processes (FAKE_BULK_WORKERS, defaults to the CPU count)
+        now: Upper bound of the generated timestamps (FAKE_BULK_NOW as ISO datetime, else the current time)
+    """
+    if kind not in BULK_KINDS:
+        raise ValueError(f"Invalid bulk kind. Must be one of: {list(BULK_KINDS)}")
+    shard_size = shard_size or int(os.getenv("FAKE_BULK_SHARD_SIZE", 1_000_000))
+    workers = workers or int(os.getenv("FAKE_BULK_WORKERS", os.cpu_count() or 1))
+
+    sizes = [shard_size] * (count // shard_size) + ([count % shard_size] if count % shard_size else [])
+    seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(len(sizes))]
+    if now is None:
+        now = datetime.fromisoformat(os.getenv("FAKE_BULK_NOW")) if os.getenv("FAKE_BULK_NOW") else datetime.now()
+
+    if workers <= 1 or len(sizes) <= 1:
+        for size, shard_seed in zip(sizes, seeds):
+            yield generate_bulk_shard(kind, size, shard_seed, now)
+        return
+
+    # spawn, not fork: forking a process with live Polars/NumPy thread pools can deadlock
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        pending = deque()
+        for size, shard_seed in zip(sizes, seeds):
+            pending.append(executor.submit(generate_bulk_shard, kind, size, shard_seed, now))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+class _Progress:
+    """Log rows written and throughput every ``interval`` seconds while a long output runs."""
+
+    def __init__(self, label: str, interval: Optional[float] = None):
+        self.label = label
+        self.interval = interval or float(os.getenv("FAKE_PROGRESS_INTERVAL", 5))
+        self.rows = 0
+        self.start = self.last_report = time.perf_counter()
+
+    def update(self, rows: int) -> None:
+        self.rows += rows
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            logger.info(f"{self.label}: {self.rows:,} rows ({self.rows / (now - self.start):,.0f} rows/s)")
+
+    def finish(self) -> None:
+        seconds = time.perf_counter() - self.start
+        logger.info(f"{self.label}: wrote {self.rows:,} rows in {seconds:.1f}s ({self.rows / max(seconds, 1e-9):,.0f} rows/s)")
+
+
 class FakeDataGenerator:
+    # Per-record producer of each data kind
+    RECORD_PRODUCERS = {
+        "users": "iter_user_data",
+        "transactions": "iter_transaction_data",
+        "data_quality": "iter_data_quality",
+    }
+    CHUNKED_FORMATS = ("csv", "ndjson", "parquet")
+
     def __init__(self):
         self.fake = Faker()
         self.data_dir = Path("data/external")
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.parquet_sink = ParquetSink()
+        self.chunk_size = int(os.getenv("FAKE_CHUNK_SIZE", 100_000))
 
-    def generate_user_data(self, count: int = 100) -> List[Dict]:
-        """Generate fake user data."""
-        users = []
+    def iter_user_data(self, count: int = 100) -> Iterator[Dict]:
+        """Yield fake user records one at a time."""
         for _ in range(count):
-            users.append({
+            yield {
                 "user_id": self.fake.uuid4(),
                 "name": self.fake.name(),
                 "email": self.fake.email(),
@@ -26,28 +211,24 @@ class FakeDataGenerator:
                 "phone": self.fake.phone_number(),
                 "dob": self.fake.date_of_birth(minimum_age=18, maximum_age=90).isoformat(),
                 "created_at": self.fake.date_time_this_decade().isoformat()
-            })
-        return users
+            }
 
-    def generate_transaction_data(self, count: int = 100) -> List[Dict]:
-        """Generate fake transaction data."""
-        transactions = []
+    def iter_transaction_data(self, count: int = 100) -> Iterator[Dict]:
+        """Yield fake transaction records one at a time."""
         for _ in range(count):
-            transactions.append({
+            yield {
                 "transaction_id": self.fake.uuid4(),
                 "user_id": self.fake.uuid4(),
                 "amount": round(self.fake.pyfloat(left_digits=3, right_digits=2, positive=True), 2),
                 "currency": self.fake.currency_code(),
                 "timestamp": self.fake.date_time_this_year().isoformat(),
                 "status": self.fake.random_element(["completed", "pending", "failed"])
-            })
-        return transactions
+            }
 
-    def generate_data_quality(self, count: int = 100) -> List[Dict]:
-        """Generate fake air quality sensor data."""
-        records = []
+    def iter_data_quality(self, count: int = 100) -> Iterator[Dict]:
+        """Yield fake air quality sensor records one at a time."""
         for _ in range(count):
-            records.append({
+            yield {
                 "sensor_id": self.fake.uuid4(),
                 "timestamp": self.fake.date_time_this_year().isoformat(),
                 "pm25": round(self.fake.pyfloat(left_digits=3, right_digits=2, min_value=0, max_value=500), 2),
@@ -58,29 +239,109 @@ class FakeDataGenerator:
                 "temperature": round(self.fake.pyfloat(left_digits=2, right_digits=2, min_value=-20, max_value=50), 2),
                 "humidity": round(self.fake.pyfloat(left_digits=3, right_digits=2, min_value=0, max_value=100), 2),
                 "quality_flag": self.fake.random_element(["good", "moderate", "unhealthy", "hazardous"])
-            })
-        return records
+            }
 
-    def save_data_as_json(self, data: List[Dict], filename: str) -> Path:
-        """Save data to JSON file."""
+    def generate_user_data(self, count: int = 100) -> List[Dict]:
+        """Generate fake user data."""
+        return list(self.iter_user_data(count))
+
+    def generate_transaction_data(self, count: int = 100) -> List[Dict]:
+        """Generate fake transaction data."""
+        return list(self.iter_transaction_data(count))
+
+    def generate_data_quality(self, count: int = 100) -> List[Dict]:
+        """Generate fake air quality sensor data."""
+        return list(self.iter_data_quality(count))
+
+    def iter_chunks(self, kind: str, count: int, bulk: bool = True, seed: int = 0,
+                    workers: Optional[int] = None, now: Optional[datetime] = None) -> Iterator[pl.DataFrame]:
+        """Yield ``count`` rows of ``kind`` as DataFrames of at most ``chunk_size`` rows.
+
+        Args:
+            kind: "users", "transactions" or "data_quality"
+            count: Total number of rows
+            bulk: Use the vectorised bulk mode (else the per-record Faker producers)
+            seed: Root seed of the bulk run
+            workers: Bulk worker processes (FAKE_BULK_WORKERS)
+            now: Timestamp anchor of the bulk run (see generate_bulk)
+        """
+        if kind not in self.RECORD_PRODUCERS:
+            raise ValueError(f"Invalid kind. Must be one of: {list(self.RECORD_PRODUCERS)}")
+        if bulk:
+            yield from generate_bulk(kind, count, seed=seed, shard_size=self.chunk_size, workers=workers, now=now)
+            return
+
+        records = getattr(self, self.RECORD_PRODUCERS[kind])(count)
+        while chunk := list(islice(records, self.chunk_size)):
+            yield pl.DataFrame(chunk)
+
+    def save_chunked(self, chunks: Iterable[pl.DataFrame], filename: str, fmt: str = "csv") -> Path:
+        """Write DataFrame chunks one at a time, so memory is bounded by the chunk size.
+
+        CSV and NDJSON go to a single file in data/external (renamed into place
+        once complete); Parquet adds one part file per chunk to today's
+        source=faker/dataset=filename partition. Progress is logged as rows/s.
+
+        Returns:
+            Path of the file, or of the Parquet partition directory
+        """
+        if fmt not in self.CHUNKED_FORMATS:
+            raise ValueError(f"Invalid format. Must be one of: {list(self.CHUNKED_FORMATS)}")
+        progress = _Progress(filename)
+
+        if fmt == "parquet":
+            for chunk in chunks:
+                self.parquet_sink.write_frame(chunk, "faker", filename)
+                progress.update(chunk.height)
+            progress.finish()
+            return self.parquet_sink.partition_path("faker", filename)
+
+        file_path = self.data_dir / f"{filename}.{fmt}"
+        with atomic_open(file_path) as f:
+            for i, chunk in enumerate(chunks):
+                if fmt == "csv":
+                    chunk.write_csv(f, include_header=i == 0)
+                else:
+                    chunk.write_ndjson(f)
+                progress.update(chunk.height)
+        progress.finish()
+        return file_path
+
+    def save_bulk_as_parquet(self, kind: str, count: int, filename: str, seed: int = 0,
+                             workers: Optional[int] = None, now: Optional[datetime] = None) -> Path:
+        """Generate ``count`` rows in bulk mode into today's Parquet partition, one part file per shard."""
+        return self.save_chunked(self.iter_chunks(kind, count, seed=seed, workers=workers, now=now), filename, "parquet")
+
+    def save_data_as_json(self, data: Iterable[Dict], filename: str) -> Path:
+        """Save data to JSON file, streaming records from any iterable."""
         file_path = self.data_dir / f"{filename}.json"
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        write_json(data, file_path)
         return file_path
 
-    def save_data_as_csv(self, data: List[Dict], filename: str) -> Path:
-        """Save data to CSV file."""
-        if not data:
+    def save_data_as_csv(self, data: Iterable[Dict], filename: str) -> Path:
+        """Save data to CSV file, streaming records from any iterable."""
+        records = iter(data)
+        first = next(records, None)
+        if first is None:
             raise ValueError("No data to save.")
         file_path = self.data_dir / f"{filename}.csv"
-        with open(file_path, "w", newline='', encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=data[0].keys())
+        with atomic_open(file_path) as f:
+            writer = csv.DictWriter(f, fieldnames=first.keys())
             writer.writeheader()
-            writer.writerows(data)
+            writer.writerow(first)
+            writer.writerows(records)
         return file_path
 
+    def save_data_as_parquet(self, data: List[Dict], filename: str) -> Path:
+        """Save data to today's Parquet partition (source=faker, dataset=filename)."""
+        if not data:
+            raise ValueError("No data to save.")
+        self.parquet_sink.write(data, "faker", filename, flatten=False)
+        return self.parquet_sink.partition_path("faker", filename)
+
 def main():
     """Main function to demonstrate fake data generation."""
+    logging.basicConfig(level=logging.INFO)
     generator = FakeDataGenerator()
 
     try:
@@ -94,6 +355,14 @@ def main():
         generator.save_data_as_csv(transactions, "fake_transactions")
         generator.save_data_as_json(data_quality, "fake_data_quality")
         generator.save_data_as_csv(data_quality, "fake_data_quality")
+        generator.save_data_as_parquet(transactions, "fake_transactions")
+
+        # Bulk mode for load tests: FAKE_BULK_ROWS rows of each kind, written chunk by chunk
+        bulk_rows = int(os.getenv("FAKE_BULK_ROWS", 0))
+        bulk_format = os.getenv("FAKE_BULK_FORMAT", "parquet")
+        if bulk_rows:
+            for kind in BULK_KINDS:
+                generator.save_chunked(generator.iter_chunks(kind, bulk_rows), f"fake_bulk_{kind}", bulk_format)
 
         print("Fake data generation completed successfully!")
 
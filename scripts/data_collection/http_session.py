@@ -0,0 +1,60 @@
+# scripts/data_collection/http_session.py
+import os
+import threading
+from typing import Optional
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+# Load environment variables
+load_dotenv()
+
+_shared_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def create_session(pool_size: Optional[int] = None, pool_connections: Optional[int] = None) -> requests.Session:
+    """Create a requests session with a pooled, keep-alive HTTP adapter.
+
+    Args:
+        pool_size: Maximum number of kept-alive connections per host (HTTP_POOL_SIZE)
+        pool_connections: Number of per-host pools to keep cached (HTTP_POOL_CONNECTIONS)
+
+    Returns:
+        A session that reuses TCP/TLS connections and accepts compressed responses
+    """
+    pool_size = pool_size or int(os.getenv("HTTP_POOL_SIZE", 10))
+    pool_connections = pool_connections or int(os.getenv("HTTP_POOL_CONNECTIONS", 10))
+
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    # Advertise every content encoding urllib3 can decode here (gzip/deflate, plus br/zstd when installed)
+    session.headers.update({
+        "Accept-Encoding": make_headers(accept_encoding=True)["accept-encoding"],
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide shared session, creating it on first use."""
+    global _shared_session
+    if _shared_session is None:
+        with _session_lock:
+            if _shared_session is None:
+                _shared_session = create_session()
+    return _shared_session
+
+
+def close_session() -> None:
+    """Close the shared session and release its pooled connections."""
+    global _shared_session
+    with _session_lock:
+        if _shared_session is not None:
+            _shared_session.close()
+            _shared_session = None
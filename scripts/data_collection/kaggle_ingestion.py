@@ -0,0 +1,171 @@
+# scripts/data_collection/kaggle_ingestion.py
+import logging
+import os
+import tempfile
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import kagglehub
+import polars as pl
+from dotenv import load_dotenv
+
+from scripts.data_collection.parquet_sink import ParquetSink
+from scripts.data_collection.writers import iter_records
+from scripts.database.bulk_loader import BulkLoader
+from scripts.database.connection import close_pool
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+KAGGLE_DATASET = "maharshipandya/-spotify-tracks-dataset"
+
+# Column names used by the published CSV, mapped onto the documented batch schema
+COLUMN_ALIASES = {"track_id": "id", "track_name": "name", "album_name": "album", "track_genre": "genre"}
+
+# Target schema (docs/data-source/batch-source-validation.md); every column is cast explicitly
+TRACK_SCHEMA = {
+    "id": pl.String,
+    "name": pl.String,
+    "artists": pl.List(pl.String),
+    "album": pl.String,
+    "release_date": pl.Date,
+    "genre": pl.String,
+    "popularity": pl.Int16,
+    "duration_ms": pl.Int64,
+    "explicit": pl.Boolean,
+    "danceability": pl.Float32,
+    "energy": pl.Float32,
+    "key": pl.Int8,
+    "loudness": pl.Float32,
+    "mode": pl.Int8,
+    "speechiness": pl.Float32,
+    "acousticness": pl.Float32,
+    "instrumentalness": pl.Float32,
+    "liveness": pl.Float32,
+    "valence": pl.Float32,
+    "tempo": pl.Float32,
+    "time_signature": pl.Int8,
+}
+
+# A quoted element of a Python list literal such as "['Coldplay', \"Guns N' Roses\"]"
+ARTIST_LITERAL_PATTERN = r"""'[^']*'|"[^"]*\""""
+
+
+def parse_artists(col: pl.Expr) -> pl.Expr:
+    """Parse the ``artists`` list literal (or the "A;B" form) into a list column."""
+    literal = col.str.extract_all(ARTIST_LITERAL_PATTERN).list.eval(
+        pl.element().str.slice(1, pl.element().str.len_chars() - 2)
+    )
+    return pl.when(col.str.starts_with("[")).then(literal).otherwise(col.str.split(";"))
+
+
+def _cast(name: str, dtype: pl.DataType) -> pl.Expr:
+    col = pl.col(name).str.strip_chars()
+    if name == "artists":
+        return parse_artists(col)
+    if dtype == pl.Boolean:
+        return col.str.to_lowercase().replace_strict({"true": True, "false": False}, default=None, return_dtype=pl.Boolean)
+    if dtype == pl.Date:
+        return col.str.to_date("%Y-%m-%d", strict=False)
+    return col.cast(dtype, strict=False)
+
+
+def scan_tracks(csv_path: Path) -> pl.LazyFrame:
+    """Lazily read the tracks CSV as typed, deduplicated rows (one per track ``id``).
+
+    Every column is read as text and cast explicitly, so malformed values
+    become nulls instead of failing the whole scan; missing columns are null.
+    """
+    lf = pl.scan_csv(
+        csv_path,
+        infer_schema=False,
+        with_column_names=lambda names: [COLUMN_ALIASES.get(name, name) for name in names],
+    )
+    present = set(lf.collect_schema().names())
+    columns = [
+        _cast(name, dtype).alias(name) if name in present else pl.lit(None, dtype=dtype).alias(name)
+        for name, dtype in TRACK_SCHEMA.items()
+    ]
+    # is_first_distinct keeps the first row per id in file order and, unlike
+    # unique(), runs in the streaming engine without buffering whole partitions
+    return lf.select(columns).filter(pl.col("id").is_not_null() & pl.col("id").is_first_distinct())
+
+
+def iter_parquet_records(path: Path) -> Iterator[Dict]:
+    """Yield the rows of a Parquet file as JSON-ready dicts without loading the file into memory.
+
+    The streaming engine converts the file to NDJSON in a temporary directory
+    in a single pass, and the rows are then read back one line at a time.
+    Slicing the scan per batch would re-plan and re-read the file for every
+    batch, which grows quadratically with its size.
+    """
+    with tempfile.TemporaryDirectory(prefix="kaggle_records_") as tmp_dir:
+        ndjson_path = Path(tmp_dir) / "records.ndjson"
+        pl.scan_parquet(path).sink_ndjson(ndjson_path)
+        yield from iter_records(ndjson_path)
+
+
+def download_dataset() -> Path:
+    """Return the tracks CSV, downloading the Kaggle dataset unless KAGGLE_TRACKS_CSV is set."""
+    csv_path = os.getenv("KAGGLE_TRACKS_CSV")
+    if csv_path:
+        return Path(csv_path)
+
+    dataset_dir = Path(kagglehub.dataset_download(KAGGLE_DATASET))
+    csv_files = sorted(dataset_dir.rglob("*.csv"))
+    if not csv_files:
+        raise FileNotFoundError(f"No CSV file found in {dataset_dir}")
+    return csv_files[0]
+
+
+def ingest_tracks(csv_path: Optional[Path] = None, sink: Optional[ParquetSink] = None,
+                  loader: Optional[BulkLoader] = None, ingestion_date: Optional[date] = None) -> Dict:
+    """Land the Kaggle tracks CSV in the Parquet lake and, optionally, Postgres staging.
+
+    The CSV is scanned, cast and deduplicated by the streaming engine on all
+    cores straight into one Parquet part file; staging is then loaded from
+    that file one row at a time, so memory stays bounded whatever its size.
+
+    Args:
+        csv_path: Tracks CSV (defaults to the downloaded Kaggle dataset)
+        sink: Parquet sink (source=kaggle, dataset=tracks)
+        loader: Bulk loader for staging.records; None skips Postgres
+        ingestion_date: Partition date (defaults to today)
+
+    Returns:
+        Ingestion statistics: parquet path, rows and the staging load stats
+    """
+    csv_path = Path(csv_path or download_dataset())
+    sink = sink or ParquetSink()
+
+    parquet_path = sink.sink_lazy(scan_tracks(csv_path), "kaggle", "tracks", ingestion_date)
+    rows = pl.scan_parquet(parquet_path).select(pl.len()).collect().item()
+    logger.info(f"Landed {rows} unique tracks from {csv_path.name} in {parquet_path}")
+
+    stats = {"parquet": str(parquet_path), "rows": rows}
+    if loader is not None:
+        stats["staging"] = loader.load_records(iter_parquet_records(parquet_path), "kaggle", "tracks", csv_path.name)
+    return stats
+
+
+def main():
+    """Ingest the Kaggle Spotify tracks dataset into the lake and staging."""
+    logging.basicConfig(level=logging.INFO)
+    load_postgres = os.getenv("KAGGLE_LOAD_POSTGRES", "true").lower() in ("1", "true", "yes")
+
+    try:
+        stats = ingest_tracks(loader=BulkLoader() if load_postgres else None)
+        print(f"Kaggle ingestion completed: {stats['rows']} tracks -> {stats['parquet']}")
+
+    except Exception as e:
+        print(f"Kaggle ingestion failed: {e}")
+        raise
+
+    finally:
+        close_pool()
+
+if __name__ == "__main__":
+    main()
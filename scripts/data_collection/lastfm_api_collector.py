@@ -3,35 +3,81 @@ import json
 import logging
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
 import requests
 from dotenv import load_dotenv
 
+from scripts.data_collection.collector_metrics import CollectorMetrics, export_collector_metrics, get_collector_metrics, response_size
+from scripts.data_collection.http_session import get_session
+from scripts.data_collection.parquet_sink import ParquetSink, get_parquet_sink
+from scripts.data_collection.rate_limiter import get_rate_limiter
+from scripts.data_collection.response_cache import ResponseCache, get_response_cache
+from scripts.data_collection.snapshot_manifest import SnapshotManifest, get_snapshot_manifest
+from scripts.data_collection.watermark_store import WatermarkStore
+from scripts.data_collection.writers import iter_records, save_records
+
 # Load environment variables
 load_dotenv()
 
 class LastFMAPICollector:
     """Last.fm API data collector for music data."""
     
-    def __init__(self):
+    POPULAR_GENRES = ['rock', 'pop', 'electronic', 'hip-hop', 'jazz', 'classical']
+    
+    def __init__(self, session: Optional[requests.Session] = None, cache: Optional[ResponseCache] = None,
+                 watermarks: Optional[WatermarkStore] = None, parquet_sink: Optional[ParquetSink] = None,
+                 manifest: Optional[SnapshotManifest] = None, metrics: Optional[CollectorMetrics] = None):
         self.api_key = os.getenv("LASTFM_API_KEY")
         if not self.api_key:
             raise ValueError("LASTFM_API_KEY environment variable is not set. Please add your Last.fm API key to .env file.")
         
-        self.base_url = "http://ws.audioscrobbler.com/2.0/"
+        self.base_url = os.getenv("LASTFM_API_URL", "http://ws.audioscrobbler.com/2.0/")
         self.max_retries = int(os.getenv("MAX_RETRIES", 3))
-        self.delay_between_requests = float(os.getenv("REQUEST_DELAY", 0.2))  # Rate limiting
+        # Rate limiting: LASTFM_RATE_LIMIT requests/sec, falling back to 1 / REQUEST_DELAY
+        default_rate = 1 / float(os.getenv("REQUEST_DELAY", 0.2))
+        self.rate_limit = float(os.getenv("LASTFM_RATE_LIMIT", default_rate))
+        self.rate_limiter = get_rate_limiter("lastfm", self.rate_limit)
+        self.max_workers = int(os.getenv("LASTFM_MAX_WORKERS", 8))
         self.data_dir = Path("data/external")
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
+        # Pooled keep-alive session shared by all collectors
+        self.session = session or get_session()
+        
+        # On-disk response cache for slowly changing metadata (charts opt out)
+        self.cache = cache or get_response_cache()
+        
+        # Per-stream checkpoints for incremental scrobble ingestion
+        self.watermarks = watermarks or WatermarkStore()
+        
+        # Optional columnar copy of every saved dataset (PARQUET_SINK_ENABLED)
+        self.parquet_sink = parquet_sink or get_parquet_sink()
+        
+        # Content hashes of the last saved snapshots, to skip unchanged ones
+        self.manifest = manifest or get_snapshot_manifest()
+        
+        # Per-endpoint latency, retry, error, cache and rate-limit metrics
+        self.metrics = metrics or get_collector_metrics()
+        
         # Setup logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
     def _make_request(self, method: str, **params) -> Dict:
-        """Make a request to Last.fm API with retry logic."""
+        """Make a request to Last.fm API with retry logic.
+        
+        Responses for cacheable methods are served from and stored in the
+        response cache; methods with a zero TTL always hit the API.
+        """
+        if self.cache:
+            cached = self.cache.get(method, params)
+            self.metrics.record_cache("lastfm", method, hit=cached is not None)
+            if cached is not None:
+                return cached
+        
         params.update({
             "api_key": self.api_key,
             "method": method,
@@ -39,24 +85,45 @@ class LastFMAPICollector:
         })
         
         for attempt in range(self.max_retries):
+            rate_limited = False
             try:
-                response = requests.get(self.base_url, params=params)
+                self.metrics.record_rate_limit_wait("lastfm", self.rate_limiter.acquire())
+                start = time.perf_counter()
+                response = self.session.get(self.base_url, params=params)
+                self.metrics.observe_request("lastfm", method, time.perf_counter() - start,
+                                             response.status_code, response_size(response))
+                self.rate_limiter.update_from_headers(response.headers)
+                if response.status_code == 429:
+                    # Retry-After already paused the shared limiter; without one, pause it here
+                    rate_limited = True
+                    if response.headers.get("retry-after") is None:
+                        self.rate_limiter.pause(2 ** attempt)
+                    raise Exception("Last.fm API rate limit exceeded (HTTP 429)")
                 response.raise_for_status()
                 
                 data = response.json()
                 
-                # Check for Last.fm API errors
+                # Check for Last.fm API errors (29 = rate limit exceeded)
                 if "error" in data:
+                    if data["error"] == 29:
+                        # The shared pause is the backoff; the retry waits for it in acquire()
+                        rate_limited = True
+                        self.rate_limiter.pause(2 ** attempt)
                     raise Exception(f"Last.fm API error: {data['message']}")
                 
-                # Rate limiting
-                time.sleep(self.delay_between_requests)
+                if self.cache:
+                    self.cache.set(method, params, data)
                 return data
                 
             except Exception as e:
                 self.logger.warning(f"Request attempt {attempt + 1} failed: {e}")
                 if attempt == self.max_retries - 1:
+                    self.metrics.record_error("lastfm", method, str(e))
                     raise e
+                if rate_limited:
+                    self.metrics.record_retry("lastfm", method, str(e))
+                    continue
+                self.metrics.record_retry("lastfm", method, str(e), backoff=2 ** attempt)
                 time.sleep(2 ** attempt)  # Exponential backoff
         
         return {}
@@ -184,6 +251,61 @@ class LastFMAPICollector:
         
         return data.get("recenttracks", {}).get("track", [])
 
+    def iter_user_recent_tracks(self, username: str, page_size: int = 200, from_timestamp: Optional[int] = None,
+                                update_watermark: bool = True) -> Iterator[Dict]:
+        """Stream a user's scrobble history page by page, newest first.
+        
+        Only one page is held in memory at a time. Unless from_timestamp is
+        given, the walk resumes after the user's persisted watermark so
+        incremental runs only fetch new scrobbles. The watermark advances once
+        the generator is exhausted, so an interrupted walk is retried in full.
+        
+        Args:
+            username: Last.fm username
+            page_size: Tracks per request (max 200)
+            from_timestamp: Unix timestamp to start after, overriding the watermark
+            update_watermark: Persist the newest scrobble timestamp when done
+        
+        Yields:
+            Scrobbled tracks in the user.getrecenttracks format
+        """
+        watermark_key = f"lastfm:user.getrecenttracks:{username}"
+        since = from_timestamp if from_timestamp is not None else self.watermarks.get(watermark_key)
+        newest = since or 0
+        
+        # Pin the upper bound so scrobbles arriving mid-walk don't shift the pages
+        params = {
+            "method": "user.getrecenttracks",
+            "user": username,
+            "limit": min(page_size, 200),  # Last.fm API limit
+            "to": int(time.time()),
+        }
+        if since:
+            params["from"] = since + 1
+        
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            self.logger.info(f"Fetching recent tracks page {page}/{total_pages} for user: {username}")
+            recent = self._make_request(**params, page=page).get("recenttracks", {})
+            total_pages = int(recent.get("@attr", {}).get("totalPages", 0) or 0)
+            
+            tracks = recent.get("track", [])
+            if isinstance(tracks, dict):  # A single scrobble is returned as an object
+                tracks = [tracks]
+            if not tracks:
+                break
+            
+            for track in tracks:
+                # The currently playing track has no timestamp and is not a scrobble yet
+                if track.get("@attr", {}).get("nowplaying") == "true":
+                    continue
+                newest = max(newest, int(track.get("date", {}).get("uts", 0)))
+                yield track
+            page += 1
+        
+        if update_watermark and newest > (since or 0):
+            self.watermarks.set(watermark_key, newest)
+
     def get_user_top_tracks(self, username: str, period: str = "overall", limit: int = 50) -> List[Dict]:
         """Get a user's top tracks for a specific time period.
         
@@ -236,23 +358,46 @@ class LastFMAPICollector:
         
         return data.get("topartists", {}).get("artist", [])
 
-    def save_data(self, data: List[Dict] | Dict, filename: str) -> Path:
-        """Save data to timestamped JSON file in data/external directory."""
-        timestamp = int(time.time())
-        file_path = self.data_dir / f"lastfm_{filename}_{timestamp}.json"
+    def save_data(self, data: Iterable[Dict] | Dict, filename: str, fmt: Optional[str] = None,
+                  compression: Optional[str] = None) -> Optional[Path]:
+        """Save data to a timestamped file in data/external directory.
+        
+        Records are streamed by the shared writer, so generators such as
+        iter_user_recent_tracks can be saved without loading them in memory.
+        A snapshot identical to the previous one is not written again.
+        
+        Args:
+            data: Records (list or stream) or a single payload dict
+            filename: Dataset name, prefixed with "lastfm_"
+            fmt: "json" or "ndjson" (defaults to OUTPUT_FORMAT)
+            compression: "none", "gzip" or "zstd" (defaults to OUTPUT_COMPRESSION)
         
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        Returns:
+            Path of the new file, or None if the data was unchanged
+        """
+        file_path = save_records(data, self.data_dir, f"lastfm_{filename}", fmt=fmt, compression=compression,
+                                 manifest=self.manifest)
+        if file_path is None:
+            self.logger.info(f"{filename} unchanged since the last snapshot, not saved")
+            return None
+        
+        if self.parquet_sink:
+            # Re-read the saved file so streamed data never has to be held in memory
+            self.parquet_sink.write(iter_records(file_path), "lastfm", filename)
         
         self.logger.info(f"Data saved to: {file_path}")
         return file_path
 
-    def collect_comprehensive_data(self, sample_username: str = None) -> Dict[str, Path]:
+    def collect_comprehensive_data(self, sample_username: str = None, concurrent: bool = False) -> Dict[str, Path]:
         """Collect comprehensive music data from Last.fm and save to separate files.
         
         Args:
             sample_username: Optional Last.fm username to collect user-specific data
+            concurrent: Send the independent requests in parallel (see _collect_concurrently)
         """
+        if concurrent:
+            return self._collect_concurrently(sample_username)
+        
         saved_files = {}
         
         try:
@@ -267,8 +412,7 @@ class LastFMAPICollector:
                 saved_files['top_artists'] = self.save_data(top_artists, "top_artists")
             
             # Collect data for popular genres
-            popular_genres = ['rock', 'pop', 'electronic', 'hip-hop', 'jazz', 'classical']
-            for genre in popular_genres:
+            for genre in self.POPULAR_GENRES:
                 try:
                     genre_tracks = self.get_tag_top_tracks(genre, limit=50)
                     if genre_tracks:
@@ -318,6 +462,96 @@ class LastFMAPICollector:
             self.logger.error(f"Data collection failed: {e}")
             raise
 
+    def _collect_concurrently(self, sample_username: Optional[str] = None) -> Dict[str, Path]:
+        """Run the comprehensive collection on a bounded thread pool.
+        
+        Every request still draws from the shared rate limiter, so the run takes
+        about as long as the rate budget allows rather than the sum of the
+        round-trips. Top tracks/artists failures abort the run; each genre,
+        artist and user request fails on its own, as in the sequential mode.
+        """
+        saved_files = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            top_tracks_future = executor.submit(self.get_top_tracks, limit=100)
+            top_artists_future = executor.submit(self.get_top_artists, limit=100)
+            
+            # Optional datasets: key -> (future, filename, description)
+            optional = {}
+            for genre in self.POPULAR_GENRES:
+                optional[f'{genre}_tracks'] = (
+                    executor.submit(self.get_tag_top_tracks, genre, limit=50),
+                    f"genre_{genre}_tracks",
+                    f"genre {genre}",
+                )
+            
+            user_optional = {}
+            if sample_username:
+                user_optional['user_recent_tracks'] = (
+                    executor.submit(self.get_user_recent_tracks, sample_username, limit=100),
+                    f"user_{sample_username}_recent_tracks",
+                    f"recent tracks of {sample_username}",
+                )
+                user_optional['user_top_tracks'] = (
+                    executor.submit(self.get_user_top_tracks, sample_username, period="1month", limit=50),
+                    f"user_{sample_username}_top_tracks",
+                    f"top tracks of {sample_username}",
+                )
+                user_optional['user_top_artists'] = (
+                    executor.submit(self.get_user_top_artists, sample_username, period="1month", limit=50),
+                    f"user_{sample_username}_top_artists",
+                    f"top artists of {sample_username}",
+                )
+            
+            try:
+                # Artist details depend on the chart, so they are queued as soon as it arrives
+                top_artists = top_artists_future.result()
+                artist_futures = [
+                    (artist.get('name', ''), executor.submit(self.get_artist_info, artist.get('name', '')))
+                    for artist in top_artists[:10]
+                    if artist.get('name', '')
+                ]
+                top_tracks = top_tracks_future.result()
+            except Exception as e:
+                self.logger.error(f"Data collection failed: {e}")
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            
+            if top_tracks:
+                saved_files['top_tracks'] = self.save_data(top_tracks, "top_tracks")
+            if top_artists:
+                saved_files['top_artists'] = self.save_data(top_artists, "top_artists")
+            
+            for key, (future, filename, description) in optional.items():
+                try:
+                    data = future.result()
+                    if data:
+                        saved_files[key] = self.save_data(data, filename)
+                except Exception as e:
+                    self.logger.warning(f"Failed to collect data for {description}: {e}")
+            
+            artist_details = []
+            for artist_name, future in artist_futures:
+                try:
+                    artist_info = future.result()
+                    if artist_info:
+                        artist_details.append(artist_info)
+                except Exception as e:
+                    self.logger.warning(f"Failed to get info for artist {artist_name}: {e}")
+            
+            if artist_details:
+                saved_files['artist_details'] = self.save_data(artist_details, "artist_details")
+            
+            for key, (future, filename, description) in user_optional.items():
+                try:
+                    data = future.result()
+                    if data:
+                        saved_files[key] = self.save_data(data, filename)
+                except Exception as e:
+                    self.logger.warning(f"Failed to collect {description}: {e}")
+        
+        return saved_files
+
 def main():
     """Main function to demonstrate Last.fm API data collection."""
     try:
@@ -342,7 +576,7 @@ def main():
                 
                 # Save user recent tracks
                 saved_file = collector.save_data(recent_tracks, f"demo_user_{sample_username}_recent_tracks")
-                print(f"\nUser recent tracks saved to: {saved_file}")
+                print(f"\nUser recent tracks saved to: {saved_file or 'unchanged, not saved'}")
             else:
                 print(f"No recent tracks found for user '{sample_username}'")
                 
@@ -351,12 +585,14 @@ def main():
         
         # Collect comprehensive data
         print("\n=== Comprehensive Data Collection ===")
-        saved_files = collector.collect_comprehensive_data(sample_username=sample_username)
+        saved_files = collector.collect_comprehensive_data(sample_username=sample_username, concurrent=True)
         
         print("\nData collection completed successfully!")
+        if collector.cache:
+            print(f"Response cache: {collector.cache.stats()}")
         print("Files saved:")
         for data_type, file_path in saved_files.items():
-            print(f"  - {data_type}: {file_path}")
+            print(f"  - {data_type}: {file_path or 'unchanged'}")
             
     except Exception as e:
         print(f"Data collection failed: {e}")
@@ -366,6 +602,9 @@ def main():
         print("3. Your Last.fm API key is valid")
         print("4. The username exists on Last.fm (for user-specific data)")
         raise
+    
+    finally:
+        export_collector_metrics()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
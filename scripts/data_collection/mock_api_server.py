@@ -0,0 +1,687 @@
+# scripts/data_collection/mock_api_server.py
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+from scripts.data_collection.rate_limiter import TokenBucket
+from scripts.data_collection.scrobble_generator import ScrobbleGenerator
+
+# Load environment variables
+load_dotenv()
+
+# The scrobble history starts at a fixed date so a given seed always serves the same data
+HISTORY_START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+TAGS = ("rock", "pop", "electronic", "hip-hop", "jazz", "classical", "indie", "metal", "folk", "soul")
+VALID_PERIODS = ("overall", "7day", "1month", "3month", "6month", "12month")
+BASE62 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+# Maximum IDs per request on the multi-ID endpoints, as enforced by Spotify
+SPOTIFY_BATCH_LIMITS = {"artists": 50, "tracks": 50, "albums": 20, "audio-features": 100}
+
+
+def _spotify_id(mbid: str) -> str:
+    """Derive a stable 22-character base62 Spotify-style ID from an MBID."""
+    value = uuid.UUID(mbid).int
+    chars = []
+    for _ in range(22):
+        value, digit = divmod(value, 62)
+        chars.append(BASE62[digit])
+    return "".join(chars)
+
+
+class MockCatalog:
+    """Artists, albums, tracks and a scrobble history to serve from the mock API.
+
+    The catalogue and the listening history come from ScrobbleGenerator, so
+    play counts and chart positions follow its Zipf popularity. Each artist
+    gets one tag and each track a set of audio features.
+    """
+
+    def __init__(self, generator: ScrobbleGenerator, scrobbles: int, seed: int = 0):
+        rng = random.Random(seed)
+        self.artists: List[Dict] = []
+        self.tracks: List[Dict] = []
+        self.albums: List[Dict] = []
+        albums_by_key: Dict[int, Dict] = {}
+
+        for rank, (tracks, _) in enumerate(generator.catalog, start=1):
+            artist_ref = tracks[0]["artist"]
+            name = artist_ref["#text"]
+            artist = {
+                "name": name,
+                "mbid": artist_ref["mbid"],
+                "id": _spotify_id(artist_ref["mbid"]),
+                "url": f"https://www.last.fm/music/{name.replace(' ', '+')}",
+                "image": tracks[0]["image"],
+                "tag": rng.choice(TAGS),
+                "rank": rank,
+                "tracks": [],
+                "albums": [],
+                "plays": 0,
+                "listeners": set(),
+            }
+            self.artists.append(artist)
+            for number, source in enumerate(tracks, start=1):
+                album = albums_by_key.get(id(source["album"]))
+                if album is None:
+                    album = {
+                        "name": source["album"]["#text"],
+                        "mbid": source["album"]["mbid"],
+                        "id": _spotify_id(source["album"]["mbid"]),
+                        "artist": artist,
+                        "release_date": f"{rng.randint(1960, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                        "tracks": [],
+                    }
+                    albums_by_key[id(source["album"])] = album
+                    artist["albums"].append(album)
+                    self.albums.append(album)
+                track = {
+                    "name": source["name"],
+                    "mbid": source["mbid"],
+                    "id": _spotify_id(source["mbid"]),
+                    "url": source["url"],
+                    "image": source["image"],
+                    "duration": source["duration"],
+                    "artist": artist,
+                    "album": album,
+                    "track_number": len(album["tracks"]) + 1,
+                    "explicit": rng.random() < 0.1,
+                    "features": {
+                        "danceability": round(rng.betavariate(5, 3), 3),
+                        "energy": round(rng.betavariate(4, 3), 3),
+                        "key": rng.randint(0, 11),
+                        "loudness": round(rng.uniform(-20, -2), 3),
+                        "mode": rng.randint(0, 1),
+                        "speechiness": round(rng.betavariate(1, 12), 4),
+                        "acousticness": round(rng.betavariate(1, 3), 4),
+                        "instrumentalness": round(rng.betavariate(1, 8), 4),
+                        "liveness": round(rng.betavariate(2, 10), 4),
+                        "valence": round(rng.betavariate(3, 3), 3),
+                        "tempo": round(rng.uniform(60, 190), 3),
+                        "time_signature": rng.choice((3, 4, 4, 4, 5)),
+                    },
+                    "plays": 0,
+                    "listeners": set(),
+                    "rank": number,
+                }
+                album["tracks"].append(track)
+                artist["tracks"].append(track)
+                self.tracks.append(track)
+
+        self.by_mbid = {track["mbid"]: track for track in self.tracks}
+        self.artists_by_name = {}
+        for artist in self.artists:
+            self.artists_by_name.setdefault(artist["name"].lower(), artist)
+        self.by_spotify_id = {
+            "artists": {artist["id"]: artist for artist in self.artists},
+            "tracks": {track["id"]: track for track in self.tracks},
+            "albums": {album["id"]: album for album in self.albums},
+        }
+
+        # Per-user history, newest scrobble first, plus global play and listener counts
+        self.history: Dict[str, List[Dict]] = defaultdict(list)
+        for event in generator.iter_events(scrobbles):
+            self.history[event["user"]].append(event)
+            track = self.by_mbid[event["mbid"]]
+            for entity in (track, track["artist"]):
+                entity["plays"] += 1
+                entity["listeners"].add(event["user"])
+        for events in self.history.values():
+            events.reverse()
+        for username in generator.usernames:
+            self.history.setdefault(username, [])
+
+        self.chart_tracks = sorted(self.tracks, key=lambda t: (-t["plays"], t["artist"]["rank"], t["rank"]))
+        self.chart_artists = sorted(self.artists, key=lambda a: (-a["plays"], a["rank"]))
+
+
+# --- Last.fm payloads --------------------------------------------------------------------------
+
+def _lastfm_artist_ref(artist: Dict) -> Dict:
+    return {"name": artist["name"], "mbid": artist["mbid"], "url": artist["url"]}
+
+
+def _lastfm_track(track: Dict, playcount: Optional[int] = None, rank: Optional[int] = None) -> Dict:
+    item = {
+        "name": track["name"],
+        "duration": str(track["duration"]),
+        "playcount": str(track["plays"] if playcount is None else playcount),
+        "listeners": str(len(track["listeners"])),
+        "mbid": track["mbid"],
+        "url": track["url"],
+        "streamable": {"#text": "0", "fulltrack": "0"},
+        "artist": _lastfm_artist_ref(track["artist"]),
+        "image": track["image"],
+    }
+    if rank is not None:
+        item["@attr"] = {"rank": str(rank)}
+    return item
+
+
+def _lastfm_artist(artist: Dict, playcount: Optional[int] = None, rank: Optional[int] = None) -> Dict:
+    item = {
+        "name": artist["name"],
+        "playcount": str(artist["plays"] if playcount is None else playcount),
+        "listeners": str(len(artist["listeners"])),
+        "mbid": artist["mbid"],
+        "url": artist["url"],
+        "streamable": "0",
+        "image": artist["image"],
+    }
+    if rank is not None:
+        item["@attr"] = {"rank": str(rank)}
+    return item
+
+
+def _page(items: List, params: Dict, default_limit: int = 50, max_limit: int = 1000) -> Tuple[List, Dict]:
+    """Slice ``items`` by the Last.fm ``page``/``limit`` parameters and build the ``@attr`` block."""
+    limit = max(1, min(int(params.get("limit", default_limit)), max_limit))
+    page = max(1, int(params.get("page", 1)))
+    start = (page - 1) * limit
+    attr = {
+        "page": str(page),
+        "perPage": str(limit),
+        "totalPages": str(math.ceil(len(items) / limit)),
+        "total": str(len(items)),
+    }
+    return items[start:start + limit], attr
+
+
+class LastFMError(Exception):
+    """A Last.fm API error, returned as ``{"error": code, "message": message}``."""
+
+    def __init__(self, code: int, message: str, status: int = 200):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+
+
+def _find_artist(catalog: MockCatalog, params: Dict) -> Dict:
+    artist = catalog.artists_by_name.get(params.get("artist", "").lower())
+    if artist is None:
+        raise LastFMError(6, "The artist you supplied could not be found")
+    return artist
+
+
+def _find_user_history(catalog: MockCatalog, params: Dict) -> List[Dict]:
+    user = params.get("user", "")
+    if user not in catalog.history:
+        raise LastFMError(6, "User not found")
+    return catalog.history[user]
+
+
+def _check_period(params: Dict) -> None:
+    if params.get("period", "overall") not in VALID_PERIODS:
+        raise LastFMError(6, f"Invalid period. Must be one of: {list(VALID_PERIODS)}")
+
+
+def chart_top_tracks(catalog: MockCatalog, params: Dict) -> Dict:
+    tracks, attr = _page(catalog.chart_tracks, params)
+    return {"tracks": {"track": [_lastfm_track(track) for track in tracks], "@attr": attr}}
+
+
+def chart_top_artists(catalog: MockCatalog, params: Dict) -> Dict:
+    artists, attr = _page(catalog.chart_artists, params)
+    return {"artists": {"artist": [_lastfm_artist(artist) for artist in artists], "@attr": attr}}
+
+
+def artist_info(catalog: MockCatalog, params: Dict) -> Dict:
+    artist = _find_artist(catalog, params)
+    similar = [a for a in catalog.chart_artists if a["tag"] == artist["tag"] and a is not artist][:5]
+    return {"artist": {
+        "name": artist["name"],
+        "mbid": artist["mbid"],
+        "url": artist["url"],
+        "image": artist["image"],
+        "streamable": "0",
+        "ontour": "0",
+        "stats": {"listeners": str(len(artist["listeners"])), "playcount": str(artist["plays"])},
+        "similar": {"artist": [{"name": a["name"], "url": a["url"], "image": a["image"]} for a in similar]},
+        "tags": {"tag": [{"name": artist["tag"], "url": f"https://www.last.fm/tag/{artist['tag']}"}]},
+        "bio": {"summary": f"{artist['name']} is a {artist['tag']} artist.", "content": ""},
+    }}
+
+
+def artist_top_tracks(catalog: MockCatalog, params: Dict) -> Dict:
+    artist = _find_artist(catalog, params)
+    ranked = sorted(artist["tracks"], key=lambda t: (-t["plays"], t["rank"]))
+    tracks, attr = _page(ranked, params)
+    offset = (int(attr["page"]) - 1) * int(attr["perPage"])
+    return {"toptracks": {
+        "track": [_lastfm_track(track, rank=offset + i) for i, track in enumerate(tracks, start=1)],
+        "@attr": {"artist": artist["name"], **attr},
+    }}
+
+
+def track_info(catalog: MockCatalog, params: Dict) -> Dict:
+    artist = _find_artist(catalog, params)
+    name = params.get("track", "").lower()
+    track = next((t for t in artist["tracks"] if t["name"].lower() == name), None)
+    if track is None:
+        raise LastFMError(6, "Track not found")
+    item = _lastfm_track(track)
+    item["album"] = {"artist": artist["name"], "title": track["album"]["name"], "mbid": track["album"]["mbid"],
+                     "image": track["image"]}
+    item["toptags"] = {"tag": [{"name": artist["tag"], "url": f"https://www.last.fm/tag/{artist['tag']}"}]}
+    return {"track": item}
+
+
+def track_search(catalog: MockCatalog, params: Dict) -> Dict:
+    query = params.get("track", "").lower()
+    matches = [t for t in catalog.chart_tracks if query in t["name"].lower()]
+    tracks, attr = _page(matches, params, default_limit=30)
+    return {"results": {
+        "trackmatches": {"track": [
+            {"name": t["name"], "artist": t["artist"]["name"], "url": t["url"], "streamable": "0",
+             "listeners": str(len(t["listeners"])), "image": t["image"], "mbid": t["mbid"]}
+            for t in tracks
+        ]},
+        "opensearch:totalResults": attr["total"],
+    }}
+
+
+def artist_search(catalog: MockCatalog, params: Dict) -> Dict:
+    query = params.get("artist", "").lower()
+    matches = [a for a in catalog.chart_artists if query in a["name"].lower()]
+    artists, attr = _page(matches, params, default_limit=30)
+    return {"results": {
+        "artistmatches": {"artist": [
+            {"name": a["name"], "listeners": str(len(a["listeners"])), "mbid": a["mbid"], "url": a["url"],
+             "streamable": "0", "image": a["image"]}
+            for a in artists
+        ]},
+        "opensearch:totalResults": attr["total"],
+    }}
+
+
+def tag_top_tracks(catalog: MockCatalog, params: Dict) -> Dict:
+    tag = params.get("tag", "").lower()
+    tracks, attr = _page([t for t in catalog.chart_tracks if t["artist"]["tag"] == tag], params)
+    offset = (int(attr["page"]) - 1) * int(attr["perPage"])
+    return {"tracks": {
+        "track": [{k: v for k, v in _lastfm_track(track, rank=offset + i).items() if k not in ("playcount", "listeners")}
+                  for i, track in enumerate(tracks, start=1)],
+        "@attr": {"tag": tag, **attr},
+    }}
+
+
+def user_recent_tracks(catalog: MockCatalog, params: Dict) -> Dict:
+    history = _find_user_history(catalog, params)
+    since, until = int(params.get("from", 0)), int(params.get("to", 2 ** 62))
+    visible = [event for event in history if since <= int(event["date"]["uts"]) <= until]
+    events, attr = _page(visible, params, max_limit=200)
+    tracks = [{k: v for k, v in event.items() if k != "user"} for event in events]
+    return {"recenttracks": {"track": tracks, "@attr": {"user": params["user"], **attr}}}
+
+
+def user_top_tracks(catalog: MockCatalog, params: Dict) -> Dict:
+    _check_period(params)
+    plays = Counter(event["mbid"] for event in _find_user_history(catalog, params))
+    ranked, attr = _page(plays.most_common(), params)
+    offset = (int(attr["page"]) - 1) * int(attr["perPage"])
+    return {"toptracks": {
+        "track": [_lastfm_track(catalog.by_mbid[mbid], playcount=count, rank=offset + i)
+                  for i, (mbid, count) in enumerate(ranked, start=1)],
+        "@attr": {"user": params["user"], **attr},
+    }}
+
+
+def user_top_artists(catalog: MockCatalog, params: Dict) -> Dict:
+    _check_period(params)
+    plays = Counter(catalog.by_mbid[event["mbid"]]["artist"]["name"].lower()
+                    for event in _find_user_history(catalog, params))
+    ranked, attr = _page(plays.most_common(), params)
+    offset = (int(attr["page"]) - 1) * int(attr["perPage"])
+    return {"topartists": {
+        "artist": [_lastfm_artist(catalog.artists_by_name[name], playcount=count, rank=offset + i)
+                   for i, (name, count) in enumerate(ranked, start=1)],
+        "@attr": {"user": params["user"], **attr},
+    }}
+
+
+LASTFM_METHODS = {
+    "chart.gettoptracks": chart_top_tracks,
+    "chart.gettopartists": chart_top_artists,
+    "artist.getinfo": artist_info,
+    "artist.gettoptracks": artist_top_tracks,
+    "artist.search": artist_search,
+    "track.getinfo": track_info,
+    "track.search": track_search,
+    "tag.gettoptracks": tag_top_tracks,
+    "user.getrecenttracks": user_recent_tracks,
+    "user.gettoptracks": user_top_tracks,
+    "user.gettopartists": user_top_artists,
+}
+
+
+# --- Spotify payloads --------------------------------------------------------------------------
+
+def _spotify_popularity(plays: int, rank: int) -> int:
+    return min(100, int(15 * math.log10(plays + 1) + 60 / rank ** 0.5))
+
+
+def _spotify_artist_ref(artist: Dict) -> Dict:
+    return {
+        "id": artist["id"],
+        "name": artist["name"],
+        "type": "artist",
+        "uri": f"spotify:artist:{artist['id']}",
+        "external_urls": {"spotify": f"https://open.spotify.com/artist/{artist['id']}"},
+    }
+
+
+def _spotify_artist(artist: Dict) -> Dict:
+    return {
+        **_spotify_artist_ref(artist),
+        "genres": [artist["tag"]],
+        "popularity": _spotify_popularity(artist["plays"], artist["rank"]),
+        "followers": {"href": None, "total": len(artist["listeners"]) * 100},
+        "images": [],
+    }
+
+
+def _spotify_album_ref(album: Dict) -> Dict:
+    return {
+        "id": album["id"],
+        "name": album["name"],
+        "type": "album",
+        "album_type": "album" if len(album["tracks"]) > 3 else "single",
+        "uri": f"spotify:album:{album['id']}",
+        "release_date": album["release_date"],
+        "release_date_precision": "day",
+        "total_tracks": len(album["tracks"]),
+        "artists": [_spotify_artist_ref(album["artist"])],
+        "images": [],
+    }
+
+
+def _spotify_track(track: Dict) -> Dict:
+    return {
+        "id": track["id"],
+        "name": track["name"],
+        "type": "track",
+        "uri": f"spotify:track:{track['id']}",
+        "duration_ms": track["duration"] * 1000,
+        "explicit": track["explicit"],
+        "popularity": _spotify_popularity(track["plays"], track["artist"]["rank"]),
+        "track_number": track["track_number"],
+        "artists": [_spotify_artist_ref(track["artist"])],
+        "album": _spotify_album_ref(track["album"]),
+    }
+
+
+def _spotify_album(album: Dict) -> Dict:
+    return {
+        **_spotify_album_ref(album),
+        "tracks": {"items": [_spotify_track(track) for track in album["tracks"]], "total": len(album["tracks"])},
+    }
+
+
+def _spotify_audio_features(track: Dict) -> Dict:
+    return {"id": track["id"], "type": "audio_features", "duration_ms": track["duration"] * 1000,
+            **track["features"]}
+
+
+SPOTIFY_OBJECTS = {
+    "artists": ("artists", _spotify_artist),
+    "tracks": ("tracks", _spotify_track),
+    "albums": ("albums", _spotify_album),
+    "audio-features": ("tracks", _spotify_audio_features),
+}
+
+
+def _spotify_error(status: int, message: str):
+    return jsonify({"error": {"status": status, "message": message}}), status
+
+
+# --- Fault injection and app -------------------------------------------------------------------
+
+class FaultInjector:
+    """Simulated network latency, random server errors and 429 throttling.
+
+    Latency is drawn uniformly from 0.5x-1.5x the configured mean. Throttling
+    is a server-side token bucket: a request arriving when it is empty is
+    rejected with 429 and a Retry-After header, as the real APIs do.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, rate_limit: Optional[float] = None,
+                 seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.bucket = TokenBucket(rate_limit) if rate_limit else None
+        self.random = random.Random(seed)
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def check(self) -> Optional[Tuple[int, Optional[int]]]:
+        """Delay the current request; return (status, retry_after) if it should fail, else None."""
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = self.latency * self.random.uniform(0.5, 1.5)
+            fail = self.random.random() < self.error_rate
+
+        if self.bucket:
+            wait = self.bucket.try_acquire()
+            if wait:
+                with self._lock:
+                    self.stats["throttled"] += 1
+                return 429, max(1, math.ceil(wait))
+
+        if delay:
+            time.sleep(delay)
+        if fail:
+            with self._lock:
+                self.stats["errors"] += 1
+            return 503, None
+        return None
+
+
+def create_app(catalog: Optional[MockCatalog] = None, latency_ms: Optional[float] = None,
+               error_rate: Optional[float] = None, rate_limit: Optional[float] = None,
+               seed: Optional[int] = None) -> Flask:
+    """Build the mock Last.fm / Spotify API.
+
+    Last.fm is served at ``/2.0/``, the Spotify Web API under ``/v1`` and its
+    token endpoint at ``/api/token``; ``/_mock/stats`` reports request,
+    throttle and error counts. Unset arguments fall back to the MOCK_*
+    environment variables.
+
+    Args:
+        catalog: Data to serve (defaults to a generated MOCK_ARTISTS/MOCK_USERS catalogue)
+        latency_ms: Mean added latency per request (MOCK_LATENCY_MS)
+        error_rate: Share of requests failing with 503 (MOCK_ERROR_RATE)
+        rate_limit: Requests/sec before answering 429, 0 for no limit (MOCK_RATE_LIMIT)
+        seed: Seed for the catalogue and the fault injection (MOCK_SEED)
+
+    Returns:
+        The Flask application
+    """
+    seed = int(os.getenv("MOCK_SEED", 0)) if seed is None else seed
+    if catalog is None:
+        generator = ScrobbleGenerator(users=int(os.getenv("MOCK_USERS", 100)),
+                                      artists=int(os.getenv("MOCK_ARTISTS", 1_000)),
+                                      seed=seed, start=HISTORY_START)
+        catalog = MockCatalog(generator, int(os.getenv("MOCK_SCROBBLES", 20_000)), seed=seed)
+    latency_ms = float(os.getenv("MOCK_LATENCY_MS", 0)) if latency_ms is None else latency_ms
+    error_rate = float(os.getenv("MOCK_ERROR_RATE", 0)) if error_rate is None else error_rate
+    rate_limit = float(os.getenv("MOCK_RATE_LIMIT", 0)) if rate_limit is None else rate_limit
+
+    faults = FaultInjector(latency_ms / 1000, error_rate, rate_limit or None, seed)
+    tokens = set()
+    token_ttl = int(os.getenv("MOCK_TOKEN_TTL", 3600))
+
+    app = Flask(__name__)
+    app.json.sort_keys = False
+    app.extensions["mock_api"] = {"catalog": catalog, "faults": faults, "tokens": tokens}
+
+    @app.before_request
+    def inject_faults():
+        if request.path in ("/api/token", "/_mock/stats"):
+            return None
+        spotify = request.path.startswith("/v1/")
+        if spotify:
+            token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+            if token not in tokens:
+                return _spotify_error(401, "Invalid access token")
+
+        rejection = faults.check()
+        if rejection is None:
+            return None
+        status, retry_after = rejection
+        if spotify:
+            response, _ = _spotify_error(status, "API rate limit exceeded" if status == 429 else "Service unavailable")
+        elif status == 429:
+            response = jsonify({"error": 29, "message": "Rate Limit Exceeded"})
+        else:
+            response = jsonify({"error": 16, "message": "There was a temporary error processing your request"})
+        if retry_after:
+            response.headers["Retry-After"] = str(retry_after)
+        return response, status
+
+    @app.get("/_mock/stats")
+    def stats():
+        return jsonify(dict(faults.stats))
+
+    @app.get("/2.0/")
+    def lastfm():
+        params = request.args.to_dict()
+        if not params.get("api_key"):
+            return jsonify({"error": 10, "message": "Invalid API key - You must be granted a valid key by last.fm"}), 403
+        handler = LASTFM_METHODS.get(params.get("method", "").lower())
+        if handler is None:
+            return jsonify({"error": 3, "message": "Invalid Method - No method with that name in this package"}), 400
+        try:
+            return jsonify(handler(catalog, params))
+        except LastFMError as e:
+            return jsonify({"error": e.code, "message": e.message}), e.status
+        except ValueError:
+            return jsonify({"error": 6, "message": "Invalid parameters"}), 400
+
+    @app.post("/api/token")
+    def spotify_token():
+        if not request.headers.get("Authorization", "").startswith("Basic "):
+            return jsonify({"error": "invalid_client"}), 401
+        if request.form.get("grant_type") != "client_credentials":
+            return jsonify({"error": "unsupported_grant_type"}), 400
+        token = uuid.uuid4().hex
+        tokens.add(token)
+        return jsonify({"access_token": token, "token_type": "Bearer", "expires_in": token_ttl})
+
+    @app.get("/v1/search")
+    def spotify_search():
+        query = request.args.get("q", "").lower()
+        limit = min(int(request.args.get("limit", 20)), 50)
+        offset = int(request.args.get("offset", 0))
+        result = {}
+        for kind in request.args.get("type", "").split(","):
+            if kind == "artist":
+                matches = [_spotify_artist(a) for a in catalog.chart_artists if query in a["name"].lower()]
+            elif kind == "track":
+                matches = [_spotify_track(t) for t in catalog.chart_tracks if query in t["name"].lower()]
+            else:
+                return _spotify_error(400, "Unsupported type. Must be one of: ['artist', 'track']")
+            result[f"{kind}s"] = {"items": matches[offset:offset + limit], "limit": limit, "offset": offset,
+                                  "total": len(matches), "next": None}
+        return jsonify(result)
+
+    @app.get("/v1/<any(artists, tracks, albums, 'audio-features'):endpoint>")
+    def spotify_several(endpoint):
+        ids = [item_id for item_id in request.args.get("ids", "").split(",") if item_id]
+        if not ids or len(ids) > SPOTIFY_BATCH_LIMITS[endpoint]:
+            return _spotify_error(400, f"Between 1 and {SPOTIFY_BATCH_LIMITS[endpoint]} ids must be requested")
+        index, render = SPOTIFY_OBJECTS[endpoint]
+        items = [catalog.by_spotify_id[index].get(item_id) for item_id in ids]
+        return jsonify({endpoint.replace("-", "_"): [render(item) if item else None for item in items]})
+
+    @app.get("/v1/artists/<artist_id>")
+    def spotify_artist(artist_id):
+        artist = catalog.by_spotify_id["artists"].get(artist_id)
+        return jsonify(_spotify_artist(artist)) if artist else _spotify_error(404, "Non existing id")
+
+    @app.get("/v1/artists/<artist_id>/top-tracks")
+    def spotify_artist_top_tracks(artist_id):
+        artist = catalog.by_spotify_id["artists"].get(artist_id)
+        if artist is None:
+            return _spotify_error(404, "Non existing id")
+        ranked = sorted(artist["tracks"], key=lambda t: (-t["plays"], t["rank"]))[:10]
+        return jsonify({"tracks": [_spotify_track(track) for track in ranked]})
+
+    @app.get("/v1/artists/<artist_id>/albums")
+    def spotify_artist_albums(artist_id):
+        artist = catalog.by_spotify_id["artists"].get(artist_id)
+        if artist is None:
+            return _spotify_error(404, "Non existing id")
+        albums = [_spotify_album_ref(album) for album in artist["albums"]]
+        return jsonify({"items": albums, "limit": 20, "offset": 0, "total": len(albums), "next": None})
+
+    return app
+
+
+class MockAPIServer:
+    """Serve the mock API from a background thread, e.g. in tests and benchmarks.
+
+    ``with MockAPIServer() as server:`` listens on a free local port;
+    ``server.env()`` returns the URL variables that point the collectors at it.
+    """
+
+    def __init__(self, app: Optional[Flask] = None, host: str = "127.0.0.1", port: int = 0):
+        self.app = app or create_app()
+        self._server = make_server(host, port, self.app, threaded=True)
+        self.url = f"http://{host}:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-api", daemon=True)
+
+    def env(self) -> Dict[str, str]:
+        """Return LASTFM_API_URL, SPOTIFY_API_URL and SPOTIFY_TOKEN_URL for this server."""
+        return {
+            "LASTFM_API_URL": f"{self.url}/2.0/",
+            "SPOTIFY_API_URL": f"{self.url}/v1",
+            "SPOTIFY_TOKEN_URL": f"{self.url}/api/token",
+        }
+
+    def start(self) -> "MockAPIServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self) -> "MockAPIServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    """Run the mock API server on MOCK_API_HOST:MOCK_API_PORT."""
+    host = os.getenv("MOCK_API_HOST", "127.0.0.1")
+    port = int(os.getenv("MOCK_API_PORT", 8000))
+
+    try:
+        app = create_app()
+        print(f"Mock API serving on http://{host}:{port}; point the collectors at it with:")
+        print(f"  LASTFM_API_URL=http://{host}:{port}/2.0/")
+        print(f"  SPOTIFY_API_URL=http://{host}:{port}/v1")
+        print(f"  SPOTIFY_TOKEN_URL=http://{host}:{port}/api/token")
+        app.run(host=host, port=port, threaded=True)
+
+    except Exception as e:
+        print(f"Mock API server failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
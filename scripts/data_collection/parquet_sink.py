@@ -0,0 +1,166 @@
+# scripts/data_collection/parquet_sink.py
+import json
+import os
+import re
+import uuid
+from datetime import date
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import polars as pl
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Last.fm returns every number as a string; columns ending with these names are cast to integers
+INTEGER_SUFFIXES = ("playcount", "listeners", "duration", "rank", "uts", "userplaycount", "total", "popularity")
+
+_shared_sink: Optional["ParquetSink"] = None
+
+
+def _column_name(*parts: str) -> str:
+    name = "_".join(part for part in parts if part)
+    return re.sub(r"[^0-9a-zA-Z_]+", "", name.replace("#text", "").replace("@attr", "attr")).strip("_").lower()
+
+
+def flatten_record(record: Dict, prefix: str = "") -> Dict[str, Any]:
+    """Flatten a nested Last.fm/Spotify record into scalar columns.
+
+    - ``{"artist": {"#text": "X", "mbid": "..."}}`` becomes ``artist`` and ``artist_mbid``
+    - ``@attr`` becomes ``attr`` (e.g. ``@attr.rank`` -> ``attr_rank``)
+    - ``image[]`` size variants become ``image_small``, ``image_large``, ...
+    - other lists of scalars stay lists; lists of objects are kept as JSON strings
+    """
+    flat = {}
+    for key, value in record.items():
+        name = _column_name(prefix, key)
+        if isinstance(value, dict):
+            flat.update(flatten_record(value, name))
+        elif key == "image" and isinstance(value, list) and all(isinstance(i, dict) and "size" in i for i in value):
+            for image in value:
+                flat[_column_name(name, image["size"] or "default")] = image.get("#text") or None
+        elif isinstance(value, list):
+            if all(not isinstance(item, (dict, list)) for item in value):
+                flat[name] = value
+            else:
+                flat[name] = json.dumps(value, ensure_ascii=False)
+        else:
+            flat[name] = value
+    return flat
+
+
+def records_to_frame(records: Iterable[Dict], flatten: bool = True) -> pl.DataFrame:
+    """Build a typed DataFrame from API records, casting numeric string columns.
+
+    Columns that are null in every record get the type they would have with
+    data (String, Int64 for numeric names), so chunks stay scan-compatible.
+    """
+    rows = [flatten_record(record) if flatten else record for record in records]
+    df = pl.DataFrame(rows, infer_schema_length=None, strict=False)
+
+    casts = []
+    for name, dtype in df.schema.items():
+        if name.endswith(INTEGER_SUFFIXES) and dtype in (pl.String, pl.Float64, pl.Null):
+            casts.append(pl.col(name).cast(pl.Int64, strict=False))
+        elif dtype == pl.Null:
+            casts.append(pl.col(name).cast(pl.String))
+        elif dtype == pl.List(pl.Null):
+            casts.append(pl.col(name).cast(pl.List(pl.String)))
+        elif name == "streamable" and dtype == pl.String:
+            casts.append(pl.col(name).replace_strict({"0": False, "1": True}, default=None, return_dtype=pl.Boolean))
+    return df.with_columns(casts) if casts else df
+
+
+class ParquetSink:
+    """Columnar landing zone partitioned as ``source=/dataset=/ingestion_date=``.
+
+    Each write adds zstd-compressed part files, so readers can prune whole
+    partitions with ``scan`` instead of parsing JSON snapshots.
+    """
+
+    def __init__(self, root: Optional[Path] = None, chunk_size: int = 100_000, compression: str = "zstd"):
+        self.root = Path(root or os.getenv("PARQUET_ROOT", "data/lake"))
+        self.chunk_size = chunk_size
+        self.compression = compression
+
+    def partition_path(self, source: str, dataset: str, ingestion_date: Optional[date] = None) -> Path:
+        """Return the directory holding one source/dataset/day partition."""
+        ingestion_date = ingestion_date or date.today()
+        return self.root / f"source={source}" / f"dataset={dataset}" / f"ingestion_date={ingestion_date.isoformat()}"
+
+    def _new_part(self, source: str, dataset: str, ingestion_date: Optional[date]) -> Tuple[Path, Path]:
+        """Return (final path, hidden temp path) for a new part file."""
+        partition = self.partition_path(source, dataset, ingestion_date)
+        partition.mkdir(parents=True, exist_ok=True)
+        file_path = partition / f"part-{uuid.uuid4().hex[:12]}.parquet"
+        return file_path, partition / f".{file_path.name}.tmp"
+
+    def write_frame(self, df: pl.DataFrame, source: str, dataset: str, ingestion_date: Optional[date] = None) -> Path:
+        """Write an already tabular DataFrame as one part file and return its path."""
+        file_path, tmp_path = self._new_part(source, dataset, ingestion_date)
+        df.write_parquet(tmp_path, compression=self.compression)
+        os.replace(tmp_path, file_path)
+        return file_path
+
+    def sink_lazy(self, lf: pl.LazyFrame, source: str, dataset: str, ingestion_date: Optional[date] = None) -> Path:
+        """Run a lazy query with the streaming engine straight into one part file.
+
+        The result is never materialized in memory, so inputs larger than RAM
+        can be landed as long as the query itself is streamable.
+        """
+        file_path, tmp_path = self._new_part(source, dataset, ingestion_date)
+        try:
+            lf.sink_parquet(tmp_path, compression=self.compression, engine="streaming")
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return file_path
+
+    def write(self, records: Iterable[Dict] | Dict, source: str, dataset: str,
+              ingestion_date: Optional[date] = None, flatten: bool = True) -> List[Path]:
+        """Flatten and write API records, ``chunk_size`` records per part file.
+
+        Args:
+            records: A list, dict or record stream (consumed chunk by chunk)
+            source: Data source, e.g. "lastfm", "spotify" or "faker"
+            dataset: Dataset name, e.g. "top_tracks"
+            ingestion_date: Partition date (defaults to today)
+            flatten: Flatten nested structures into typed columns
+
+        Returns:
+            Paths of the written part files
+        """
+        records = iter([records] if isinstance(records, dict) else records)
+        paths = []
+        while chunk := list(islice(records, self.chunk_size)):
+            paths.append(self.write_frame(records_to_frame(chunk, flatten), source, dataset, ingestion_date))
+        return paths
+
+    def scan(self, source: str, dataset: str) -> pl.LazyFrame:
+        """Lazily scan one dataset; filter on ``ingestion_date`` to skip partitions.
+
+        Part files may have different columns (API payloads gain and lose
+        fields), so each file is scanned on its own and the scans are
+        combined by column name with relaxed types. A column is kept if any
+        file has it, and is null in the files that don't.
+        """
+        dataset_dir = self.root / f"source={source}" / f"dataset={dataset}"
+        files = sorted(dataset_dir.glob("**/*.parquet"))
+        if not files:
+            raise FileNotFoundError(f"No Parquet files found for {source}/{dataset} in {self.root}")
+        # source and dataset are fixed by the directory; ingestion_date stays for partition pruning
+        scans = [pl.scan_parquet(path, hive_partitioning=True).drop("source", "dataset", strict=False) for path in files]
+        return pl.concat(scans, how="diagonal_relaxed")
+
+
+def get_parquet_sink() -> Optional[ParquetSink]:
+    """Return the shared Parquet sink, or None unless PARQUET_SINK_ENABLED is true."""
+    global _shared_sink
+    if os.getenv("PARQUET_SINK_ENABLED", "false").lower() not in ("1", "true", "yes"):
+        return None
+    if _shared_sink is None:
+        _shared_sink = ParquetSink()
+    return _shared_sink
@@ -0,0 +1,126 @@
+# scripts/data_collection/rate_limiter.py
+import threading
+import time
+from typing import Dict, Mapping, Optional
+
+_limiters: Dict[str, "TokenBucket"] = {}
+_registry_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Thread-safe token bucket that paces requests against an API rate limit.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``. The
+    rate adapts to the ``x-ratelimit-*`` headers returned by the API, never
+    exceeding ``max_rate`` nor dropping below ``min_rate``.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 max_rate: Optional[float] = None, min_rate: float = 0.1):
+        if rate <= 0:
+            raise ValueError("Rate must be a positive number of requests per second.")
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.max_rate = max_rate or rate
+        self.min_rate = min(min_rate, rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available and consume them.
+
+        Returns:
+            Number of seconds spent waiting for the limiter
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                else:
+                    delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Consume ``tokens`` if they are available now, without blocking.
+
+        Returns:
+            0.0 if the tokens were consumed, else seconds until they would be
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for ``seconds`` (e.g. after a 429 Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Adapt the rate to the ``x-ratelimit-remaining``/``x-ratelimit-reset`` headers.
+
+        ``reset`` may be either seconds until the window resets or a Unix
+        timestamp; both forms are accepted.
+        """
+        retry_after = _to_float(headers.get("retry-after"))
+        if retry_after is not None:
+            self.pause(retry_after)
+
+        remaining = _to_float(headers.get("x-ratelimit-remaining"))
+        reset = _to_float(headers.get("x-ratelimit-reset"))
+        if remaining is None or reset is None:
+            return
+        if reset > 1_000_000_000:
+            reset -= time.time()
+        reset = max(reset, 0.0)
+
+        if remaining <= 0:
+            self.pause(reset)
+            return
+        if reset == 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, min(self.max_rate, remaining / reset))
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def get_rate_limiter(name: str, rate: float, capacity: Optional[float] = None,
+                     max_rate: Optional[float] = None) -> TokenBucket:
+    """Return the limiter registered under ``name``, creating it on first use.
+
+    Every collector instance and thread asking for the same name shares one
+    bucket, so the combined request rate stays inside the API budget.
+    """
+    with _registry_lock:
+        if name not in _limiters:
+            _limiters[name] = TokenBucket(rate, capacity=capacity, max_rate=max_rate)
+        return _limiters[name]
@@ -0,0 +1,166 @@
+# scripts/data_collection/response_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+DAY = 24 * 60 * 60
+
+# Seconds each API method stays cached; 0 (or a missing entry) means never cache.
+# Charts, tags and user history change constantly, so they opt out to stay fresh.
+DEFAULT_METHOD_TTLS = {
+    "artist.getinfo": 7 * DAY,
+    "track.getinfo": 7 * DAY,
+    "artist.gettoptracks": DAY,
+    "artist.search": DAY,
+    "track.search": DAY,
+    "chart.gettoptracks": 0,
+    "chart.gettopartists": 0,
+    "tag.gettoptracks": 0,
+    "spotify.artists": 7 * DAY,
+    "spotify.tracks": 7 * DAY,
+    "spotify.audio-features": 30 * DAY,
+    "spotify.search": DAY,
+    "spotify.top-tracks": DAY,
+    "spotify.albums": DAY,
+}
+
+# Parameters that do not change the response (credentials, output format)
+IGNORED_PARAMS = {"api_key", "format"}
+
+_shared_cache: Optional["ResponseCache"] = None
+_cache_lock = threading.Lock()
+
+
+class ResponseCache:
+    """Persistent SQLite-backed cache for API GET responses.
+
+    Entries are keyed on the API method plus normalized request parameters,
+    expire after a per-method TTL and are evicted least-recently-used once
+    the cache holds more than ``max_entries`` responses.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: Optional[int] = None,
+                 method_ttls: Optional[Dict[str, float]] = None, default_ttl: float = 0):
+        self.path = Path(path or os.getenv("RESPONSE_CACHE_PATH", "data/cache/responses.sqlite3"))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries or int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 50_000))
+        self.method_ttls = {**DEFAULT_METHOD_TTLS, **(method_ttls or {})}
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                body TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    @staticmethod
+    def make_key(method: str, params: Dict[str, Any]) -> str:
+        """Build a stable cache key from the method and its normalized parameters."""
+        normalized = {
+            str(name): str(value).strip()
+            for name, value in params.items()
+            if name not in IGNORED_PARAMS and name != "method" and value is not None
+        }
+        raw = json.dumps([method, normalized], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, method: str) -> float:
+        """Return the TTL in seconds for ``method`` (0 disables caching)."""
+        return self.method_ttls.get(method, self.default_ttl)
+
+    def get(self, method: str, params: Dict[str, Any]) -> Optional[Any]:
+        """Return the cached response, or None on a miss or expired entry."""
+        if self.ttl_for(method) <= 0:
+            return None
+
+        key = self.make_key(method, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, method: str, params: Dict[str, Any], value: Any) -> None:
+        """Store ``value`` for the method's TTL, evicting LRU entries past ``max_entries``."""
+        ttl = self.ttl_for(method)
+        if ttl <= 0:
+            return
+
+        key = self.make_key(method, params)
+        now = time.time()
+        body = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, method, body, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, method, body, now + ttl, now),
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current number of cached entries."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the shared response cache, or None when RESPONSE_CACHE_ENABLED is false."""
+    global _shared_cache
+    if os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    if _shared_cache is None:
+        with _cache_lock:
+            if _shared_cache is None:
+                _shared_cache = ResponseCache()
+    return _shared_cache
@@ -0,0 +1,206 @@
+# scripts/data_collection/scrobble_generator.py
+import bisect
+import heapq
+import logging
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from faker import Faker
+
+from scripts.data_collection.rate_limiter import TokenBucket
+from scripts.data_collection.writers import save_records
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SIZES = ("small", "medium", "large", "extralarge")
+BAND_SUFFIXES = ("Band", "Collective", "Project", "Trio", "Quartet", "Orchestra")
+
+
+def _zipf_cum_weights(count: int, s: float) -> List[float]:
+    """Cumulative Zipf weights: item of rank r is picked with probability proportional to 1 / r**s."""
+    return np.cumsum(1.0 / np.arange(1, count + 1) ** s).tolist()
+
+
+class ScrobbleGenerator:
+    """Synthetic Last.fm scrobbles shaped like ``user.getrecenttracks`` track objects.
+
+    Artist and per-artist track popularity follow a Zipf distribution. Each
+    user listens in sessions: a run of back-to-back plays (each lasting the
+    track's duration, often staying on the same artist or a favourite) followed
+    by an idle gap. Events from all users are merged on a heap, so the stream's
+    timestamps never go backwards. Every event carries an extra ``user`` field.
+    """
+
+    def __init__(self, users: Optional[int] = None, artists: Optional[int] = None,
+                 zipf_s: Optional[float] = None, seed: int = 0, start: Optional[datetime] = None):
+        """
+        Args:
+            users: Number of simulated listeners (SCROBBLE_USERS)
+            artists: Catalogue size in artists (SCROBBLE_ARTISTS)
+            zipf_s: Zipf exponent of artist and track popularity (SCROBBLE_ZIPF_S)
+            seed: Seed for the catalogue and the listening simulation
+            start: Timestamp of the first possible play (defaults to now)
+        """
+        self.users = users or int(os.getenv("SCROBBLE_USERS", 1_000))
+        self.artists = artists or int(os.getenv("SCROBBLE_ARTISTS", 5_000))
+        self.zipf_s = zipf_s or float(os.getenv("SCROBBLE_ZIPF_S", 1.1))
+        self.start = (start or datetime.now(timezone.utc)).timestamp()
+        self.data_dir = Path("data/external")
+
+        # Listening behaviour
+        self.mean_session_plays = 15
+        self.mean_session_gap = 8 * 60 * 60
+        self.same_artist_probability = 0.35
+        self.favourite_probability = 0.4
+
+        self.random = random.Random(seed)
+        self._build_catalog(np.random.default_rng(seed), Faker())
+        self._build_users()
+
+    def _mbid(self) -> str:
+        return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    def _build_catalog(self, rng: np.random.Generator, fake: Faker) -> None:
+        fake.seed_instance(self.random.getrandbits(32))
+        self.artist_cum_weights = _zipf_cum_weights(self.artists, self.zipf_s)
+        self.catalog = []
+        for _ in range(self.artists):
+            if self.random.random() < 0.5:
+                name = fake.name()
+            else:
+                name = f"{fake.last_name()} {self.random.choice(BAND_SUFFIXES)}"
+            artist = {"mbid": self._mbid(), "#text": name}
+            track_count = int(rng.geometric(0.1))
+            albums = [{"mbid": self._mbid(), "#text": fake.catch_phrase().title()}
+                      for _ in range(track_count // 12 + 1)]
+            tracks = []
+            for i in range(track_count):
+                title = " ".join(fake.words(nb=self.random.randint(1, 4))).title()
+                image_id = uuid.UUID(int=self.random.getrandbits(128)).hex
+                tracks.append({
+                    "artist": artist,
+                    "album": albums[i // 12],
+                    "name": title,
+                    "mbid": self._mbid(),
+                    "url": f"https://www.last.fm/music/{name.replace(' ', '+')}/_/{title.replace(' ', '+')}",
+                    "image": [
+                        {"size": size, "#text": f"https://lastfm.freetls.fastly.net/i/u/{size}/{image_id}.png"}
+                        for size in IMAGE_SIZES
+                    ],
+                    "duration": int(np.clip(rng.normal(215, 45), 90, 600)),
+                })
+            self.catalog.append((tracks, _zipf_cum_weights(track_count, self.zipf_s)))
+
+    def _build_users(self) -> None:
+        self.usernames = [f"user_{i:06d}" for i in range(self.users)]
+        # Heavy-tailed activity: a few users scrobble far more than the rest
+        self.activity = [self.random.lognormvariate(0, 1) for _ in range(self.users)]
+        self.favourites = [[self._pick_artist() for _ in range(20)] for _ in range(self.users)]
+
+    def _pick_artist(self) -> int:
+        return bisect.bisect_left(self.artist_cum_weights, self.random.random() * self.artist_cum_weights[-1])
+
+    def _pick_track(self, user: int, last_artist: Optional[int]) -> tuple:
+        roll = self.random.random()
+        if last_artist is not None and roll < self.same_artist_probability:
+            artist = last_artist
+        elif roll < self.same_artist_probability + self.favourite_probability:
+            artist = self.random.choice(self.favourites[user])
+        else:
+            artist = self._pick_artist()
+        tracks, cum_weights = self.catalog[artist]
+        index = bisect.bisect_left(cum_weights, self.random.random() * cum_weights[-1])
+        return artist, tracks[min(index, len(tracks) - 1)]
+
+    def _session_gap(self, user: int) -> float:
+        return self.random.expovariate(self.activity[user] / self.mean_session_gap)
+
+    @staticmethod
+    def _event(username: str, track: Dict, played_at: float) -> Dict:
+        uts = int(played_at)
+        return {
+            "artist": track["artist"],
+            "streamable": "0",
+            "image": track["image"],
+            "mbid": track["mbid"],
+            "album": track["album"],
+            "name": track["name"],
+            "url": track["url"],
+            "date": {
+                "uts": str(uts),
+                "#text": datetime.fromtimestamp(uts, timezone.utc).strftime("%d %b %Y, %H:%M"),
+            },
+            "user": username,
+        }
+
+    def iter_events(self, count: Optional[int] = None) -> Iterator[Dict]:
+        """Yield scrobbles in timestamp order; endless unless ``count`` is given.
+
+        The nested artist, album and image objects are shared between plays of
+        the same track, so treat yielded events as read-only.
+        """
+        # (next play time, user, plays left in the session, last artist)
+        heap = [(self.start + self.random.random() * self._session_gap(user), user, 0, None)
+                for user in range(self.users)]
+        heapq.heapify(heap)
+
+        emitted = 0
+        while count is None or emitted < count:
+            played_at, user, plays_left, last_artist = heapq.heappop(heap)
+            if plays_left <= 0:
+                plays_left = int(self.random.expovariate(1 / self.mean_session_plays)) + 1
+                last_artist = None
+
+            artist, track = self._pick_track(user, last_artist)
+            yield self._event(self.usernames[user], track, played_at)
+            emitted += 1
+
+            plays_left -= 1
+            next_play = played_at + track["duration"] + self.random.uniform(0, 5)
+            if plays_left <= 0:
+                next_play += self._session_gap(user)
+            heapq.heappush(heap, (next_play, user, plays_left, artist))
+
+    def stream(self, rate: Optional[float] = None, count: Optional[int] = None) -> Iterator[Dict]:
+        """Yield scrobbles paced at ``rate`` events/s (SCROBBLE_RATE) to mimic a live feed."""
+        limiter = TokenBucket(rate or float(os.getenv("SCROBBLE_RATE", 100)))
+        for event in self.iter_events(count):
+            limiter.acquire()
+            yield event
+
+    def save(self, count: int, filename: str = "synthetic_scrobbles", fmt: str = "ndjson",
+             compression: Optional[str] = None) -> Path:
+        """Write ``count`` scrobbles to data/external as lastfm_<filename>_<timestamp>.<fmt>."""
+        start = time.perf_counter()
+        file_path = save_records(self.iter_events(count), self.data_dir, f"lastfm_{filename}",
+                                 fmt=fmt, compression=compression)
+        seconds = time.perf_counter() - start
+        logger.info(f"Generated {count} scrobbles in {seconds:.1f}s ({count / max(seconds, 1e-9):,.0f} events/s)")
+        return file_path
+
+
+def main():
+    """Generate a bulk file of synthetic scrobbles (SCROBBLE_COUNT events)."""
+    logging.basicConfig(level=logging.INFO)
+    generator = ScrobbleGenerator()
+
+    try:
+        file_path = generator.save(int(os.getenv("SCROBBLE_COUNT", 100_000)))
+        print(f"Synthetic scrobbles saved to: {file_path}")
+
+    except Exception as e:
+        print(f"Scrobble generation failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# scripts/data_collection/snapshot_manifest.py
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+_shared_manifest: Optional["SnapshotManifest"] = None
+_manifest_lock = threading.Lock()
+
+
+class SnapshotManifest:
+    """Content hash, file and record count of the last snapshot written per dataset.
+
+    ``save_records`` consults it to drop a new snapshot whose content matches
+    the previous one, so polling an unchanged source writes nothing new.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or os.getenv("SNAPSHOT_MANIFEST_PATH", "data/state/manifest.json"))
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.path.exists():
+            return {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def get(self, dataset: str) -> Optional[Dict]:
+        """Return the manifest entry of ``dataset``, or None if it was never saved."""
+        with self._lock:
+            return self._load().get(dataset)
+
+    def is_unchanged(self, dataset: str, content_hash: str) -> bool:
+        """Return True if the last snapshot of ``dataset`` has this hash and still exists."""
+        entry = self.get(dataset)
+        return bool(entry) and entry["content_hash"] == content_hash and Path(entry["file"]).exists()
+
+    def record(self, dataset: str, content_hash: str, file_path: Path, records: int) -> None:
+        """Persist the latest snapshot of ``dataset``, replacing the file atomically."""
+        with self._lock:
+            manifest = self._load()
+            manifest[dataset] = {
+                "content_hash": content_hash,
+                "file": str(file_path),
+                "records": records,
+                "updated_at": int(time.time()),
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def get_snapshot_manifest() -> Optional[SnapshotManifest]:
+    """Return the shared manifest, or None when SNAPSHOT_DEDUPE_ENABLED is false."""
+    global _shared_manifest
+    if os.getenv("SNAPSHOT_DEDUPE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    if _shared_manifest is None:
+        with _manifest_lock:
+            if _shared_manifest is None:
+                _shared_manifest = SnapshotManifest()
+    return _shared_manifest
@@ -2,100 +2,295 @@ import os
 import requests
 from dotenv import load_dotenv
 import base64
-import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional
+
+from scripts.data_collection.collector_metrics import CollectorMetrics, endpoint_name, export_collector_metrics, get_collector_metrics, response_size
+from scripts.data_collection.http_session import get_session
+from scripts.data_collection.parquet_sink import get_parquet_sink
+from scripts.data_collection.rate_limiter import get_rate_limiter
+from scripts.data_collection.response_cache import ResponseCache, get_response_cache
+from scripts.data_collection.snapshot_manifest import get_snapshot_manifest
+from scripts.data_collection.writers import iter_records, save_records
 
 load_dotenv()
-client_id = os.getenv("SPOTIFY_CLIENT_ID")
-client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
+
+
+class SpotifyTokenManager:
+    """
+    Client-credentials token holder that reuses the token until shortly before it expires.
+    No network I/O happens until the first token is requested.
+    """
+
+    def __init__(self, client_id=None, client_secret=None, session=None, refresh_margin=60):
+        """
+        :param client_id: Spotify client ID (defaults to SPOTIFY_CLIENT_ID)
+        :param client_secret: Spotify client secret (defaults to SPOTIFY_CLIENT_SECRET)
+        :param session: HTTP session used for the token endpoint
+        :param refresh_margin: Seconds before expiry at which the token is refreshed
+        """
+        self.client_id = client_id or os.getenv("SPOTIFY_CLIENT_ID")
+        self.client_secret = client_secret or os.getenv("SPOTIFY_CLIENT_SECRET")
+        self.token_url = os.getenv("SPOTIFY_TOKEN_URL", "https://accounts.spotify.com/api/token")
+        self.session = session or get_session()
+        self.refresh_margin = refresh_margin
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _request_token(self):
+        if not self.client_id or not self.client_secret:
+            raise ValueError("SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET environment variables must be set. Please check your .env file.")
+
+        auth_string = self.client_id + ":" + self.client_secret
+        auth_base64 = str(base64.b64encode(auth_string.encode("utf-8")), "utf-8")
+        headers = {
+            "Authorization": "Basic " + auth_base64,
+            "Content-Type": "application/x-www-form-urlencoded"
+        }
+        data = {"grant_type": "client_credentials"}
+        result = self.session.post(self.token_url, headers=headers, data=data)
+        result.raise_for_status()
+        json_result = result.json()
+        self._token = json_result["access_token"]
+        self._expires_at = time.monotonic() + float(json_result.get("expires_in", 3600))
+
+    def get_token(self, force_refresh=False):
+        """
+        Return a valid access token, refreshing it ahead of expiry.
+        :param force_refresh: Discard the cached token (e.g. after a 401)
+        :return: Bearer access token
+        """
+        with self._lock:
+            if force_refresh or self._token is None or time.monotonic() >= self._expires_at - self.refresh_margin:
+                self._request_token()
+            return self._token
+
+
+class SpotifyAPICollector:
+    """Spotify Web API data collector for artist and track metadata."""
+
+    # Maximum number of IDs per request on Spotify's multi-ID endpoints
+    BATCH_LIMITS = {"artists": 50, "tracks": 50, "albums": 20, "audio-features": 100}
+
+    def __init__(self, token_manager: Optional[SpotifyTokenManager] = None,
+                 session: Optional[requests.Session] = None, cache: Optional[ResponseCache] = None,
+                 metrics: Optional[CollectorMetrics] = None):
+        self.base_url = os.getenv("SPOTIFY_API_URL", "https://api.spotify.com/v1")
+        self.session = session or get_session()
+        self.token_manager = token_manager or SpotifyTokenManager(session=self.session)
+        self.cache = cache or get_response_cache()
+        self.data_dir = Path("data/external")
+        self.max_retries = int(os.getenv("MAX_RETRIES", 3))
+        self.max_workers = int(os.getenv("SPOTIFY_MAX_WORKERS", 4))
+        self.rate_limiter = get_rate_limiter("spotify", float(os.getenv("SPOTIFY_RATE_LIMIT", 20)))
+        self.metrics = metrics or get_collector_metrics()
+
+    def get_json(self, path, cache_method=None, params=None):
+        """
+        GET a Spotify endpoint, serving repeated lookups from the response cache.
+        Calls are paced by the shared Spotify rate limiter and retried after a 429 or a 5xx.
+        An expired or revoked token (401) is refreshed and the call retried once.
+        A response that is still an error after that raises requests.HTTPError.
+        :param path: Endpoint path relative to the API base URL
+        :param cache_method: Cache namespace for the endpoint (None disables caching)
+        :param params: Optional query parameters
+        :return: Decoded JSON response
+        :raises requests.HTTPError: If the final response is not successful
+        """
+        url = f"{self.base_url}{path}"
+        endpoint = endpoint_name(path)
+        cache = self.cache if cache_method else None
+        cache_params = {"url": url, **(params or {})}
+        if cache:
+            cached = cache.get(cache_method, cache_params)
+            self.metrics.record_cache("spotify", endpoint, hit=cached is not None)
+            if cached is not None:
+                return cached
+
+        result = self._get(url, endpoint, params)
+        if result.status_code == 401:
+            self.metrics.record_retry("spotify", endpoint, "401 Unauthorized")
+            self.token_manager.get_token(force_refresh=True)
+            result = self._get(url, endpoint, params)
+        if not result.ok:
+            self.metrics.record_error("spotify", endpoint, f"HTTP {result.status_code}")
+            result.raise_for_status()
+
+        json_result = result.json()
+        if cache and result.ok:
+            cache.set(cache_method, cache_params, json_result)
+        return json_result
+
+    def _get(self, url, endpoint, params=None):
+        for attempt in range(self.max_retries):
+            self.metrics.record_rate_limit_wait("spotify", self.rate_limiter.acquire())
+            start = time.perf_counter()
+            result = self.session.get(url, headers=get_auth_header(self.token_manager.get_token()), params=params)
+            self.metrics.observe_request("spotify", endpoint, time.perf_counter() - start,
+                                         result.status_code, response_size(result))
+            # Retry-After on a 429 pauses the shared limiter before the next attempt
+            self.rate_limiter.update_from_headers(result.headers)
+            if result.status_code != 429 and result.status_code < 500:
+                break
+            if attempt == self.max_retries - 1:
+                break
+            if result.status_code == 429:
+                self.metrics.record_retry("spotify", endpoint, "429 Too Many Requests")
+            else:
+                self.metrics.record_retry("spotify", endpoint, f"HTTP {result.status_code}", backoff=2 ** attempt)
+                time.sleep(2 ** attempt)  # Exponential backoff
+        return result
+
+    def get_several(self, endpoint: str, ids: List[str]) -> List[Optional[Dict]]:
+        """
+        Look up any number of IDs on a multi-ID endpoint (artists, tracks, albums, audio-features).
+        IDs are deduplicated and served from the cache where possible; the rest are split
+        into chunks of the endpoint's maximum size and fetched concurrently under the rate limiter.
+        :param endpoint: Multi-ID endpoint name, a key of BATCH_LIMITS
+        :param ids: Spotify IDs, duplicates allowed
+        :return: One object per input ID in input order (None for unknown IDs)
+        """
+        if endpoint not in self.BATCH_LIMITS:
+            raise ValueError(f"Unsupported endpoint. Must be one of: {list(self.BATCH_LIMITS)}")
+
+        cache_method = f"spotify.{endpoint}"
+        result_key = endpoint.replace("-", "_")
+        by_id = {}
+        missing = []
+        for item_id in dict.fromkeys(ids):
+            cached = None
+            if self.cache:
+                cached = self.cache.get(cache_method, {"id": item_id})
+                self.metrics.record_cache("spotify", f"/{endpoint}", hit=cached is not None)
+            if cached is not None:
+                by_id[item_id] = cached
+            else:
+                missing.append(item_id)
+
+        limit = self.BATCH_LIMITS[endpoint]
+        chunks = [missing[i:i + limit] for i in range(0, len(missing), limit)]
+
+        def fetch(chunk):
+            return self.get_json(f"/{endpoint}", params={"ids": ",".join(chunk)})[result_key]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for chunk, items in zip(chunks, executor.map(fetch, chunks)):
+                for item_id, item in zip(chunk, items):
+                    by_id[item_id] = item
+                    if item is not None and self.cache:
+                        self.cache.set(cache_method, {"id": item_id}, item)
+
+        return [by_id.get(item_id) for item_id in ids]
+
+    def search_for_artist(self, artist_name):
+        params = {"q": artist_name, "type": "artist", "limit": 1}
+        json_result = self.get_json("/search", "spotify.search", params)["artists"]["items"]
+
+        if len(json_result) == 0:
+            print("No artist with this name found")
+            return None
+
+        return json_result[0]
+
+    def get_songs_by_artist(self, artist_id):
+        json_result = self.get_json(f"/artists/{artist_id}/top-tracks", "spotify.top-tracks", {"country": "VN"})["tracks"]
+        return json_result
+
+    def get_albums_by_artist(self, artist_id):
+        json_result = self.get_json(f"/artists/{artist_id}/albums", "spotify.albums")
+        return json_result["items"]
+
+    def get_artists(self, artist_ids):
+        """
+        Get information for multiple artists by their Spotify IDs.
+        :param artist_ids: List of artist IDs (any number, batched 50 per request)
+        :return: List of artist objects
+        """
+        return self.get_several("artists", artist_ids)
+
+    def get_tracks(self, track_ids):
+        """
+        Get information for multiple tracks by their Spotify IDs.
+        :param track_ids: List of track IDs (any number, batched 50 per request)
+        :return: List of track objects
+        """
+        return self.get_several("tracks", track_ids)
+
+    def get_albums(self, album_ids):
+        """
+        Get information for multiple albums by their Spotify IDs.
+        :param album_ids: List of album IDs (any number, batched 20 per request)
+        :return: List of album objects
+        """
+        return self.get_several("albums", album_ids)
+
+    def get_audio_features(self, track_ids):
+        """
+        Get audio features for multiple tracks by their Spotify IDs.
+        :param track_ids: List of track IDs (any number, batched 100 per request)
+        :return: List of audio feature objects
+        """
+        return self.get_several("audio-features", track_ids)
+
+    def save_data(self, data: list, filename: str, fmt=None, compression=None) -> Optional[Path]:
+        """Save data to timestamped JSON/NDJSON file (None if unchanged since the last save)."""
+        return save_data(data, filename, fmt=fmt, compression=compression)
+
+
+_default_token_manager: Optional[SpotifyTokenManager] = None
+
 
 def get_token():
-    auth_string = client_id + ":" + client_secret
-    auth_bytes = auth_string.encode("utf-8")
-    auth_base64 = str(base64.b64encode(auth_bytes), "utf-8")
-
-    url = "https://accounts.spotify.com/api/token"
-    headers = {
-        "Authorization": "Basic " + auth_base64,
-        "Content-Type": "application/x-www-form-urlencoded"
-    }
-    data = {"grant_type": "client_credentials"}
-    result = requests.post(url, headers=headers, data=data)
-    json_result = json.loads(result.content)
-    token = json_result["access_token"]
-    return token
+    """Return a cached client-credentials token from the shared token manager."""
+    global _default_token_manager
+    if _default_token_manager is None:
+        _default_token_manager = SpotifyTokenManager()
+    return _default_token_manager.get_token()
 
 def get_auth_header(token):
     return {"Authorization": "Bearer " + token}
 
-def search_for_artist(token, artist_name):
-    url = "https://api.spotify.com/v1/search"
-    headers = get_auth_header(token)
-    query = f"q={artist_name}&type=artist&limit=1"
-
-    query_url = url + "?" + query
-    result = requests.get(query_url, headers=headers)
-    json_result = json.loads(result.content)["artists"]["items"]
-    
-    if len(json_result) == 0:
-        print("No artist with this name found")
+def save_data(data: list, filename: str, fmt=None, compression=None) -> Optional[Path]:
+    """
+    Save data to timestamped JSON/NDJSON file via the shared streaming writer.
+    :return: Path of the new file, or None if the data matches the last snapshot
+    """
+    file_path = save_records(data, Path("data/external"), filename, fmt=fmt, compression=compression,
+                             manifest=get_snapshot_manifest())
+    if file_path is None:
         return None
-    
-    return json_result[0]
-
-
-def get_songs_by_artist(token, artist_id):
-    url = f"https://api.spotify.com/v1/artists/{artist_id}/top-tracks?country=VN"
-    headers = get_auth_header(token)
-    result = requests.get(url, headers=headers)
-    json_result = result.json()["tracks"]
-    return json_result
-
-def get_albums_by_artist(token, artist_id):
-    url = f"https://api.spotify.com/v1/artists/{artist_id}/albums"
-    headers =get_auth_header(token)
-    result = requests.get(url, headers=headers)
-    json_result = result.json()
-    return json_result["items"]
-
-def save_data(data: list, filename: str) -> 'Path':
-    """Save data to timestamped JSON file."""
-    timestamp = int(time.time())
-    file_path = Path("data/external") / f"{filename}_{timestamp}.json"
-    file_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    parquet_sink = get_parquet_sink()
+    if parquet_sink:
+        parquet_sink.write(iter_records(file_path), "spotify", filename)
     return file_path
 
-def get_artists(token, artist_ids):
-    """
-    Get information for multiple artists by their Spotify IDs.
-    :param token: Spotify API token
-    :param artist_ids: List of artist IDs (max 50)
-    :return: List of artist objects
-    """
-    url = "https://api.spotify.com/v1/artists"
-    headers = get_auth_header(token)
-    ids_param = ",".join(artist_ids)
-    params = {"ids": ids_param}
-    result = requests.get(url, headers=headers, params=params)
-    json_result = result.json()
-    return json_result["artists"]
-
-
-token = get_token()
-# result = search_for_artist(token, "Noo")
-# artist_id = result["id"]
-# songs = get_songs_by_artist(token, artist_id)
-
-# for idx, song in enumerate(songs):
-#     print(f"{idx+1}. {song['name']}")
-
-# albums = get_albums_by_artist(token, artist_id)
-# for idx, album in enumerate(albums):
-#     print(f"{idx+1}. {album['name']}")
-
-artist_ids = ["1Xyo4u8uXC1ZmMpatF05PJ", "3TVXtAsR1Inumwj472S9r4"]  # Example IDs
-artists = get_artists(token, artist_ids)
-save_data(artists, "artists_info")
\ No newline at end of file
+
+def main():
+    """Main function to demonstrate Spotify API data collection."""
+    collector = SpotifyAPICollector()
+
+    # result = collector.search_for_artist("Noo")
+    # artist_id = result["id"]
+    # songs = collector.get_songs_by_artist(artist_id)
+
+    # for idx, song in enumerate(songs):
+    #     print(f"{idx+1}. {song['name']}")
+
+    # albums = collector.get_albums_by_artist(artist_id)
+    # for idx, album in enumerate(albums):
+    #     print(f"{idx+1}. {album['name']}")
+
+    try:
+        artist_ids = ["1Xyo4u8uXC1ZmMpatF05PJ", "3TVXtAsR1Inumwj472S9r4"]  # Example IDs
+        artists = collector.get_artists(artist_ids)
+        collector.save_data(artists, "artists_info")
+
+    finally:
+        export_collector_metrics()
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,14 @@
 import os
 import requests
-import json
-import time
 from dotenv import load_dotenv
 from pathlib import Path
 
+from scripts.data_collection.writers import save_records
+
 
 def save_data(data: list, filename: str) -> 'Path':
-    """Save data to timestamped JSON file."""
-    timestamp = int(time.time())
-    file_path = Path("data/external") / f"{filename}_{timestamp}.json"
-    file_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    return file_path
+    """Save data to timestamped JSON/NDJSON file via the shared streaming writer."""
+    return save_records(data, Path("data/external"), filename)
 
 load_dotenv()
 API_KEY = os.getenv("YOUR-OPENAQ-API-KEY")  # Make sure your .env has API_KEY=your_openaq_api_key
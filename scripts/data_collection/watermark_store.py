@@ -0,0 +1,41 @@
+# scripts/data_collection/watermark_store.py
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+class WatermarkStore:
+    """Persisted high-water marks (e.g. last ingested scrobble timestamp) per stream key."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or os.getenv("WATERMARK_PATH", "data/state/watermarks.json"))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, int]:
+        if not self.path.exists():
+            return {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def get(self, key: str) -> Optional[int]:
+        """Return the watermark stored for ``key``, or None if the stream was never ingested."""
+        with self._lock:
+            return self._load().get(key)
+
+    def set(self, key: str, value: int) -> None:
+        """Persist the watermark for ``key``, replacing the file atomically."""
+        with self._lock:
+            watermarks = self._load()
+            watermarks[key] = value
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(watermarks, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,196 @@
+# scripts/data_collection/writers.py
+import gzip
+import hashlib
+import io
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, Optional, TextIO
+
+from dotenv import load_dotenv
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency: pip install zstandard
+    zstandard = None
+
+if TYPE_CHECKING:
+    from scripts.data_collection.snapshot_manifest import SnapshotManifest
+
+# Load environment variables
+load_dotenv()
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+OUTPUT_FORMATS = ("json", "ndjson")
+
+
+def _open_text(path: Path, compression: Optional[str]) -> TextIO:
+    if compression is None:
+        return open(path, "w", encoding="utf-8", newline="")
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=6)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstd compression requires the 'zstandard' package. Install it with: pip install zstandard")
+        writer = zstandard.ZstdCompressor(level=3).stream_writer(open(path, "wb"))
+        return io.TextIOWrapper(writer, encoding="utf-8", newline="")
+    raise ValueError(f"Invalid compression. Must be one of: {[c for c in COMPRESSION_SUFFIXES if c]}")
+
+
+class _HashingWriter:
+    """Text writer that feeds everything written through it into a digest."""
+
+    def __init__(self, f: TextIO, digest):
+        self._f = f
+        self._digest = digest
+
+    def write(self, text: str) -> int:
+        self._digest.update(text.encode("utf-8"))
+        return self._f.write(text)
+
+
+@contextmanager
+def atomic_open(path: Path, compression: Optional[str] = None, digest=None,
+                publish: Optional[Callable[[], bool]] = None) -> Iterator[TextIO]:
+    """Open ``path`` for writing through a hidden temp file renamed into place on success.
+
+    Readers never see a partially written file; on error the temp file is removed.
+    If ``digest`` (a hashlib object) is given, the uncompressed text is hashed as it is written.
+    If ``publish`` is given, it is called once the temp file is complete; when it
+    returns False the temp file is discarded and ``path`` is left untouched.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with _open_text(tmp_path, compression) as f:
+            yield _HashingWriter(f, digest) if digest is not None else f
+        if publish is None or publish():
+            os.replace(tmp_path, path)
+        else:
+            tmp_path.unlink()
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _as_records(data: Iterable[Dict] | Dict) -> Iterable[Any]:
+    return [data] if isinstance(data, dict) else data
+
+
+def write_ndjson(data: Iterable[Dict] | Dict, path: Path, compression: Optional[str] = None, digest=None,
+                 publish: Optional[Callable[[], bool]] = None) -> int:
+    """Stream records to ``path`` as newline-delimited JSON, one record per line.
+
+    Returns:
+        Number of records written
+    """
+    count = 0
+    with atomic_open(path, compression, digest, publish) as f:
+        for record in _as_records(data):
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def write_json(data: Iterable[Dict] | Dict, path: Path, compression: Optional[str] = None, digest=None,
+               publish: Optional[Callable[[], bool]] = None) -> int:
+    """Stream records to ``path`` as a compact JSON array (a dict is written as-is).
+
+    Returns:
+        Number of records written
+    """
+    if isinstance(data, dict):
+        with atomic_open(path, compression, digest, publish) as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        return 1
+
+    count = 0
+    with atomic_open(path, compression, digest, publish) as f:
+        f.write("[")
+        for record in data:
+            f.write(",\n" if count else "\n")
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            count += 1
+        f.write("\n]\n")
+    return count
+
+
+def save_records(data: Iterable[Dict] | Dict, directory: Path, filename: str,
+                 fmt: Optional[str] = None, compression: Optional[str] = None,
+                 manifest: Optional["SnapshotManifest"] = None) -> Optional[Path]:
+    """Save records to a timestamped file in ``directory``.
+
+    Args:
+        data: A list, dict or any record stream (consumed once, never materialized)
+        directory: Output directory, created if missing
+        filename: File name prefix; the timestamp and extension are appended
+        fmt: "json" or "ndjson" (defaults to OUTPUT_FORMAT, else "json")
+        compression: "none", "gzip" or "zstd" (defaults to OUTPUT_COMPRESSION, else "none")
+        manifest: Snapshot manifest; a snapshot identical to the last one saved
+            under ``directory/filename`` is discarded
+
+    Returns:
+        Path of the written file, or None if the content was unchanged
+    """
+    fmt = (fmt or os.getenv("OUTPUT_FORMAT", "json")).lower()
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Invalid output format. Must be one of: {list(OUTPUT_FORMATS)}")
+    compression = (compression or os.getenv("OUTPUT_COMPRESSION", "none")).lower()
+    codec = None if compression == "none" else compression
+    if codec not in COMPRESSION_SUFFIXES:
+        raise ValueError("Invalid compression. Must be one of: ['none', 'gzip', 'zstd']")
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    timestamp = int(time.time())
+    file_path = directory / f"{filename}_{timestamp}.{fmt}{COMPRESSION_SUFFIXES[codec]}"
+
+    writer = write_ndjson if fmt == "ndjson" else write_json
+    digest = hashlib.sha256()
+    if manifest is None:
+        writer(data, file_path, codec, digest)
+        return file_path
+
+    # Compare hashes before the rename, so an unchanged snapshot is never published
+    dataset = str(directory / f"{filename}.{fmt}")
+    unchanged = False
+
+    def publish() -> bool:
+        nonlocal unchanged
+        unchanged = manifest.is_unchanged(dataset, digest.hexdigest())
+        return not unchanged
+
+    count = writer(data, file_path, codec, digest, publish)
+    if unchanged:
+        return None
+    manifest.record(dataset, digest.hexdigest(), file_path, count)
+    return file_path
+
+
+def open_text(path: Path) -> TextIO:
+    """Open a file written by ``save_records`` for reading, decompressing by suffix."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise ImportError("zstd compression requires the 'zstandard' package. Install it with: pip install zstandard")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")), encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_records(path: Path) -> Iterator[Any]:
+    """Yield the records of a JSON or NDJSON file (NDJSON is read line by line)."""
+    path = Path(path)
+    with open_text(path) as f:
+        if ".ndjson" in path.suffixes:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        data = json.load(f)
+        yield from _as_records(data)
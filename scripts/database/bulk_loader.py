@@ -0,0 +1,259 @@
+# scripts/database/bulk_loader.py
+import csv
+import json
+import logging
+import os
+import re
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import psycopg
+from dotenv import load_dotenv
+
+from scripts.data_collection.writers import iter_records, open_text
+from scripts.database.connection import close_pool, get_connection
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# File types the loader understands, optionally followed by .gz or .zst
+LOADABLE_SUFFIXES = (".json", ".ndjson", ".csv")
+
+# File name prefixes that identify the source system (e.g. lastfm_top_tracks_1700000000.json)
+FILE_SOURCES = {"lastfm": "lastfm", "spotify": "spotify", "kaggle": "kaggle", "fake": "faker"}
+
+# ID fields tried in order for an entity's natural ID, before Last.fm's MBID/name keys
+NATURAL_ID_FIELDS = ("id", "transaction_id", "user_id", "sensor_id")
+
+PARTITION_SQL = "SELECT staging.ensure_records_partition(now())"
+
+# Every load lands in a transaction-scoped temp table first
+BATCH_TABLE_SQL = """
+CREATE TEMP TABLE load_batch (
+    ord BIGINT GENERATED ALWAYS AS IDENTITY,
+    source TEXT NOT NULL,
+    entity_type TEXT NOT NULL,
+    natural_id TEXT,
+    payload JSONB NOT NULL,
+    file_name VARCHAR(255)
+) ON COMMIT DROP
+"""
+
+COPY_SQL = "COPY load_batch (source, entity_type, natural_id, payload, file_name) FROM STDIN"
+
+# Upsert the last version of each entity in the load into staging.current_records,
+# skipping unchanged payloads, and append only the changed rows (plus records
+# without a natural ID) to the staging.records history.
+MERGE_SQL = """
+WITH latest AS (
+    SELECT DISTINCT ON (source, entity_type, natural_id) source, entity_type, natural_id, payload, file_name
+    FROM load_batch
+    WHERE natural_id IS NOT NULL
+    ORDER BY source, entity_type, natural_id, ord DESC
+), changed AS (
+    INSERT INTO staging.current_records AS cur (source, entity_type, natural_id, payload, file_name)
+    SELECT source, entity_type, natural_id, payload, file_name FROM latest
+    ON CONFLICT (source, entity_type, natural_id) DO UPDATE
+        SET payload = EXCLUDED.payload, file_name = EXCLUDED.file_name, updated_at = now()
+        WHERE cur.payload IS DISTINCT FROM EXCLUDED.payload
+    RETURNING cur.source, cur.entity_type, cur.natural_id, cur.payload, cur.file_name
+)
+INSERT INTO staging.records (source, entity_type, natural_id, payload, file_name)
+SELECT source, entity_type, natural_id, payload, file_name FROM changed
+UNION ALL
+SELECT source, entity_type, natural_id, payload, file_name FROM load_batch WHERE natural_id IS NULL
+"""
+
+
+def _escape_copy_text(value: Optional[str]) -> str:
+    """Escape a value for PostgreSQL's COPY text format (None becomes NULL)."""
+    if value is None:
+        return "\\N"
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _base_suffix(path: Path) -> str:
+    suffixes = [s for s in path.suffixes if s not in (".gz", ".zst")]
+    return suffixes[-1] if suffixes else ""
+
+
+def describe_file(path: Path) -> Tuple[str, str]:
+    """Return (source, entity_type) for a collected file name.
+
+    ``lastfm_top_tracks_1700000000.json.gz`` -> ("lastfm", "top_tracks");
+    files without a known source prefix are loaded as source "file".
+    """
+    stem = Path(path).name.split(".")[0]
+    stem = re.sub(r"_\d{9,}$", "", stem)
+    prefix, _, rest = stem.partition("_")
+    if prefix in FILE_SOURCES and rest:
+        return FILE_SOURCES[prefix], rest
+    return "file", stem
+
+
+def natural_id(record: Dict) -> Optional[str]:
+    """Return the natural key of a record.
+
+    Spotify/Kaggle rows and generated data use their ID field; Last.fm tracks
+    their MBID, else "artist:track"; Last.fm artists their name. Scrobbles
+    (tracks with a play date) are events, keyed "user@uts:track".
+    """
+    if not isinstance(record, dict):
+        return None
+    for field in NATURAL_ID_FIELDS:
+        if record.get(field):
+            return str(record[field])
+
+    name = record.get("name")
+    if "artist" not in record:
+        return str(name) if name else None
+
+    artist = record["artist"]
+    if isinstance(artist, dict):
+        artist = artist.get("name") or artist.get("#text")
+    track_id = record.get("mbid") or (f"{artist}:{name}" if name and artist else None)
+    played = record.get("date")
+    if track_id and isinstance(played, dict) and played.get("uts"):
+        return f"{record.get('user', '')}@{played['uts']}:{track_id}"
+    return track_id
+
+
+def iter_file_records(path: Path) -> Iterator[Dict]:
+    """Yield the records of a JSON, NDJSON or CSV file one at a time.
+
+    NDJSON and CSV files are read line by line, so neither is ever loaded
+    fully into memory.
+    """
+    path = Path(path)
+    suffix = _base_suffix(path)
+    if suffix == ".ndjson":
+        with open_text(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif suffix == ".csv":
+        with open_text(path) as f:
+            yield from csv.DictReader(f)
+    elif suffix == ".json":
+        yield from iter_records(path)
+    else:
+        raise ValueError(f"Unsupported file type: {path.name}. Must be one of: {list(LOADABLE_SUFFIXES)}")
+
+
+class BulkLoader:
+    """Stream collected files into the staging schema with ``COPY FROM STDIN``.
+
+    Each file is loaded in its own transaction on a connection borrowed from
+    the shared pool: either every record lands or none does. Rows are sent to
+    the server ``batch_size`` at a time, as JSONB payloads tagged with the
+    file's source, entity type and each record's natural ID, then upserted
+    into ``staging.current_records``. Reloading unchanged data is a no-op:
+    only new or changed entities are appended to ``staging.records``.
+    """
+
+    def __init__(self, connection_factory: Callable[[], ContextManager[psycopg.Connection]] = get_connection,
+                 batch_size: Optional[int] = None):
+        self.connection_factory = connection_factory
+        self.batch_size = batch_size or int(os.getenv("LOAD_BATCH_SIZE", 5000))
+
+    def _copy_batches(self, records: Iterable[Dict], source: str, entity_type: str,
+                      file_name: str) -> Iterator[Tuple[int, str]]:
+        """Yield (row count, COPY text payload) per batch of records."""
+        records = iter(records)
+        prefix = f"{_escape_copy_text(source)}\t{_escape_copy_text(entity_type)}\t"
+        suffix = f"\t{_escape_copy_text(file_name)}\n"
+        while batch := list(islice(records, self.batch_size)):
+            payload = "".join(
+                prefix
+                + _escape_copy_text(natural_id(record)) + "\t"
+                + _escape_copy_text(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+                + suffix
+                for record in batch
+            )
+            yield len(batch), payload
+
+    def load_records(self, records: Iterable[Dict], source: str, entity_type: str, file_name: str) -> Dict:
+        """Load a record stream in a single transaction.
+
+        Returns:
+            Load statistics: file, rows, changed, seconds and rows_per_sec
+        """
+        start = time.perf_counter()
+        rows = 0
+        with self.connection_factory() as conn:
+            with conn.cursor() as cur:
+                # Partition maintenance runs once per load, so it is not worth preparing
+                cur.execute(PARTITION_SQL, prepare=False)
+                # load_batch is recreated per transaction, so statements on it are never prepared
+                cur.execute(BATCH_TABLE_SQL, prepare=False)
+                with cur.copy(COPY_SQL) as copy:
+                    for count, payload in self._copy_batches(records, source, entity_type, file_name):
+                        copy.write(payload)
+                        rows += count
+                cur.execute(MERGE_SQL, prepare=False)
+                changed = cur.rowcount
+        seconds = time.perf_counter() - start
+        stats = {
+            "file": file_name,
+            "rows": rows,
+            "changed": changed,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(rows / seconds, 1) if seconds else 0.0,
+        }
+        logger.info(f"Loaded {rows} rows ({changed} new or changed) from {file_name} in {seconds:.2f}s "
+                    f"({stats['rows_per_sec']} rows/s)")
+        return stats
+
+    def load_file(self, path: Path) -> Dict:
+        """Load every record of ``path`` in a single transaction."""
+        path = Path(path)
+        source, entity_type = describe_file(path)
+        stats = self.load_records(iter_file_records(path), source, entity_type, path.name)
+        stats["file"] = str(path)
+        return stats
+
+    def load_files(self, paths: Iterable[Path]) -> List[Dict]:
+        """Load several files, one transaction each, and log the overall throughput."""
+        results = [self.load_file(path) for path in paths]
+        total_rows = sum(r["rows"] for r in results)
+        total_seconds = sum(r["seconds"] for r in results)
+        if total_seconds:
+            logger.info(f"Loaded {total_rows} rows from {len(results)} files at {total_rows / total_seconds:.1f} rows/s")
+        return results
+
+
+def find_loadable_files(directory: Path) -> List[Path]:
+    """Return the JSON, NDJSON and CSV files (optionally compressed) in ``directory``."""
+    return sorted(
+        path for path in Path(directory).iterdir()
+        if path.is_file() and not path.name.startswith(".") and _base_suffix(path) in LOADABLE_SUFFIXES
+    )
+
+
+def main():
+    """Load every collected file in data/external into the staging schema."""
+    logging.basicConfig(level=logging.INFO)
+    loader = BulkLoader()
+
+    try:
+        results = loader.load_files(find_loadable_files(Path("data/external")))
+        print(f"Bulk load completed: {sum(r['rows'] for r in results)} rows from {len(results)} files")
+
+    except Exception as e:
+        print(f"Bulk load failed: {e}")
+        raise
+
+    finally:
+        close_pool()
+
+if __name__ == "__main__":
+    main()
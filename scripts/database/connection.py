@@ -0,0 +1,98 @@
+# scripts/database/connection.py
+import os
+import threading
+from typing import ContextManager, Optional
+
+import psycopg
+from dotenv import load_dotenv
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import ConnectionPool
+
+# Load environment variables
+load_dotenv()
+
+_shared_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_params():
+    """Get database connection parameters from environment variables."""
+    return {
+        "host": os.getenv("POSTGRES_HOST", "localhost"),
+        "port": os.getenv("POSTGRES_PORT", "5432"),
+        "dbname": os.getenv("POSTGRES_DB", "staging_db"),
+        "user": os.getenv("POSTGRES_USER", "staging_user"),
+        "password": os.getenv("POSTGRES_PASSWORD"),
+    }
+
+
+def configure_connection(conn: psycopg.Connection) -> None:
+    """Prepare repeated statements server-side on every new pooled connection.
+
+    psycopg prepares a query once it has run DB_PREPARE_THRESHOLD times on a
+    connection (psycopg's default of 5), so repeated statements skip
+    re-parsing and planning for as long as the connection stays in the pool.
+    Hot lookups can pass ``prepare=True`` to prepare on first use, and
+    one-off DDL and maintenance statements pass ``prepare=False``.
+    """
+    conn.prepare_threshold = int(os.getenv("DB_PREPARE_THRESHOLD", 5))
+
+
+def create_pool(min_size: Optional[int] = None, max_size: Optional[int] = None, open: bool = True) -> ConnectionPool:
+    """Create a connection pool for the staging database.
+
+    Args:
+        min_size: Connections kept open and warm (DB_POOL_MIN_SIZE)
+        max_size: Upper bound on concurrent connections (DB_POOL_MAX_SIZE)
+        open: Start connecting in the background immediately
+
+    Returns:
+        A pool that health-checks each connection before handing it out
+    """
+    if min_size is None:
+        min_size = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+    if max_size is None:
+        max_size = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+    max_size = max(max_size, min_size, 1)
+    params = {name: value for name, value in get_connection_params().items() if value is not None}
+
+    return ConnectionPool(
+        conninfo=make_conninfo(**params),
+        min_size=min_size,
+        max_size=max_size,
+        timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        max_idle=float(os.getenv("DB_POOL_MAX_IDLE", 600)),
+        check=ConnectionPool.check_connection,
+        configure=configure_connection,
+        name="staging",
+        open=open,
+    )
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide shared pool, creating it on first use."""
+    global _shared_pool
+    if _shared_pool is None:
+        with _pool_lock:
+            if _shared_pool is None:
+                _shared_pool = create_pool()
+    return _shared_pool
+
+
+def get_connection() -> ContextManager[psycopg.Connection]:
+    """Borrow a connection from the shared pool.
+
+    Use as ``with get_connection() as conn:``. The block runs in one
+    transaction, committed on success and rolled back on error, and the
+    connection goes back to the pool afterwards instead of being closed.
+    """
+    return get_pool().connection()
+
+
+def close_pool() -> None:
+    """Close the shared pool and every connection it holds."""
+    global _shared_pool
+    with _pool_lock:
+        if _shared_pool is not None:
+            _shared_pool.close()
+            _shared_pool = None
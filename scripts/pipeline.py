@@ -0,0 +1,205 @@
+# scripts/pipeline.py
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak memory is then not reported
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+EXECUTORS = ("thread", "process")
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of the current process in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _run_stage(func: Callable, kwargs: Dict, cpu_clock: Callable[[], float]) -> Tuple[Any, Dict]:
+    """Run a stage function and measure its wall time, CPU time and peak memory."""
+    wall_start, cpu_start = time.perf_counter(), cpu_clock()
+    result = func(**kwargs)
+    stats = {
+        "wall_seconds": round(time.perf_counter() - wall_start, 3),
+        "cpu_seconds": round(cpu_clock() - cpu_start, 3),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    return result, stats
+
+
+def _run_in_thread(func: Callable, kwargs: Dict) -> Tuple[Any, Dict]:
+    return _run_stage(func, kwargs, time.thread_time)
+
+
+def _run_in_process(func: Callable, kwargs: Dict) -> Tuple[Any, Dict]:
+    return _run_stage(func, kwargs, time.process_time)
+
+
+class Stage:
+    """A pipeline step: a function plus the artifacts it consumes and produces.
+
+    A stage runs once every stage producing one of its ``inputs`` has
+    finished; those artifacts are passed to ``func`` as keyword arguments.
+    ``func`` returns its single output, or a dict keyed by output name when
+    it declares several. Thread stages suit I/O-bound work; process stages
+    sidestep the GIL for CPU-bound work but need a picklable module-level
+    ``func`` and picklable inputs and outputs.
+    """
+
+    def __init__(self, name: str, func: Callable[..., Any], inputs: Iterable[str] = (),
+                 outputs: Iterable[str] = (), executor: str = "thread"):
+        if executor not in EXECUTORS:
+            raise ValueError(f"Invalid executor. Must be one of: {list(EXECUTORS)}")
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.executor = executor
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r}, inputs={self.inputs}, outputs={self.outputs}, executor={self.executor!r})"
+
+
+class Pipeline:
+    """Run stages as a dependency graph, overlapping every stage whose inputs are ready.
+
+    Each stage records its wall time, CPU time and peak memory. CPU time is
+    that of the stage's thread (``thread_time``) or worker process
+    (``process_time``); threads started by a thread stage are not included.
+    Process stages run in a fresh process each, so their peak RSS is their
+    own; thread stages report the peak of the shared pipeline process.
+    """
+
+    def __init__(self, stages: List[Stage], max_workers: Optional[int] = None):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique.")
+        self.max_workers = max_workers or int(os.getenv("PIPELINE_MAX_WORKERS", 4))
+        self.producers = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"Output {output!r} is produced by both {self.producers[output]!r} and {stage.name!r}")
+                self.producers[output] = stage.name
+        self.dependencies = {}
+        for stage in stages:
+            missing = [name for name in stage.inputs if name not in self.producers]
+            if missing:
+                raise ValueError(f"Stage {stage.name!r} needs inputs no stage produces: {missing}")
+            self.dependencies[stage.name] = {self.producers[name] for name in stage.inputs}
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order, done = [], set()
+        while len(order) < len(self.stages):
+            ready = [name for name in self.stages if name not in done and self.dependencies[name] <= done]
+            if not ready:
+                raise ValueError(f"Stage dependencies form a cycle: {sorted(set(self.stages) - done)}")
+            order.extend(ready)
+            done.update(ready)
+        return order
+
+    def critical_path(self, stats: Dict[str, Dict]) -> Tuple[List[str], float]:
+        """Return the chain of stages with the longest total wall time, and that time."""
+        finish, previous = {}, {}
+        for name in self.order:
+            upstream = max(self.dependencies[name], key=lambda dep: finish[dep], default=None)
+            finish[name] = (finish[upstream] if upstream else 0.0) + stats.get(name, {}).get("wall_seconds", 0.0)
+            previous[name] = upstream
+        if not finish:
+            return [], 0.0
+        # On ties prefer the later stage, so the path runs through to the end of the graph
+        name = max(reversed(self.order), key=finish.get)
+        length, path = finish[name], []
+        while name:
+            path.append(name)
+            name = previous[name]
+        return path[::-1], round(length, 3)
+
+    def run(self) -> Dict:
+        """Run every stage, concurrently where the graph allows.
+
+        If a stage fails, no new stages start; running ones are awaited and
+        the first error is re-raised.
+
+        Returns:
+            Run report: artifacts, per-stage stats, wall time, sum of stage
+            times and the critical path
+        """
+        artifacts: Dict[str, Any] = {}
+        stats: Dict[str, Dict] = {}
+        done, running = set(), {}
+        error: Optional[BaseException] = None
+        start = time.perf_counter()
+
+        # One fresh process per process stage, so its peak memory is its own
+        process_pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                           max_tasks_per_child=1)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as thread_pool, process_pool:
+            while len(done) < len(self.stages):
+                if error is None:
+                    for name in self.order:
+                        if name in done or name in running.values() or not self.dependencies[name] <= done:
+                            continue
+                        stage = self.stages[name]
+                        kwargs = {input_name: artifacts[input_name] for input_name in stage.inputs}
+                        logger.info(f"Starting stage {name} ({stage.executor})")
+                        if stage.executor == "process":
+                            future = process_pool.submit(_run_in_process, stage.func, kwargs)
+                        else:
+                            future = thread_pool.submit(_run_in_thread, stage.func, kwargs)
+                        running[future] = name
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    done.add(name)
+                    try:
+                        result, stats[name] = future.result()
+                        self._store_outputs(self.stages[name], result, artifacts)
+                    except Exception as e:
+                        logger.error(f"Stage {name} failed: {e}")
+                        error = error or e
+                        continue
+                    logger.info(f"Finished stage {name} in {stats[name]['wall_seconds']:.2f}s "
+                                f"(cpu {stats[name]['cpu_seconds']:.2f}s, peak rss {stats[name]['peak_rss_mb']} MB)")
+
+        if error is not None:
+            raise error
+
+        wall_seconds = round(time.perf_counter() - start, 3)
+        path, path_seconds = self.critical_path(stats)
+        report = {
+            "artifacts": artifacts,
+            "stages": stats,
+            "wall_seconds": wall_seconds,
+            "stage_seconds": round(sum(s["wall_seconds"] for s in stats.values()), 3),
+            "critical_path": path,
+            "critical_path_seconds": path_seconds,
+        }
+        logger.info(f"Pipeline finished in {wall_seconds:.2f}s; stages took {report['stage_seconds']:.2f}s in total, "
+                    f"critical path {' -> '.join(path)} {path_seconds:.2f}s")
+        return report
+
+    @staticmethod
+    def _store_outputs(stage: Stage, result: Any, artifacts: Dict[str, Any]) -> None:
+        if len(stage.outputs) == 1:
+            artifacts[stage.outputs[0]] = result
+        elif stage.outputs:
+            if not isinstance(result, dict) or not set(stage.outputs) <= set(result):
+                raise ValueError(f"Stage {stage.name!r} must return a dict with keys {list(stage.outputs)}")
+            for output in stage.outputs:
+                artifacts[output] = result[output]
@@ -0,0 +1,308 @@
+# scripts/recommendation/engine.py
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import polars as pl
+from dotenv import load_dotenv
+
+from scripts.data_collection.parquet_sink import ParquetSink
+
+if TYPE_CHECKING:
+    from scripts.recommendation.similar_tracks import SimilarTracksTable
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Continuous Kaggle audio features compared by the engine; key, mode and
+# time_signature are categorical and would distort a cosine similarity
+FEATURES = (
+    "danceability",
+    "energy",
+    "valence",
+    "tempo",
+    "acousticness",
+    "instrumentalness",
+    "liveness",
+    "speechiness",
+    "loudness",
+)
+
+# Decimals of returned scores; the precomputed table stores float16 scores, good to about 3,
+# so scan scores are quantised the same way and both paths return identical values
+SCORE_DECIMALS = 3
+
+_shared_engine: Optional["RecommendationEngine"] = None
+_engine_lock = threading.Lock()
+
+
+def load_tracks(path: Optional[Path] = None) -> pl.DataFrame:
+    """Load the Kaggle tracks for the engine, one row per track ``id``.
+
+    Reads ``path`` (or RECOMMEND_TRACKS_PATH), a Parquet file or directory,
+    and otherwise the kaggle/tracks dataset of the Parquet lake, preferring
+    the latest ingestion of each track.
+    """
+    path = path or os.getenv("RECOMMEND_TRACKS_PATH")
+    columns = ["id", "name", "artists", "genre", *FEATURES]
+    if path:
+        path = Path(path)
+        lf = pl.scan_parquet(path / "**" / "*.parquet" if path.is_dir() else path)
+    else:
+        lf = ParquetSink().scan("kaggle", "tracks").sort("ingestion_date", descending=True, nulls_last=True)
+    return lf.select(columns).filter(pl.col("id").is_not_null() & pl.col("id").is_first_distinct()).collect()
+
+
+def normalize_features(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Standardise each feature column and scale every row to unit length.
+
+    Missing values become the column mean, so they do not pull tracks
+    together. After this, the dot product of two rows is their cosine
+    similarity.
+
+    Returns:
+        The normalised float32 matrix, and the column means and standard deviations used
+    """
+    values = np.asarray(values, dtype=np.float32)
+    mean = np.nanmean(values, axis=0)
+    std = np.nanstd(values, axis=0)
+    std[~(std > 0)] = 1.0
+    mean = np.nan_to_num(mean)
+    matrix = np.nan_to_num((values - mean) / std)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32), mean, std
+
+
+class RecommendationEngine:
+    """Audio-feature nearest-neighbour recommendations over an in-memory track catalog.
+
+    Tracks are rows of a normalised float32 feature matrix (230k tracks x 9
+    features is about 8 MB). A query is one matrix product against all
+    candidate rows plus ``argpartition`` for the top k, so its cost grows
+    with the catalog size and not with k. Queries are scored in blocks of
+    ``batch_size`` rows to bound the temporary score matrix. Genre and
+    artist filters become boolean masks that restrict the candidate rows
+    before scoring. The engine is read-only after construction, so one
+    instance can serve many threads.
+
+    With a precomputed ``similar`` table (scripts/recommendation/similar_tracks.py),
+    unfiltered single-seed queries are answered by a lookup in the table. A
+    table built from other features or from a different catalog (tracks
+    added, removed or reordered since) is ignored.
+    """
+
+    def __init__(self, tracks: pl.DataFrame, features: Sequence[str] = FEATURES, batch_size: Optional[int] = None,
+                 similar: Optional["SimilarTracksTable"] = None):
+        self.features = tuple(features)
+        self.batch_size = batch_size or int(os.getenv("RECOMMEND_BATCH_SIZE", 32))
+        self.ids: List[str] = tracks["id"].to_list()
+        if similar is not None and similar.features != self.features:
+            logger.warning(f"Ignoring similar tracks table built on other features: {list(similar.features)}")
+            similar = None
+        if similar is not None and (similar.manifest["tracks"] != len(self.ids) or similar.ids != self.ids):
+            logger.warning(f"Ignoring stale similar tracks table: built for {similar.manifest['tracks']} tracks, "
+                           f"catalog has {len(self.ids)}")
+            similar = None
+        self.similar = similar
+        self.names: List[Optional[str]] = tracks["name"].to_list()
+        self.artists: List[List[str]] = [a or [] for a in tracks["artists"].to_list()]
+        self.row_of: Dict[str, int] = {track_id: row for row, track_id in enumerate(self.ids)}
+        if len(self.row_of) != len(self.ids):
+            raise ValueError("Track ids must be unique.")
+
+        values = tracks.select(pl.col(name).cast(pl.Float32) for name in self.features).to_numpy()
+        self.matrix, self.mean, self.std = normalize_features(values)
+
+        self.genres: List[Optional[str]] = tracks["genre"].to_list()
+        names, codes = np.unique(tracks["genre"].fill_null("").to_numpy().astype(str), return_inverse=True)
+        self.genre_codes = codes.astype(np.int32)
+        self.genre_code_of = {name: code for code, name in enumerate(names.tolist())}
+
+        # Artist -> rows featuring that artist (a track can list several)
+        by_artist = (
+            tracks.select(pl.int_range(pl.len(), dtype=pl.Int32).alias("row"), pl.col("artists"))
+            .explode("artists")
+            .drop_nulls("artists")
+            .group_by("artists")
+            .agg("row")
+        )
+        self.rows_by_artist: Dict[str, np.ndarray] = {
+            artist: np.asarray(rows, dtype=np.int32) for artist, rows in by_artist.iter_rows()
+        }
+        logger.info(f"Recommendation engine ready: {len(self.ids)} tracks x {len(self.features)} features "
+                    f"({self.matrix.nbytes / 1e6:.1f} MB)")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def mask(self, genres: Optional[Iterable[str]] = None, artists: Optional[Iterable[str]] = None) -> Optional[np.ndarray]:
+        """Boolean mask of the tracks matching every given filter, or None when there is no filter.
+
+        Args:
+            genres: Keep tracks whose genre is one of these
+            artists: Keep tracks featuring one of these artists
+        """
+        if genres is None and artists is None:
+            return None
+        mask = np.ones(len(self.ids), dtype=bool)
+        if genres is not None:
+            codes = [self.genre_code_of[g] for g in genres if g in self.genre_code_of]
+            mask &= np.isin(self.genre_codes, codes)
+        if artists is not None:
+            artist_mask = np.zeros(len(self.ids), dtype=bool)
+            for artist in artists:
+                artist_mask[self.rows_by_artist.get(artist, [])] = True
+            mask &= artist_mask
+        return mask
+
+    def top_k(self, queries: np.ndarray, k: int, mask: Optional[np.ndarray] = None,
+              exclude: Optional[Sequence[Iterable[int]]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the k most similar tracks to each query vector.
+
+        Args:
+            queries: (q, features) matrix of unit-length normalised vectors
+            k: Neighbours per query
+            mask: Boolean mask of candidate tracks (default all)
+            exclude: Per query, rows that must not be returned (e.g. the seed tracks)
+
+        Returns:
+            (q, k) arrays of row indices and cosine scores, best first. Rows
+            are -1 (score -inf) where fewer than k candidates are left.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        candidates = None if mask is None else np.flatnonzero(mask)
+        matrix = self.matrix if candidates is None else self.matrix[candidates]
+        count = matrix.shape[0]
+        k = max(int(k), 0)
+        rows = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        take = min(k, count)
+        if take == 0:
+            return rows, scores
+
+        for start in range(0, len(queries), self.batch_size):
+            block = queries[start:start + self.batch_size] @ matrix.T
+            if exclude is not None:
+                for offset, excluded in enumerate(exclude[start:start + self.batch_size]):
+                    positions = np.fromiter(excluded, dtype=np.int64)
+                    if candidates is not None:
+                        # Map rows to positions in the candidate list, dropping rows outside it
+                        found = np.searchsorted(candidates, positions)
+                        inside = found < count
+                        found, positions = found[inside], positions[inside]
+                        positions = found[candidates[found] == positions]
+                    block[offset, positions] = -np.inf
+            # argpartition finds the top k in linear time; only those k are then sorted
+            top = np.argpartition(block, count - take, axis=1)[:, count - take:]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            top_rows = top if candidates is None else candidates[top]
+            top_rows[np.isneginf(top_scores)] = -1
+            rows[start:start + len(block), :take] = top_rows
+            scores[start:start + len(block), :take] = top_scores
+        return rows, scores
+
+    def _rows(self, track_ids: Iterable[str]) -> List[int]:
+        unknown = [track_id for track_id in track_ids if track_id not in self.row_of]
+        if unknown:
+            raise ValueError(f"Unknown track ids: {unknown[:10]}")
+        return [self.row_of[track_id] for track_id in track_ids]
+
+    def _results(self, rows: np.ndarray, scores: np.ndarray) -> List[Dict]:
+        return [
+            {"id": self.ids[row], "name": self.names[row], "artists": self.artists[row],
+             "genre": self.genres[row], "score": round(float(np.float16(score)), SCORE_DECIMALS)}
+            for row, score in zip(rows.tolist(), scores.tolist())
+            if row >= 0
+        ]
+
+    def recommend_batch(self, track_ids: Sequence[str], k: int = 10, genres: Optional[Iterable[str]] = None,
+                        artists: Optional[Iterable[str]] = None) -> List[List[Dict]]:
+        """Recommend k tracks similar to each seed track, scoring all seeds together.
+
+        Args:
+            track_ids: Seed track ids (never recommended back for their own query)
+            k: Recommendations per seed
+            genres: Only recommend tracks of these genres
+            artists: Only recommend tracks featuring these artists
+
+        Returns:
+            One list per seed of result dicts (id, name, artists, genre, score), best first
+        """
+        rows = self._rows(track_ids)
+        top_rows, top_scores = self.top_k(self.matrix[rows], k, self.mask(genres, artists), [[row] for row in rows])
+        return [self._results(r, s) for r, s in zip(top_rows, top_scores)]
+
+    def recommend(self, track_id: str, k: int = 10, genres: Optional[Iterable[str]] = None,
+                  artists: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Recommend k tracks similar to a single seed track (see recommend_batch)."""
+        if genres is None and artists is None:
+            precomputed = self._precomputed(track_id, k)
+            if precomputed is not None:
+                return precomputed
+        return self.recommend_batch([track_id], k, genres, artists)[0]
+
+    def _precomputed(self, track_id: str, k: int) -> Optional[List[Dict]]:
+        """Neighbours from the similar tracks table, or None if it cannot answer this query."""
+        if self.similar is None or k > self.similar.n:
+            return None
+        # The table matches the catalog row for row (checked in __init__)
+        row = self.row_of.get(track_id)
+        if row is None:
+            return None
+        return self._results(np.asarray(self.similar.neighbours[row, :k]),
+                             np.asarray(self.similar.scores[row, :k], dtype=np.float32))
+
+    def recommend_for_profile(self, track_ids: Sequence[str], k: int = 10, genres: Optional[Iterable[str]] = None,
+                              artists: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Recommend k tracks close to the average of several tracks, e.g. a user's recent listens.
+
+        None of the seed tracks is recommended back.
+        """
+        rows = self._rows(track_ids)
+        profile = self.matrix[rows].mean(axis=0)
+        profile /= np.linalg.norm(profile) or 1.0
+        top_rows, top_scores = self.top_k(profile, k, self.mask(genres, artists), [rows])
+        return self._results(top_rows[0], top_scores[0])
+
+
+def get_recommendation_engine() -> RecommendationEngine:
+    """Return the process-wide engine, loading the track catalog (and similar tracks table, if built) on first use."""
+    from scripts.recommendation.similar_tracks import MANIFEST_FILE, SimilarTracksTable
+
+    global _shared_engine
+    if _shared_engine is None:
+        with _engine_lock:
+            if _shared_engine is None:
+                table_dir = Path(os.getenv("SIMILAR_TRACKS_DIR", "data/recommendation/similar_tracks"))
+                similar = SimilarTracksTable(table_dir) if (table_dir / MANIFEST_FILE).exists() else None
+                _shared_engine = RecommendationEngine(load_tracks(), similar=similar)
+    return _shared_engine
+
+
+def main():
+    """Print recommendations for RECOMMEND_SEED_TRACK (default: the first track of the catalog)."""
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        engine = get_recommendation_engine()
+        seed = os.getenv("RECOMMEND_SEED_TRACK") or engine.ids[0]
+        row = engine.row_of[seed]
+        print(f"Tracks like {engine.names[row]} by {', '.join(engine.artists[row])} ({engine.genres[row]}):")
+        for i, track in enumerate(engine.recommend(seed, k=int(os.getenv("RECOMMEND_K", 10))), 1):
+            print(f"  {i}. {track['name']} by {', '.join(track['artists'])} [{track['genre']}] score {track['score']}")
+
+    except Exception as e:
+        print(f"Recommendation failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# scripts/recommendation/similar_tracks.py
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from scripts.recommendation.engine import SCORE_DECIMALS, RecommendationEngine, load_tracks
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _top_n(scores: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column positions and values of the n largest scores per row, best first."""
+    n = min(n, scores.shape[1])
+    top = np.argpartition(scores, scores.shape[1] - n, axis=1)[:, scores.shape[1] - n:]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def _similar_shard(matrix_path: str, start: int, stop: int, n: int, row_block: int,
+                   col_block: int) -> Tuple[int, np.ndarray, np.ndarray]:
+    """Top-n neighbours of rows ``start:stop``, scored block by block against the whole matrix.
+
+    Each (row_block x col_block) tile keeps only its own top n per row; the
+    survivors of all tiles are merged at the end. Peak memory is one tile
+    plus n candidates per tile, whatever the catalog size.
+    """
+    # Memory-mapped, so every worker shares the page cache instead of a private copy
+    matrix = np.load(matrix_path, mmap_mode="r")
+    total = matrix.shape[0]
+    neighbours = np.empty((stop - start, n), dtype=np.int32)
+    scores = np.empty((stop - start, n), dtype=np.float16)
+
+    for row_start in range(start, stop, row_block):
+        rows = np.asarray(matrix[row_start:min(row_start + row_block, stop)])
+        candidate_rows, candidate_scores = [], []
+        for col_start in range(0, total, col_block):
+            tile = rows @ np.asarray(matrix[col_start:col_start + col_block]).T
+            # A track is not its own neighbour
+            own = np.arange(row_start, row_start + len(rows))
+            inside = (own >= col_start) & (own < col_start + tile.shape[1])
+            tile[np.flatnonzero(inside), own[inside] - col_start] = -np.inf
+            top, top_scores = _top_n(tile, n)
+            candidate_rows.append(top + col_start)
+            candidate_scores.append(top_scores)
+        top, top_scores = _top_n(np.hstack(candidate_scores), n)
+        offset = row_start - start
+        neighbours[offset:offset + len(rows)] = np.take_along_axis(np.hstack(candidate_rows), top, axis=1)
+        scores[offset:offset + len(rows)] = top_scores
+    return start, neighbours, scores
+
+
+def build_similar_tracks(engine: RecommendationEngine, n: Optional[int] = None, output_dir: Optional[Path] = None,
+                         workers: Optional[int] = None, row_block: Optional[int] = None,
+                         col_block: Optional[int] = None) -> Dict:
+    """Precompute the top-n most similar tracks of every track in the engine's catalog.
+
+    The rows are split into shards scored on a pool of worker processes,
+    which read the normalised feature matrix from a memory-mapped .npy
+    file. The table is written to ``output_dir`` as ``neighbours.npy``
+    (int32 rows), ``scores.npy`` (float16 cosine scores), ``ids.npy`` and
+    a manifest. It is built in a temporary directory that replaces the
+    previous table when complete.
+
+    Args:
+        engine: Engine holding the catalog and its feature matrix
+        n: Neighbours per track (SIMILAR_TRACKS_N, default 50)
+        output_dir: Table directory (SIMILAR_TRACKS_DIR)
+        workers: Worker processes (SIMILAR_TRACKS_WORKERS, default the CPU count)
+        row_block: Rows scored per tile (SIMILAR_TRACKS_ROW_BLOCK)
+        col_block: Columns scored per tile (SIMILAR_TRACKS_COL_BLOCK)
+
+    Returns:
+        Build statistics: path, tracks, n, workers, seconds and tracks/s
+    """
+    n = n or int(os.getenv("SIMILAR_TRACKS_N", 50))
+    output_dir = Path(output_dir or os.getenv("SIMILAR_TRACKS_DIR", "data/recommendation/similar_tracks"))
+    workers = workers or int(os.getenv("SIMILAR_TRACKS_WORKERS") or os.cpu_count() or 1)
+    row_block = row_block or int(os.getenv("SIMILAR_TRACKS_ROW_BLOCK", 256))
+    col_block = col_block or int(os.getenv("SIMILAR_TRACKS_COL_BLOCK", 32_768))
+    total = len(engine)
+    n = min(n, total - 1)
+    if n < 1:
+        raise ValueError("At least two tracks are needed to build a similar-tracks table.")
+
+    start_time = time.perf_counter()
+    tmp_dir = output_dir.with_name(f".{output_dir.name}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    try:
+        matrix_path = tmp_dir / "matrix.npy"
+        np.save(matrix_path, engine.matrix)
+
+        neighbours = np.empty((total, n), dtype=np.int32)
+        scores = np.empty((total, n), dtype=np.float16)
+        # Several shards per worker, so a slow shard doesn't leave the others idle
+        shard_size = max(row_block, -(-total // (workers * 4)))
+        shards = [(start, min(start + shard_size, total)) for start in range(0, total, shard_size)]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(_similar_shard, str(matrix_path), start, stop, n, row_block, col_block)
+                       for start, stop in shards]
+            for done, future in enumerate(futures, 1):
+                start, shard_neighbours, shard_scores = future.result()
+                neighbours[start:start + len(shard_neighbours)] = shard_neighbours
+                scores[start:start + len(shard_scores)] = shard_scores
+                logger.info(f"Similar tracks: shard {done}/{len(shards)} done")
+        matrix_path.unlink()
+
+        np.save(tmp_dir / "neighbours.npy", neighbours)
+        np.save(tmp_dir / "scores.npy", scores)
+        np.save(tmp_dir / "ids.npy", np.array(engine.ids, dtype=str))
+        manifest = {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "tracks": total,
+            "n": n,
+            "features": list(engine.features),
+        }
+        with open(tmp_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        # Swap the finished table in; the old one is only removed once the new one is in place
+        old_dir = output_dir.with_name(f".{output_dir.name}.old")
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if output_dir.exists():
+            os.replace(output_dir, old_dir)
+        os.replace(tmp_dir, output_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    seconds = time.perf_counter() - start_time
+    logger.info(f"Built top-{n} similar tracks for {total} tracks in {seconds:.1f}s with {workers} workers")
+    return {"path": str(output_dir), "tracks": total, "n": n, "workers": workers, "seconds": round(seconds, 3),
+            "tracks_per_sec": round(total / seconds, 1) if seconds else 0.0}
+
+
+class SimilarTracksTable:
+    """Read-only access to a precomputed similar-tracks table.
+
+    The neighbour and score arrays are memory-mapped, so opening the table
+    is cheap and a lookup is a row read, whatever the catalog size.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or os.getenv("SIMILAR_TRACKS_DIR", "data/recommendation/similar_tracks"))
+        with open(self.path / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.n = self.manifest["n"]
+        self.features = tuple(self.manifest["features"])
+        self.neighbours = np.load(self.path / "neighbours.npy", mmap_mode="r")
+        self.scores = np.load(self.path / "scores.npy", mmap_mode="r")
+        self.ids: List[str] = np.load(self.path / "ids.npy").tolist()
+        self.row_of: Dict[str, int] = {track_id: row for row, track_id in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, track_id: str) -> bool:
+        return track_id in self.row_of
+
+    def similar(self, track_id: str, k: Optional[int] = None) -> List[Dict]:
+        """Return the k (default n) most similar tracks as dicts of id and score, best first."""
+        if track_id not in self.row_of:
+            raise ValueError(f"Unknown track id: {track_id}")
+        row = self.row_of[track_id]
+        k = self.n if k is None else min(k, self.n)
+        return [
+            {"id": self.ids[neighbour], "score": round(float(score), SCORE_DECIMALS)}
+            for neighbour, score in zip(self.neighbours[row, :k].tolist(), self.scores[row, :k].tolist())
+        ]
+
+
+def main():
+    """Precompute the similar-tracks table for the Kaggle catalog."""
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        stats = build_similar_tracks(RecommendationEngine(load_tracks()))
+        print(f"Similar tracks table saved to: {stats['path']} ({stats['tracks']} tracks x {stats['n']} neighbours, "
+              f"{stats['seconds']:.1f}s, {stats['tracks_per_sec']:,.0f} tracks/s)")
+
+    except Exception as e:
+        print(f"Similar tracks build failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# tests/test_api_data_collector.py
+import json
+
+import pytest
+
+from scripts.data_collection.api_collector import APIDataCollector
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+        self.status_code = 200
+        self.content = json.dumps(payload).encode()
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+class FakePagedSession:
+    """Serve ``total`` records with _start/_limit offset pagination."""
+
+    def __init__(self, total):
+        self.total = total
+        self.starts = []
+
+    def get(self, url, headers=None, params=None):
+        self.starts.append(params["_start"])
+        stop = min(params["_start"] + params["_limit"], self.total)
+        return FakeResponse([{"id": i} for i in range(params["_start"], stop)])
+
+@pytest.fixture
+def make_collector(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("API_URL", "https://api.example.com/users")
+    monkeypatch.setenv("BATCH_SIZE", "10")
+
+    def factory(session, max_records):
+        monkeypatch.setenv("MAX_RECORDS", str(max_records))
+        return APIDataCollector("test", session=session)
+
+    return factory
+
+@pytest.mark.parametrize("prefetch", [0, 3])
+def test_iter_data_streams_records_in_order(make_collector, prefetch):
+    """Test that streamed records keep their order with and without prefetching."""
+    collector = make_collector(FakePagedSession(total=35), max_records=100)
+    records = list(collector.iter_data("", prefetch=prefetch))
+    assert [record["id"] for record in records] == list(range(35))
+
+def test_iter_data_stops_at_max_records(make_collector):
+    """Test that prefetching never requests pages beyond max_records."""
+    session = FakePagedSession(total=1000)
+    collector = make_collector(session, max_records=25)
+    assert len(list(collector.iter_data("", prefetch=4))) == 25
+    assert sorted(session.starts) == [0, 10, 20]
+
+def test_save_data_consumes_stream(make_collector):
+    """Test that save_data writes a record stream as a valid JSON array."""
+    collector = make_collector(FakePagedSession(total=15), max_records=100)
+    file_path = collector.save_data(collector.iter_data("", prefetch=2), "users")
+    with open(file_path, encoding="utf-8") as f:
+        assert json.load(f) == [{"id": i} for i in range(15)]
@@ -0,0 +1,89 @@
+# tests/test_bulk_loader.py
+import csv
+import json
+
+from scripts.data_collection.writers import save_records
+from scripts.database.bulk_loader import BulkLoader, describe_file, find_loadable_files, iter_file_records, natural_id
+
+class FakeCopy:
+    def __init__(self, sink):
+        self.sink = sink
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write(self, payload):
+        self.sink.append(payload)
+
+class FakeConnection:
+    """Record COPY payloads and transaction boundaries instead of talking to PostgreSQL."""
+
+    def __init__(self):
+        self.payloads = []
+        self.statements = []
+        self.committed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.committed = exc_type is None
+        return False
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, prepare=None):
+        self.statements.append(sql)
+        self.rowcount = 2
+
+    def copy(self, sql):
+        assert sql.startswith("COPY load_batch")
+        return FakeCopy(self.payloads)
+
+def test_iter_file_rows_reads_every_supported_format(tmp_path):
+    """Test that JSON, compressed NDJSON and CSV files all yield their records in order."""
+    records = [{"name": "Song", "rank": "1"}, {"name": "Tab\tand\\slash", "rank": "2"}]
+    json_file = save_records(records, tmp_path, "tracks", fmt="json", compression="none")
+    ndjson_file = save_records(records, tmp_path, "tracks", fmt="ndjson", compression="gzip")
+    csv_file = tmp_path / "tracks.csv"
+    with open(csv_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["name", "rank"])
+        writer.writeheader()
+        writer.writerows(records)
+
+    for path in (json_file, ndjson_file, csv_file):
+        assert list(iter_file_records(path)) == records
+    assert len(find_loadable_files(tmp_path)) == 3
+
+def test_loader_batches_rows_and_upserts(tmp_path):
+    """Test that rows are COPYed in escaped batches and upserted within one transaction."""
+    records = [{"name": f"Song {i}", "artist": {"name": "Band"}, "note": "tab\there"} for i in range(5)]
+    path = save_records(records, tmp_path, "lastfm_top_tracks", fmt="ndjson", compression="none")
+    connection = FakeConnection()
+    stats = BulkLoader(lambda: connection, batch_size=2).load_file(path)
+
+    assert stats["rows"] == 5
+    assert stats["changed"] == 2
+    assert len(connection.payloads) == 3
+    assert connection.committed
+    assert "ensure_records_partition" in connection.statements[0]
+    assert "ON CONFLICT (source, entity_type, natural_id)" in connection.statements[-1]
+    lines = "".join(connection.payloads).splitlines()
+    source, entity_type, key, content, file_name = lines[0].split("\t")
+    assert (source, entity_type, key, file_name) == ("lastfm", "top_tracks", "Band:Song 0", path.name)
+    assert json.loads(content.replace("\\\\", "\\")) == records[0]
+
+def test_files_and_records_are_keyed_for_staging():
+    """Test that file names map to source/entity type and records to their natural ID."""
+    assert describe_file("lastfm_top_tracks_1700000000.json.gz") == ("lastfm", "top_tracks")
+    assert describe_file("fake_users.json") == ("faker", "users")
+    assert describe_file("users.csv") == ("file", "users")
+    assert natural_id({"mbid": "", "id": "4iV5W9uYEdYUVa79Axb7Rh"}) == "4iV5W9uYEdYUVa79Axb7Rh"
+    assert natural_id({"name": "Karma Police", "artist": {"#text": "Radiohead"}}) == "Radiohead:Karma Police"
+    assert natural_id({"name": "Creep", "mbid": "abc", "artist": "Radiohead"}) == "abc"
+    assert natural_id({"name": "Radiohead", "mbid": "a74b1b7f"}) == "Radiohead"
+    assert natural_id({"value": 1}) is None
@@ -0,0 +1,67 @@
+# tests/test_chart_poller.py
+import json
+
+from scripts.data_collection.chart_poller import ChartPoller, diff_chart
+
+class FakeChartCollector:
+    """Serve a scripted sequence of chart responses, one per poll."""
+
+    def __init__(self, track_charts, artist_charts):
+        self.track_charts = list(track_charts)
+        self.artist_charts = list(artist_charts)
+
+    def get_top_tracks(self, limit=50):
+        chart = self.track_charts.pop(0)
+        if isinstance(chart, Exception):
+            raise chart
+        return chart[:limit]
+
+    def get_top_artists(self, limit=50):
+        return self.artist_charts.pop(0)[:limit]
+
+def track(name, playcount, mbid=""):
+    return {"name": name, "mbid": mbid, "playcount": str(playcount), "listeners": "10", "artist": {"name": "Band"}}
+
+def test_diff_chart_reports_only_changes():
+    """Test rank moves, playcount updates, new and dropped entries, and that unchanged entries are skipped."""
+    previous = {"a": {"name": "A", "rank": 1, "playcount": "100"}, "b": {"name": "B", "rank": 2, "playcount": "50"},
+                "c": {"name": "C", "rank": 3, "playcount": "10"}, "d": {"name": "D", "rank": 4, "playcount": "5"}}
+    current = {"b": {"name": "B", "rank": 1, "playcount": "150"}, "a": {"name": "A", "rank": 2, "playcount": "120"},
+               "c": {"name": "C", "rank": 3, "playcount": "12"}, "e": {"name": "E", "rank": 4, "playcount": "1"}}
+    changes = {c["key"]: c for c in diff_chart(previous, current, min_playcount_delta=5)}
+    assert set(changes) == {"a", "b", "d", "e"}
+    assert changes["b"]["change"] == "moved" and changes["b"]["rank_delta"] == 1 and changes["b"]["playcount_delta"] == 100
+    assert changes["a"]["rank_delta"] == -1
+    assert changes["e"]["change"] == "new" and changes["d"]["change"] == "dropped" and changes["d"]["previous_rank"] == 4
+    assert diff_chart(current, current) == []
+
+def test_poller_emits_deltas_and_survives_failed_polls(tmp_path):
+    """Test that ticks append only changed entries and a failed chart keeps its previous state."""
+    charts = [
+        [track("One", 100, "m1"), track("Two", 90)],
+        RuntimeError("503"),
+        [track("Two", 120), track("One", 100, "m1")],
+        [track("Two", 120), track("One", 100, "m1")],
+    ]
+    artists = [[{"name": "Band", "playcount": "500"}]] * 4
+    received = []
+    poller = ChartPoller(collector=FakeChartCollector(charts, artists), interval=0.01, jitter=0.5,
+                         output_dir=tmp_path, on_events=received.append, seed=1)
+    poller.run(max_ticks=4)
+
+    assert poller.ticks == 4 and [len(batch) for batch in received] == [3, 2]
+    moved = {e["name"]: e for e in received[1]}
+    assert moved["Two"]["rank_delta"] == 1 and moved["Two"]["playcount_delta"] == 30
+    assert moved["One"]["key"] == "m1" and moved["One"]["rank_delta"] == -1
+    [events_file] = tmp_path.glob("lastfm_chart_events_*.ndjson")
+    lines = [json.loads(line) for line in events_file.read_text().splitlines()]
+    assert len(lines) == 5 and {e["chart"] for e in lines} == {"tracks", "artists"}
+
+def test_stop_ends_the_loop_during_the_wait(tmp_path):
+    """Test that stop() interrupts the wait between ticks instead of sleeping out the interval."""
+    artists = [[]] * 2
+    poller = ChartPoller(collector=FakeChartCollector([[], []], artists), interval=3600, jitter=0,
+                         output_dir=tmp_path, on_events=lambda events: None)
+    poller.collector.get_top_artists = lambda limit=50: poller.stop() or []
+    poller.run()
+    assert poller.ticks == 1
@@ -0,0 +1,75 @@
+# tests/test_collector_metrics.py
+import json
+from unittest.mock import patch
+
+import pytest
+
+from scripts.data_collection.collector_metrics import CollectorMetrics, endpoint_name
+from scripts.data_collection.http_session import create_session
+from scripts.data_collection.lastfm_api_collector import LastFMAPICollector
+from scripts.data_collection.mock_api_server import HISTORY_START, MockAPIServer, MockCatalog, create_app
+from scripts.data_collection.response_cache import ResponseCache
+from scripts.data_collection.scrobble_generator import ScrobbleGenerator
+from scripts.data_collection.watermark_store import WatermarkStore
+
+def test_histogram_counters_and_exports(tmp_path):
+    """Test latency buckets, counters, subscriber events and both export formats."""
+    metrics = CollectorMetrics(buckets=(0.1, 1.0))
+    events = []
+    metrics.subscribe(events.append)
+    metrics.subscribe(lambda event: 1 / 0)  # A failing subscriber must not break collection
+    for seconds in (0.05, 0.05, 0.5, 3.0):
+        metrics.observe_request("lastfm", "chart.gettoptracks", seconds, 200, 100)
+    metrics.record_retry("lastfm", "chart.gettoptracks", "HTTP 503", backoff=2)
+    metrics.record_rate_limit_wait("lastfm", 0.25)
+    metrics.record_rate_limit_wait("lastfm", 0.0)
+
+    snapshot = metrics.snapshot()
+    latency = snapshot["latency"][0]
+    assert latency["buckets"] == {"0.1": 2, "1.0": 3, "+Inf": 4}
+    assert latency["p50_seconds"] == 0.1 and latency["p95_seconds"] == 3.0
+    counters = {(c["name"], c["labels"].get("status")): c["value"] for c in snapshot["counters"]}
+    assert counters[("requests", "200")] == 4 and counters[("response_bytes", None)] == 400
+    assert counters[("retries", None)] == 1 and counters[("backoff_seconds", None)] == 2
+    assert counters[("rate_limit_wait_seconds", None)] == 0.25
+    assert [e["type"] for e in events] == ["request"] * 4 + ["retry", "rate_limit_wait"]
+
+    assert json.loads(metrics.export(tmp_path / "metrics.json").read_text())["latency"][0]["count"] == 4
+    text = metrics.export(tmp_path / "metrics.prom", fmt="prometheus").read_text()
+    assert 'collector_request_duration_seconds_bucket{api="lastfm",endpoint="chart.gettoptracks",le="+Inf"} 4' in text
+    assert "# TYPE collector_retries_total counter" in text
+    with pytest.raises(ValueError):
+        metrics.export(tmp_path / "metrics.txt", fmt="csv")
+
+def test_endpoint_name_collapses_spotify_ids():
+    """Test that per-object Spotify paths map to one endpoint label."""
+    assert endpoint_name("/artists/1Xyo4u8uXC1ZmMpatF05PJ/top-tracks") == "/artists/{id}/top-tracks"
+    assert endpoint_name("/audio-features?ids=a,b") == "/audio-features"
+
+def test_lastfm_collector_reports_retries_errors_and_cache_hits(tmp_path, monkeypatch):
+    """Test that the Last.fm collector records every attempt, retry, final error and cache lookup."""
+    catalog = MockCatalog(ScrobbleGenerator(users=5, artists=20, seed=0, start=HISTORY_START), 100)
+    artist = catalog.artists[0]["name"]
+    monkeypatch.setenv("LASTFM_API_KEY", "test-key")
+    metrics = CollectorMetrics()
+
+    with MockAPIServer(create_app(catalog, error_rate=1.0)) as server, patch("time.sleep"):
+        monkeypatch.setenv("LASTFM_API_URL", server.env()["LASTFM_API_URL"])
+        collector = LastFMAPICollector(session=create_session(), cache=ResponseCache(tmp_path / "cache.sqlite3"),
+                                       watermarks=WatermarkStore(tmp_path / "watermarks.json"), metrics=metrics)
+        with pytest.raises(Exception):
+            collector.get_top_artists(limit=5)
+
+    with MockAPIServer(create_app(catalog)) as server:
+        collector.base_url = server.env()["LASTFM_API_URL"]
+        collector.get_artist_info(artist)
+        collector.get_artist_info(artist)
+
+    counters = {(c["name"], c["labels"].get("endpoint"), c["labels"].get("status")): c["value"]
+                for c in metrics.snapshot()["counters"]}
+    assert counters[("requests", "chart.gettopartists", "503")] == collector.max_retries
+    assert counters[("retries", "chart.gettopartists", None)] == collector.max_retries - 1
+    assert counters[("errors", "chart.gettopartists", None)] == 1
+    assert counters[("requests", "artist.getinfo", "200")] == 1
+    assert counters[("cache_misses", "artist.getinfo", None)] == 1
+    assert counters[("cache_hits", "artist.getinfo", None)] == 1
@@ -3,6 +3,19 @@ import json
 import csv
 from pathlib import Path
 
+import pytest
+
+from scripts.data_collection.fake_data_generator import FakeDataGenerator
+
+@pytest.fixture(autouse=True)
+def generated_data(tmp_path, monkeypatch):
+    """Generate a small set of fake data files under a temporary data/external."""
+    monkeypatch.chdir(tmp_path)
+    generator = FakeDataGenerator()
+    generator.save_data_as_json(generator.iter_user_data(10), "fake_users")
+    generator.save_data_as_csv(generator.iter_transaction_data(10), "fake_transactions")
+    return generator.data_dir
+
 def test_json_files_exist():
     """Test that JSON files are created."""
     data_dir = Path("data/external")
@@ -0,0 +1,35 @@
+# tests/test_database_connection.py
+from psycopg_pool import ConnectionPool
+
+from scripts.database.connection import configure_connection, create_pool
+
+class FakeConnection:
+    prepare_threshold = None
+
+def test_pool_is_sized_and_health_checked(monkeypatch):
+    """Test that the pool honours the size settings and checks connections before use."""
+    monkeypatch.setenv("DB_POOL_MIN_SIZE", "2")
+    monkeypatch.setenv("DB_POOL_MAX_SIZE", "1")
+    pool = create_pool(open=False)
+    assert pool.min_size == 2
+    assert pool.max_size == 2
+    assert pool._check == ConnectionPool.check_connection
+    assert pool._configure is configure_connection
+    assert "dbname=staging_db" in pool.conninfo
+
+def test_explicit_pool_sizes_override_the_environment(monkeypatch):
+    """Test that an explicit min_size of 0 is kept rather than replaced by the default."""
+    monkeypatch.setenv("DB_POOL_MIN_SIZE", "3")
+    pool = create_pool(min_size=0, max_size=4, open=False)
+    assert pool.min_size == 0
+    assert pool.max_size == 4
+
+def test_new_connections_prepare_statements(monkeypatch):
+    """Test that pooled connections are configured to prepare statements server-side."""
+    conn = FakeConnection()
+    monkeypatch.delenv("DB_PREPARE_THRESHOLD", raising=False)
+    configure_connection(conn)
+    assert conn.prepare_threshold == 5
+    monkeypatch.setenv("DB_PREPARE_THRESHOLD", "0")
+    configure_connection(conn)
+    assert conn.prepare_threshold == 0
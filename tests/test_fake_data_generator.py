@@ -0,0 +1,77 @@
+# tests/test_fake_data_generator.py
+import time
+import uuid
+from datetime import datetime
+
+import polars as pl
+import pytest
+
+from scripts.data_collection.fake_data_generator import FakeDataGenerator, generate_bulk
+from scripts.data_collection.parquet_sink import ParquetSink
+
+@pytest.mark.parametrize("kind, method", [
+    ("users", "generate_user_data"),
+    ("transactions", "generate_transaction_data"),
+    ("data_quality", "generate_data_quality"),
+])
+def test_bulk_rows_match_record_schema(kind, method):
+    """Test that bulk shards have the same columns as the per-record generators."""
+    record = getattr(FakeDataGenerator(), method)(1)[0]
+    shard = next(generate_bulk(kind, 500, seed=1, workers=1))
+    assert shard.columns == list(record)
+    assert shard.height == 500
+    id_column = shard.columns[0]
+    assert all(uuid.UUID(value).version == 4 for value in shard[id_column].head(20))
+
+def test_bulk_mode_is_deterministic_across_workers():
+    """Test that the same seed and now give the same rows, timestamps included, inline or in processes."""
+    now = datetime(2025, 6, 30, 12, 0)
+    inline = pl.concat(generate_bulk("transactions", 2_500, seed=42, shard_size=1_000, workers=1, now=now))
+    sharded = pl.concat(generate_bulk("transactions", 2_500, seed=42, shard_size=1_000, workers=2, now=now))
+    assert inline.height == 2_500
+    assert inline.equals(sharded)
+    assert inline["transaction_id"].n_unique() == 2_500
+
+def test_bulk_timestamps_ignore_the_local_time_zone(monkeypatch):
+    """Test that bulk timestamps stay inside [start of year, now) on a host that is not on UTC."""
+    monkeypatch.setenv("TZ", "Asia/Ho_Chi_Minh")
+    time.tzset()
+    try:
+        now = datetime(2026, 3, 1, 12, 0)
+        shard = next(generate_bulk("transactions", 5_000, seed=7, workers=1, now=now))
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    timestamps = shard["timestamp"].str.to_datetime("%Y-%m-%dT%H:%M:%S%.6f")
+    assert timestamps.min() >= datetime(2026, 1, 1)
+    assert timestamps.max() < now
+    assert timestamps.max() > datetime(2026, 3, 1)
+
+def test_bulk_mode_rejects_unknown_kind():
+    """Test that an unknown bulk kind raises a ValueError."""
+    with pytest.raises(ValueError, match="Must be one of"):
+        next(generate_bulk("songs", 10))
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson", "parquet"])
+def test_chunked_output_round_trips(tmp_path, monkeypatch, fmt):
+    """Test that chunked writers produce one complete dataset from many small chunks."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("FAKE_CHUNK_SIZE", "7")
+    generator = FakeDataGenerator()
+    generator.parquet_sink = ParquetSink(root=tmp_path / "lake")
+    path = generator.save_chunked(generator.iter_chunks("data_quality", 50, bulk=False), "readings", fmt)
+
+    if fmt == "csv":
+        df = pl.read_csv(path)
+    elif fmt == "ndjson":
+        df = pl.read_ndjson(path)
+    else:
+        df = pl.read_parquet(path / "*.parquet")
+        assert len(list(path.glob("*.parquet"))) == 8
+    assert df.height == 50
+    assert df["sensor_id"].n_unique() == 50
+
+def test_record_producers_are_lazy():
+    """Test that the per-record producers yield records on demand instead of building lists."""
+    records = FakeDataGenerator().iter_transaction_data(10**9)
+    assert next(records)["status"] in ("completed", "pending", "failed")
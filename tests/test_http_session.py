@@ -0,0 +1,19 @@
+# tests/test_http_session.py
+from scripts.data_collection.http_session import close_session, create_session, get_session
+
+def test_session_uses_pooled_adapter():
+    """Test that sessions mount a keep-alive adapter with the configured pool size."""
+    session = create_session(pool_size=4, pool_connections=2)
+    adapter = session.get_adapter("https://api.spotify.com")
+    assert adapter._pool_maxsize == 4
+    assert adapter._pool_connections == 2
+    assert "gzip" in session.headers["Accept-Encoding"]
+    session.close()
+
+def test_shared_session_is_reused():
+    """Test that every collector gets the same shared session until it is closed."""
+    first = get_session()
+    assert get_session() is first
+    close_session()
+    assert get_session() is not first
+    close_session()
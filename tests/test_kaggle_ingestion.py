@@ -0,0 +1,71 @@
+# tests/test_kaggle_ingestion.py
+from datetime import date
+
+import polars as pl
+
+from scripts.data_collection.kaggle_ingestion import ingest_tracks, iter_parquet_records, scan_tracks
+from scripts.data_collection.parquet_sink import ParquetSink
+
+DOCUMENTED_CSV = """id,name,artists,album,release_date,genre,popularity,duration_ms,explicit,danceability,tempo
+6rqhFgbbKwnb9MLmUQDhG6,The Scientist,"['Coldplay']",A Rush of Blood to the Head,2002-08-26,Alternative,78,309946,False,0.445,146.991
+3TVXtAsR1Inumwj472S9r4,Paradise City,"['Drake', ""Guns N' Roses""]",Scorpion,not a date,Rock,oops,198973,True,0.695,77.929
+6rqhFgbbKwnb9MLmUQDhG6,The Scientist,"['Coldplay']",A Rush of Blood to the Head,2002-08-26,Rock,78,309946,False,0.445,146.991
+"""
+
+KAGGLE_CSV = """,track_id,artists,album_name,track_name,popularity,explicit,track_genre
+0,5SuOikwiRyPMVoIQDJUgSV,Gen Hoshino,Comedy,Comedy,73,False,acoustic
+1,4qPNDBW1i3p13qLCt0Ki3A,Ben Woodward;Chord Overstreet,Ghost,Ghost - Acoustic,55,False,acoustic
+"""
+
+class FakeLoader:
+    def load_records(self, records, source, entity_type, file_name):
+        self.records = list(records)
+        return {"file": file_name, "rows": len(self.records)}
+
+def test_scan_tracks_casts_parses_artists_and_dedupes(tmp_path):
+    """Test that the documented CSV is typed, artists become lists and duplicate ids are dropped."""
+    csv_path = tmp_path / "tracks.csv"
+    csv_path.write_text(DOCUMENTED_CSV)
+    df = scan_tracks(csv_path).collect()
+
+    assert df["id"].to_list() == ["6rqhFgbbKwnb9MLmUQDhG6", "3TVXtAsR1Inumwj472S9r4"]
+    assert df["artists"].to_list() == [["Coldplay"], ["Drake", "Guns N' Roses"]]
+    assert df.schema["popularity"] == pl.Int16
+    assert df["popularity"].to_list() == [78, None]
+    assert df["release_date"].to_list() == [date(2002, 8, 26), None]
+    assert df["explicit"].to_list() == [False, True]
+    assert df["energy"].null_count() == 2
+
+def test_kaggle_column_names_are_mapped(tmp_path):
+    """Test that the published CSV's column names and "A;B" artists map onto the schema."""
+    csv_path = tmp_path / "dataset.csv"
+    csv_path.write_text(KAGGLE_CSV)
+    df = scan_tracks(csv_path).collect()
+    assert df["name"].to_list() == ["Comedy", "Ghost - Acoustic"]
+    assert df["artists"].to_list()[1] == ["Ben Woodward", "Chord Overstreet"]
+    assert df["genre"].to_list() == ["acoustic", "acoustic"]
+
+def test_ingest_tracks_lands_parquet_and_staging(tmp_path):
+    """Test that ingestion writes one Parquet partition and streams its rows to the loader."""
+    csv_path = tmp_path / "dataset.csv"
+    csv_path.write_text(KAGGLE_CSV)
+    sink = ParquetSink(root=tmp_path / "lake")
+    loader = FakeLoader()
+    stats = ingest_tracks(csv_path, sink=sink, loader=loader, ingestion_date=date(2025, 1, 1))
+
+    assert stats["rows"] == 2
+    assert "source=kaggle/dataset=tracks/ingestion_date=2025-01-01" in stats["parquet"]
+    assert stats["staging"]["rows"] == 2
+    assert loader.records[0]["id"] == "5SuOikwiRyPMVoIQDJUgSV"
+    assert list(iter_parquet_records(stats["parquet"])) == loader.records
+
+def test_parquet_records_stream_json_ready_rows(tmp_path):
+    """Test that every Parquet row comes back once, with dates as strings and float32 values unwidened."""
+    csv_path = tmp_path / "tracks.csv"
+    csv_path.write_text(DOCUMENTED_CSV)
+    stats = ingest_tracks(csv_path, sink=ParquetSink(root=tmp_path / "lake"), ingestion_date=date(2025, 1, 1))
+    records = list(iter_parquet_records(stats["parquet"]))
+
+    assert [r["id"] for r in records] == pl.read_parquet(stats["parquet"])["id"].to_list()
+    assert records[0]["release_date"] == "2002-08-26" and records[1]["release_date"] is None
+    assert records[0]["danceability"] == 0.445 and records[1]["artists"] == ["Drake", "Guns N' Roses"]
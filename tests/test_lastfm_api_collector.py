@@ -0,0 +1,172 @@
+# tests/test_lastfm_api_collector.py
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from scripts.data_collection.lastfm_api_collector import LastFMAPICollector
+from scripts.data_collection.rate_limiter import TokenBucket
+from scripts.data_collection.response_cache import ResponseCache
+from scripts.data_collection.snapshot_manifest import SnapshotManifest
+from scripts.data_collection.watermark_store import WatermarkStore
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+        self.status_code = 200
+        self.content = json.dumps(payload).encode()
+        self.headers = {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+class FakeScrobbleSession:
+    """Serve a paginated user.getrecenttracks history, newest scrobble first."""
+
+    def __init__(self, timestamps, page_size=2):
+        self.timestamps = sorted(timestamps, reverse=True)
+        self.page_size = page_size
+        self.calls = []
+
+    def get(self, url, params=None, **kwargs):
+        self.calls.append(dict(params))
+        since = params.get("from", 0)
+        visible = [ts for ts in self.timestamps if ts >= since]
+        total_pages = -(-len(visible) // self.page_size)
+        start = (params["page"] - 1) * self.page_size
+        tracks = [{"name": f"Song {ts}", "date": {"uts": str(ts)}} for ts in visible[start:start + self.page_size]]
+        if params["page"] == 1:
+            tracks.insert(0, {"name": "Now Playing", "@attr": {"nowplaying": "true"}})
+        return FakeResponse({"recenttracks": {"track": tracks, "@attr": {"totalPages": str(total_pages)}}})
+
+class FakeLastFMSession:
+    """Serve canned Last.fm payloads keyed by API method."""
+
+    def __init__(self, failing_methods=()):
+        self.failing = set(failing_methods)
+        self.calls = []
+
+    def get(self, url, params=None, **kwargs):
+        self.calls.append(dict(params))
+        method = params["method"]
+        if (method, params.get("tag") or params.get("artist")) in self.failing:
+            return FakeResponse({"error": 6, "message": "Not found"})
+        if method == "chart.gettopartists":
+            artists = [{"name": f"Artist {i}"} for i in range(12)]
+            return FakeResponse({"artists": {"artist": artists}})
+        if method == "artist.getinfo":
+            return FakeResponse({"artist": {"name": params["artist"]}})
+        if method in ("chart.gettoptracks", "tag.gettoptracks"):
+            return FakeResponse({"tracks": {"track": [{"name": "Song"}]}})
+        if method == "user.getrecenttracks":
+            return FakeResponse({"recenttracks": {"track": [{"name": "Song"}]}})
+        if method == "user.gettoptracks":
+            return FakeResponse({"toptracks": {"track": [{"name": "Song"}]}})
+        return FakeResponse({"topartists": {"artist": [{"name": "Artist 0"}]}})
+
+@pytest.fixture
+def make_collector(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LASTFM_API_KEY", "test-key")
+    monkeypatch.setenv("MAX_RETRIES", "1")
+
+    def factory(session):
+        collector = LastFMAPICollector(
+            session=session,
+            cache=ResponseCache(tmp_path / "cache.sqlite3"),
+            watermarks=WatermarkStore(tmp_path / "watermarks.json"),
+            manifest=SnapshotManifest(tmp_path / "manifest.json"),
+        )
+        collector.rate_limiter = TokenBucket(rate=1000)
+        return collector
+
+    return factory
+
+def test_concurrent_collection_matches_sequential(make_collector):
+    """Test that the concurrent fan-out saves the same datasets as the sequential run."""
+    sequential = make_collector(FakeLastFMSession()).collect_comprehensive_data("rj")
+    concurrent = make_collector(FakeLastFMSession()).collect_comprehensive_data("rj", concurrent=True)
+    assert set(concurrent) == set(sequential)
+    assert "artist_details" in concurrent and "user_top_artists" in concurrent
+
+def test_concurrent_collection_isolates_failures(make_collector):
+    """Test that one failing genre or artist does not abort the concurrent run."""
+    session = FakeLastFMSession(failing_methods={("tag.gettoptracks", "jazz"), ("artist.getinfo", "Artist 3")})
+    collector = make_collector(session)
+    saved_files = collector.collect_comprehensive_data(concurrent=True)
+    assert "jazz_tracks" not in saved_files
+    assert "rock_tracks" in saved_files
+    assert sum(1 for call in session.calls if call["method"] == "artist.getinfo") == 10
+
+def test_unchanged_snapshots_are_not_saved_again(make_collector):
+    """Test that a repeated collection with identical content writes no new files."""
+    collector = make_collector(FakeLastFMSession())
+    first = collector.collect_comprehensive_data()
+    files = set(collector.data_dir.iterdir())
+    with patch("scripts.data_collection.writers.time.time", return_value=time.time() + 60):
+        second = collector.collect_comprehensive_data()
+    assert all(first.values())
+    assert set(second) == set(first) and not any(second.values())
+    assert set(collector.data_dir.iterdir()) == files
+
+def test_metadata_requests_are_served_from_cache(make_collector):
+    """Test that repeated artist lookups hit the cache while charts stay fresh."""
+    session = FakeLastFMSession()
+    collector = make_collector(session)
+    for _ in range(2):
+        collector.get_artist_info("Artist 1")
+        collector.get_top_tracks(limit=10)
+    methods = [call["method"] for call in session.calls]
+    assert methods.count("artist.getinfo") == 1
+    assert methods.count("chart.gettoptracks") == 2
+    assert collector.cache.stats()["hits"] == 1
+
+def test_recent_tracks_stream_resumes_from_watermark(make_collector):
+    """Test that the full history is streamed once and later runs only fetch new scrobbles."""
+    session = FakeScrobbleSession([100, 200, 300, 400, 500])
+    collector = make_collector(session)
+    first_run = [track["date"]["uts"] for track in collector.iter_user_recent_tracks("rj", page_size=2)]
+    assert first_run == ["500", "400", "300", "200", "100"]
+    assert [call["page"] for call in session.calls] == [1, 2, 3]
+
+    session.timestamps = [700, 600] + session.timestamps
+    session.calls.clear()
+    second_run = [track["date"]["uts"] for track in collector.iter_user_recent_tracks("rj", page_size=2)]
+    assert second_run == ["700", "600"]
+    assert session.calls[0]["from"] == 501
+    assert collector.watermarks.get("lastfm:user.getrecenttracks:rj") == 700
+
+def test_rate_limit_error_uses_shared_pause_only(make_collector, monkeypatch):
+    """Test that Last.fm error 29 pauses the shared limiter without also sleeping the calling thread."""
+    monkeypatch.setenv("MAX_RETRIES", "2")
+    responses = [FakeResponse({"error": 29, "message": "Rate limit exceeded"}), FakeResponse({"artist": {"name": "A"}})]
+    session = FakeLastFMSession()
+    session.get = lambda url, params=None, **kwargs: responses.pop(0)
+    collector = make_collector(session)
+    pauses = []
+    collector.rate_limiter.pause = pauses.append
+    with patch("scripts.data_collection.lastfm_api_collector.time.sleep") as sleep:
+        assert collector.get_artist_info("A") == {"name": "A"}
+    assert pauses == [1] and not sleep.called
+
+def test_http_429_waits_for_retry_after_only(make_collector, monkeypatch):
+    """Test that an HTTP 429 waits out Retry-After on the shared limiter without an extra backoff sleep."""
+    monkeypatch.setenv("MAX_RETRIES", "2")
+    limited = requests.Response()
+    limited.status_code = 429
+    limited.headers["Retry-After"] = "3"
+    limited._content = json.dumps({"error": 29, "message": "Rate limit exceeded"}).encode()
+    responses = [limited, FakeResponse({"artist": {"name": "A"}})]
+    session = FakeLastFMSession()
+    session.get = lambda url, params=None, **kwargs: responses.pop(0)
+    collector = make_collector(session)
+    pauses = []
+    collector.rate_limiter.pause = pauses.append
+    with patch("scripts.data_collection.lastfm_api_collector.time.sleep") as sleep:
+        assert collector.get_artist_info("A") == {"name": "A"}
+    assert pauses == [3.0] and not sleep.called
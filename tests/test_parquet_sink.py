@@ -0,0 +1,59 @@
+# tests/test_parquet_sink.py
+from datetime import date
+
+import polars as pl
+
+from scripts.data_collection.parquet_sink import ParquetSink, flatten_record, records_to_frame
+
+RECENT_TRACK = {
+    "name": "Blinding Lights",
+    "mbid": "",
+    "artist": {"mbid": "c8b03190", "#text": "The Weeknd"},
+    "image": [{"size": "small", "#text": "https://img/s.png"}, {"size": "large", "#text": "https://img/l.png"}],
+    "date": {"uts": "1700000000", "#text": "14 Nov 2023, 22:13"},
+    "@attr": {"rank": "1"},
+}
+
+def test_flatten_record_maps_lastfm_nesting_to_columns():
+    """Test that #text, @attr and image[] nesting become flat columns."""
+    flat = flatten_record(RECENT_TRACK)
+    assert flat["artist"] == "The Weeknd"
+    assert flat["artist_mbid"] == "c8b03190"
+    assert flat["image_large"] == "https://img/l.png"
+    assert flat["attr_rank"] == "1"
+    assert flat["date_uts"] == "1700000000"
+
+def test_records_to_frame_casts_numeric_strings():
+    """Test that Last.fm's string numbers are stored as integers."""
+    df = records_to_frame([RECENT_TRACK, {"name": "Other", "playcount": "42"}])
+    assert df.schema["date_uts"] == pl.Int64
+    assert df.schema["playcount"] == pl.Int64
+    assert df["playcount"].to_list() == [None, 42]
+
+def test_sink_writes_hive_partitions_that_can_be_pruned(tmp_path):
+    """Test that datasets land in source/dataset/date partitions and scan back by date."""
+    sink = ParquetSink(tmp_path, chunk_size=1)
+    sink.write([RECENT_TRACK] * 3, "lastfm", "recent_tracks", ingestion_date=date(2025, 1, 1))
+    sink.write([RECENT_TRACK], "lastfm", "recent_tracks", ingestion_date=date(2025, 1, 2))
+    partitions = sorted(p.name for p in (tmp_path / "source=lastfm" / "dataset=recent_tracks").iterdir())
+    assert partitions == ["ingestion_date=2025-01-01", "ingestion_date=2025-01-02"]
+
+    latest = sink.scan("lastfm", "recent_tracks").filter(pl.col("ingestion_date") == date(2025, 1, 2)).collect()
+    assert latest.height == 1
+    assert latest["artist"].to_list() == ["The Weeknd"]
+
+def test_scan_merges_partitions_with_different_columns(tmp_path):
+    """Test that all-null columns are typed and columns added in later partitions are not dropped."""
+    sink = ParquetSink(tmp_path)
+    [first] = sink.write([{"name": "A", "mbid": None, "tags": []}], "lastfm", "top_tracks", ingestion_date=date(2025, 1, 1))
+    sink.write([{"name": "B", "mbid": "b1", "tags": ["pop"], "listeners": "7"}], "lastfm", "top_tracks",
+               ingestion_date=date(2025, 1, 2))
+    assert pl.read_parquet_schema(first)["mbid"] == pl.String
+    # A part written before null columns were typed
+    pl.DataFrame({"name": ["C"], "mbid": [None]}).write_parquet(first.with_name("part-legacy.parquet"))
+
+    tracks = sink.scan("lastfm", "top_tracks").sort("name").collect()
+    assert tracks["mbid"].to_list() == [None, "b1", None]
+    assert tracks["listeners"].to_list() == [None, 7, None]
+    latest = sink.scan("lastfm", "top_tracks").filter(pl.col("ingestion_date") == date(2025, 1, 2)).collect()
+    assert latest["listeners"].to_list() == [7] and "source" not in latest.columns
@@ -0,0 +1,77 @@
+# tests/test_pipeline.py
+import os
+import time
+
+import pytest
+
+import main
+from scripts.pipeline import Pipeline, Stage
+
+def sleep_then(value, seconds=0.3):
+    def stage(**inputs):
+        time.sleep(seconds)
+        return value
+    return stage
+
+def test_independent_stages_overlap_and_pass_artifacts():
+    """Test that independent stages run concurrently and downstream stages receive their inputs."""
+    stages = [
+        Stage("load", lambda left, right: {"total": left + right, "count": 2}, inputs=["left", "right"],
+              outputs=["total", "count"]),
+        Stage("left", sleep_then(1), outputs=["left"]),
+        Stage("right", sleep_then(2), outputs=["right"]),
+        Stage("pid", os.getpid, outputs=["pid"], executor="process"),
+    ]
+    report = Pipeline(stages).run()
+    assert report["artifacts"]["total"] == 3 and report["artifacts"]["count"] == 2
+    assert report["artifacts"]["pid"] != os.getpid()
+    assert report["stage_seconds"] >= 0.6
+    assert report["critical_path"][-1] == "load" and report["critical_path"][0] in ("left", "right")
+    assert report["critical_path_seconds"] <= report["wall_seconds"] < report["stage_seconds"]
+    left = report["stages"]["left"]
+    assert left["wall_seconds"] >= 0.3 and left["cpu_seconds"] < 0.1
+    assert left["peak_rss_mb"] > 0
+
+def test_invalid_graphs_are_rejected():
+    """Test that missing producers, duplicate outputs and cycles fail before anything runs."""
+    with pytest.raises(ValueError, match="no stage produces"):
+        Pipeline([Stage("a", print, inputs=["x"])])
+    with pytest.raises(ValueError, match="produced by both"):
+        Pipeline([Stage("a", print, outputs=["x"]), Stage("b", print, outputs=["x"])])
+    with pytest.raises(ValueError, match="cycle"):
+        Pipeline([Stage("a", print, inputs=["y"], outputs=["x"]), Stage("b", print, inputs=["x"], outputs=["y"])])
+    with pytest.raises(ValueError):
+        Stage("a", print, executor="fiber")
+
+def test_failed_stage_stops_downstream_stages():
+    """Test that a failure is re-raised and stages depending on it never start."""
+    calls = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    stages = [Stage("fail", fail, outputs=["x"]), Stage("after", lambda x: calls.append(x), inputs=["x"])]
+    with pytest.raises(RuntimeError, match="boom"):
+        Pipeline(stages).run()
+    assert calls == []
+
+def stub_collect():
+    return None
+
+def stub_generate():
+    return None
+
+def test_main_pipeline_runs_the_staging_load_after_both_sources(monkeypatch):
+    """Test that PIPELINE_LOAD_STAGING adds a load stage that runs once collection and generation finish."""
+    loads = []
+    monkeypatch.setattr(main, "collect_api_data", stub_collect)
+    monkeypatch.setattr(main, "generate_fake_data", stub_generate)
+    monkeypatch.setattr(main, "load_staging", lambda: loads.append("loaded"))
+    monkeypatch.setenv("PIPELINE_LOAD_STAGING", "true")
+    pipeline = main.build_pipeline()
+    assert pipeline.order[-1] == "load_staging"
+    report = pipeline.run()
+    assert loads == ["loaded"] and set(report["stages"]) == {"collect_api_data", "generate_fake_data", "load_staging"}
+
+    monkeypatch.setenv("PIPELINE_LOAD_STAGING", "false")
+    assert "load_staging" not in main.build_pipeline().stages
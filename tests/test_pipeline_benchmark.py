@@ -0,0 +1,58 @@
+# tests/test_pipeline_benchmark.py
+import pytest
+
+from scripts.benchmarks import pipeline_benchmark
+from scripts.benchmarks.pipeline_benchmark import bench_staging, compare_reports, run_benchmarks
+
+def report(**metrics):
+    return {"metrics": {name: {"value": value, "unit": "", "higher_is_better": not name.endswith("_ms")}
+                        for name, value in metrics.items()}}
+
+def test_compare_reports_flags_slowdowns_beyond_threshold():
+    """Test that throughput drops and latency increases past the threshold are regressions."""
+    baseline = report(rows_per_sec=1000, lookup_ms=2.0, new_metric_missing_from_current=5)
+    current = report(rows_per_sec=850, lookup_ms=2.1, brand_new=1)
+    regressions = compare_reports(current, baseline, threshold=0.1)
+    assert [r["metric"] for r in regressions] == ["rows_per_sec"]
+    assert regressions[0]["change"] == -0.15
+    assert compare_reports(report(lookup_ms=3.0), baseline, threshold=0.1)[0]["metric"] == "lookup_ms"
+    assert compare_reports(report(rows_per_sec=2000), baseline, threshold=0.1) == []
+
+def test_run_benchmarks_reports_metrics_and_skips_missing_postgres(monkeypatch):
+    """Test that selected suites produce metrics and staging is skipped without a database."""
+    monkeypatch.setattr(pipeline_benchmark, "postgres_available", lambda: False)
+    result = run_benchmarks(suites=["writer", "recommendation", "staging"], rows=500, lookups=20, tracks=2_000)
+    assert result["metrics"]["writer.ndjson_none_rows_per_sec"]["value"] > 0
+    assert result["metrics"]["recommendation.query_p95_ms"]["higher_is_better"] is False
+    assert result["metrics"]["writer.ndjson_gzip_mb_per_sec"]["unit"] == "MB/s"
+    assert result["skipped"] == {"staging": "PostgreSQL is not reachable"}
+    with pytest.raises(ValueError):
+        run_benchmarks(suites=["nope"])
+
+class FakeStagingConnection:
+    def __init__(self, statements):
+        self.statements = statements
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None, prepare=None):
+        self.statements.append(sql)
+        return self
+
+class FailingLoader:
+    def load_records(self, records, source, entity_type, file_name):
+        raise RuntimeError("load failed")
+
+def test_staging_benchmark_removes_its_rows_even_on_failure(monkeypatch):
+    """Test that benchmark rows are deleted from both staging tables before and after the run."""
+    statements = []
+    monkeypatch.setattr(pipeline_benchmark, "get_connection", lambda: FakeStagingConnection(statements))
+    monkeypatch.setattr(pipeline_benchmark, "BulkLoader", FailingLoader)
+    with pytest.raises(RuntimeError):
+        bench_staging(rows=10, lookups=5)
+    deletes = [sql for sql in statements if sql.startswith("DELETE")]
+    assert deletes == list(pipeline_benchmark.CLEANUP_SQL) * 2
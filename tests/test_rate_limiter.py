@@ -0,0 +1,37 @@
+# tests/test_rate_limiter.py
+import time
+
+from scripts.data_collection.rate_limiter import TokenBucket, get_rate_limiter
+
+def test_bucket_paces_requests_to_rate():
+    """Test that requests beyond the burst capacity are spread at the configured rate."""
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+    assert 0.08 <= elapsed < 0.5
+
+def test_bucket_adapts_to_rate_limit_headers():
+    """Test that the rate follows remaining/reset and is capped at max_rate."""
+    bucket = TokenBucket(rate=5, max_rate=10)
+    bucket.update_from_headers({"x-ratelimit-remaining": "20", "x-ratelimit-reset": "10"})
+    assert bucket.rate == 2
+    bucket.update_from_headers({"x-ratelimit-remaining": "1000", "x-ratelimit-reset": "10"})
+    assert bucket.rate == 10
+
+def test_bucket_pauses_when_quota_exhausted():
+    """Test that an exhausted quota blocks callers until the window resets."""
+    bucket = TokenBucket(rate=100)
+    bucket.update_from_headers({"x-ratelimit-remaining": "0", "x-ratelimit-reset": "0.1"})
+    assert bucket.acquire() >= 0.09
+
+def test_try_acquire_never_blocks():
+    """Test that try_acquire takes a free token and otherwise reports the wait."""
+    bucket = TokenBucket(rate=10, capacity=1)
+    assert bucket.try_acquire() == 0.0
+    assert 0 < bucket.try_acquire() <= 0.1
+
+def test_limiters_are_shared_by_name():
+    """Test that collectors asking for the same API share one bucket."""
+    assert get_rate_limiter("test-api", 5) is get_rate_limiter("test-api", 10)
@@ -0,0 +1,55 @@
+# tests/test_recommendation_engine.py
+import numpy as np
+import polars as pl
+import pytest
+
+from scripts.recommendation.engine import FEATURES, RecommendationEngine, load_tracks
+
+def tracks_frame(count=50, seed=0):
+    rng = np.random.default_rng(seed)
+    features = {name: rng.random(count).astype(np.float32) for name in FEATURES}
+    features["tempo"] = features["tempo"] * 200  # Unscaled feature, like the real tempo column
+    return pl.DataFrame({
+        "id": [f"t{i}" for i in range(count)],
+        "name": [f"Song {i}" for i in range(count)],
+        "artists": [[f"Artist {i % 5}"] + (["Guest"] if i % 10 == 0 else []) for i in range(count)],
+        "genre": [["rock", "pop", "jazz"][i % 3] for i in range(count)],
+        **features,
+    })
+
+def brute_force(engine, row, candidates):
+    scores = engine.matrix[candidates] @ engine.matrix[row]
+    return [engine.ids[candidates[i]] for i in np.argsort(-scores, kind="stable")]
+
+def test_recommendations_match_brute_force_cosine():
+    """Test that batched top-k equals a full sort of cosine scores and never returns the seed."""
+    engine = RecommendationEngine(tracks_frame(), batch_size=4)
+    assert np.allclose(np.linalg.norm(engine.matrix, axis=1), 1.0, atol=1e-5)
+    seeds = [f"t{i}" for i in range(10)]
+    for seed, results in zip(seeds, engine.recommend_batch(seeds, k=5)):
+        row = engine.row_of[seed]
+        expected = [t for t in brute_force(engine, row, np.arange(len(engine))) if t != seed][:5]
+        assert [r["id"] for r in results] == expected
+        assert results[0]["score"] >= results[-1]["score"]
+
+def test_genre_and_artist_filters_are_combined():
+    """Test that genre and artist masks restrict candidates and that unknown filters match nothing."""
+    engine = RecommendationEngine(tracks_frame())
+    results = engine.recommend("t1", k=100, genres=["rock"], artists=["Artist 0", "Guest"])
+    allowed = [i for i in range(50) if i % 3 == 0 and (i % 5 == 0 or i % 10 == 0)]
+    assert sorted(r["id"] for r in results) == sorted(f"t{i}" for i in allowed)
+    assert [r["id"] for r in results] == brute_force(engine, engine.row_of["t1"], np.array(allowed))
+    assert all(r["id"] != "t0" for r in engine.recommend("t0", k=100, genres=["rock"]))
+    assert engine.recommend("t0", genres=["polka"]) == []
+    with pytest.raises(ValueError):
+        engine.recommend("missing")
+
+def test_profile_recommendations_and_lake_loading(tmp_path):
+    """Test profile queries exclude every seed and that missing features are tolerated when loading."""
+    frame = tracks_frame().with_columns(pl.when(pl.col("id") == "t3").then(None).otherwise(pl.col("energy")).alias("energy"))
+    frame.write_parquet(tmp_path / "tracks.parquet")
+    engine = RecommendationEngine(load_tracks(tmp_path))
+    assert np.isfinite(engine.matrix).all()
+    seeds = ["t0", "t1", "t2"]
+    results = engine.recommend_for_profile(seeds, k=len(engine))
+    assert len(results) == len(engine) - 3 and not {r["id"] for r in results} & set(seeds)
@@ -0,0 +1,43 @@
+# tests/test_response_cache.py
+import time
+
+from scripts.data_collection.response_cache import ResponseCache
+
+def test_cache_key_ignores_credentials_and_param_order():
+    """Test that keys depend only on the method and normalized request parameters."""
+    first = ResponseCache.make_key("artist.getinfo", {"artist": "Drake ", "api_key": "a", "format": "json"})
+    second = ResponseCache.make_key("artist.getinfo", {"format": "json", "api_key": "b", "artist": "Drake"})
+    assert first == second
+    assert first != ResponseCache.make_key("track.getinfo", {"artist": "Drake"})
+
+def test_cache_round_trip_and_counters(tmp_path):
+    """Test that cached responses persist across instances and update hit/miss counters."""
+    cache = ResponseCache(tmp_path / "cache.sqlite3")
+    assert cache.get("artist.getinfo", {"artist": "Drake"}) is None
+    cache.set("artist.getinfo", {"artist": "Drake"}, {"artist": {"name": "Drake"}})
+    reopened = ResponseCache(tmp_path / "cache.sqlite3")
+    assert reopened.get("artist.getinfo", {"artist": "Drake"}) == {"artist": {"name": "Drake"}}
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert reopened.stats()["hits"] == 1
+
+def test_chart_methods_opt_out_and_entries_expire(tmp_path):
+    """Test that zero-TTL methods are never cached and expired entries are misses."""
+    cache = ResponseCache(tmp_path / "cache.sqlite3", method_ttls={"artist.getinfo": 0.05})
+    cache.set("chart.gettoptracks", {"limit": 10}, {"tracks": {}})
+    assert cache.get("chart.gettoptracks", {"limit": 10}) is None
+    cache.set("artist.getinfo", {"artist": "Drake"}, {"artist": {}})
+    time.sleep(0.06)
+    assert cache.get("artist.getinfo", {"artist": "Drake"}) is None
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    """Test that the cache stays within max_entries by evicting the LRU response."""
+    cache = ResponseCache(tmp_path / "cache.sqlite3", max_entries=2)
+    cache.set("artist.getinfo", {"artist": "A"}, 1)
+    time.sleep(0.01)
+    cache.set("artist.getinfo", {"artist": "B"}, 2)
+    time.sleep(0.01)
+    cache.get("artist.getinfo", {"artist": "A"})
+    cache.set("artist.getinfo", {"artist": "C"}, 3)
+    assert cache.get("artist.getinfo", {"artist": "B"}) is None
+    assert cache.get("artist.getinfo", {"artist": "A"}) == 1
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,40 @@
+# tests/test_scrobble_generator.py
+from collections import Counter
+from datetime import datetime, timezone
+
+from scripts.data_collection.parquet_sink import flatten_record
+from scripts.data_collection.scrobble_generator import ScrobbleGenerator
+from scripts.database.bulk_loader import natural_id
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+def make_generator(seed=0):
+    return ScrobbleGenerator(users=50, artists=200, seed=seed, start=START)
+
+def test_events_match_recent_tracks_schema_and_are_ordered():
+    """Test that events look like user.getrecenttracks tracks and timestamps never go backwards."""
+    events = list(make_generator().iter_events(2_000))
+    assert len(events) == 2_000
+    assert set(events[0]) == {"artist", "streamable", "image", "mbid", "album", "name", "url", "date", "user"}
+    assert set(events[0]["artist"]) == {"mbid", "#text"}
+    uts = [int(event["date"]["uts"]) for event in events]
+    assert uts == sorted(uts)
+    assert uts[0] >= START.timestamp()
+    assert "artist" in flatten_record(events[0]) and "date_uts" in flatten_record(events[0])
+
+def test_popularity_is_skewed_and_runs_are_reproducible():
+    """Test that a few artists dominate plays and the same seed replays the same stream."""
+    events = list(make_generator().iter_events(5_000))
+    plays = Counter(event["artist"]["#text"] for event in events)
+    top_share = sum(count for _, count in plays.most_common(10)) / len(events)
+    assert top_share > 0.3  # 10 of 200 artists would get 5% under a uniform draw
+    assert list(make_generator().iter_events(100)) == events[:100]
+    assert list(make_generator(seed=1).iter_events(100)) != events[:100]
+
+def test_stream_mode_is_rate_limited_and_events_keyed_per_play():
+    """Test that stream() yields the requested number of events and each play gets its own key."""
+    events = list(make_generator().stream(rate=10_000, count=20))
+    assert len(events) == 20
+    keys = {natural_id(event) for event in events}
+    assert len(keys) == 20
+    assert all(key.startswith(event["user"] + "@") for key, event in zip(map(natural_id, events), events))
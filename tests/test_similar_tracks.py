@@ -0,0 +1,59 @@
+# tests/test_similar_tracks.py
+import numpy as np
+import polars as pl
+
+from scripts.recommendation.engine import FEATURES, RecommendationEngine
+from scripts.recommendation.similar_tracks import SimilarTracksTable, build_similar_tracks
+
+def tracks_frame(count=300, seed=1):
+    rng = np.random.default_rng(seed)
+    return pl.DataFrame({
+        "id": [f"t{i}" for i in range(count)],
+        "name": [f"Song {i}" for i in range(count)],
+        "artists": [[f"Artist {i % 7}"] for i in range(count)],
+        "genre": [["rock", "pop"][i % 2] for i in range(count)],
+        **{name: rng.random(count).astype(np.float32) for name in FEATURES},
+    })
+
+def test_blocked_build_matches_engine_top_k(tmp_path):
+    """Test that the sharded, tiled build finds the same neighbours as a full scan, in compact dtypes."""
+    engine = RecommendationEngine(tracks_frame())
+    stats = build_similar_tracks(engine, n=10, output_dir=tmp_path / "similar", workers=2, row_block=16, col_block=50)
+    assert stats["tracks"] == 300 and stats["n"] == 10
+
+    table = SimilarTracksTable(tmp_path / "similar")
+    assert table.neighbours.dtype == np.int32 and table.scores.dtype == np.float16
+    rows = np.arange(len(engine))
+    expected_rows, expected_scores = engine.top_k(engine.matrix, 10, exclude=[[row] for row in rows])
+    assert np.array_equal(np.asarray(table.neighbours), expected_rows)
+    assert np.allclose(np.asarray(table.scores, dtype=np.float32), expected_scores, atol=1e-3)
+    assert [t["id"] for t in table.similar("t5", k=3)] == [engine.ids[r] for r in expected_rows[5, :3]]
+
+def test_engine_serves_unfiltered_queries_from_the_table(tmp_path):
+    """Test that the engine answers from the table and rebuilding replaces the previous table."""
+    frame = tracks_frame(count=120)
+    build_similar_tracks(RecommendationEngine(frame), n=5, output_dir=tmp_path / "similar", workers=1)
+    build_similar_tracks(RecommendationEngine(frame), n=8, output_dir=tmp_path / "similar", workers=1)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["similar"]
+
+    table = SimilarTracksTable(tmp_path / "similar")
+    engine = RecommendationEngine(frame, similar=table)
+    table.neighbours = np.zeros_like(table.neighbours)  # Only a table lookup can return t0 for every seed
+    assert [t["id"] for t in engine.recommend("t3", k=8)] == ["t0"] * 8
+    assert engine.recommend("t3", k=9) == RecommendationEngine(frame).recommend("t3", k=9)
+    assert all(t["genre"] == "rock" for t in engine.recommend("t3", k=5, genres=["rock"]))
+
+def test_stale_tables_are_ignored_and_scores_match_the_scan(tmp_path):
+    """Test that a table built before tracks were added is not used, and that both paths round scores alike."""
+    frame = tracks_frame(count=120)
+    build_similar_tracks(RecommendationEngine(frame), n=10, output_dir=tmp_path / "similar", workers=1)
+    table = SimilarTracksTable(tmp_path / "similar")
+
+    grown = pl.concat([frame, tracks_frame(count=130, seed=2).slice(120).with_columns(pl.format("new{}", "id").alias("id"))])
+    assert RecommendationEngine(grown, similar=table).similar is None
+
+    scan = RecommendationEngine(frame).recommend("t7", k=10)
+    lookup = RecommendationEngine(frame, similar=table).recommend("t7", k=10)
+    assert [t["id"] for t in lookup] == [t["id"] for t in scan]
+    assert all(len(str(t["score"]).split(".")[1]) <= 3 for t in scan + lookup)
+    assert [a["score"] for a in scan] == [b["score"] for b in lookup]
@@ -0,0 +1,114 @@
+# tests/test_spotify_api_collector.py
+import json
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from scripts.data_collection.collector_metrics import CollectorMetrics
+from scripts.data_collection.response_cache import ResponseCache
+from scripts.data_collection.spotify_api_collector import SpotifyAPICollector, SpotifyTokenManager
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.content = json.dumps(payload).encode()
+        self.headers = {}
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.payload
+
+class FakeSpotifySession:
+    """Issue numbered tokens and reject requests made with revoked ones."""
+
+    def __init__(self, expires_in=3600):
+        self.expires_in = expires_in
+        self.tokens_issued = 0
+        self.revoked = set()
+        self.requests = []
+
+    def post(self, url, headers=None, data=None):
+        self.tokens_issued += 1
+        return FakeResponse({"access_token": f"token-{self.tokens_issued}", "expires_in": self.expires_in})
+
+    def get(self, url, headers=None, params=None):
+        token = headers["Authorization"].split(" ", 1)[1]
+        self.requests.append((url, token))
+        if token in self.revoked:
+            return FakeResponse({"error": {"status": 401}}, status_code=401)
+        endpoint = url.rsplit("/", 1)[1]
+        items = [None if item_id.startswith("unknown") else {"id": item_id} for item_id in params["ids"].split(",")]
+        return FakeResponse({endpoint.replace("-", "_"): items})
+
+def make_collector(session, tmp_path, metrics=None):
+    token_manager = SpotifyTokenManager("client", "secret", session=session)
+    return SpotifyAPICollector(token_manager=token_manager, session=session,
+                               cache=ResponseCache(tmp_path / "cache.sqlite3"), metrics=metrics)
+
+def test_token_is_reused_until_close_to_expiry(tmp_path):
+    """Test that the token is fetched once and refreshed inside the refresh margin."""
+    session = FakeSpotifySession(expires_in=3600)
+    manager = SpotifyTokenManager("client", "secret", session=session)
+    assert manager.get_token() == manager.get_token() == "token-1"
+
+    short_lived = SpotifyTokenManager("client", "secret", session=session, refresh_margin=60)
+    session.expires_in = 30
+    short_lived.get_token()
+    assert short_lived.get_token() == "token-3"
+
+def test_unauthorized_request_refreshes_token_and_retries_once(tmp_path):
+    """Test that a 401 triggers exactly one token refresh and retry."""
+    session = FakeSpotifySession()
+    collector = make_collector(session, tmp_path)
+    collector.get_artists(["a"])
+    session.revoked.add("token-1")
+    assert collector.get_artists(["b"]) == [{"id": "b"}]
+    assert [token for _, token in session.requests] == ["token-1", "token-1", "token-2"]
+
+def test_batched_lookup_dedupes_chunks_and_keeps_input_order(tmp_path):
+    """Test that large ID lists are deduplicated, chunked per endpoint limit and merged in order."""
+    session = FakeSpotifySession()
+    collector = make_collector(session, tmp_path)
+    ids = [f"track{i}" for i in range(120)] + ["track5", "unknown1"]
+    features = collector.get_audio_features(ids)
+    assert [item and item["id"] for item in features] == [f"track{i}" for i in range(120)] + ["track5", None]
+    assert len(session.requests) == 2
+
+    albums = collector.get_albums([f"album{i}" for i in range(45)])
+    assert len(albums) == 45 and len(session.requests) == 5
+
+    collector.get_audio_features(ids[:10] + ["track200"])
+    assert len(session.requests) == 6
+
+def test_batched_lookup_records_a_cache_hit_or_miss_per_id(tmp_path):
+    """Test that batched lookups count one cache hit or miss per distinct ID."""
+    metrics = CollectorMetrics()
+    collector = make_collector(FakeSpotifySession(), tmp_path, metrics=metrics)
+    collector.get_audio_features(["a", "b", "a"])
+    collector.get_audio_features(["a", "c"])
+    counters = {(c["name"], c["labels"]["endpoint"]): c["value"] for c in metrics.snapshot()["counters"]
+                if c["name"] in ("cache_hits", "cache_misses")}
+    assert counters == {("cache_misses", "/audio-features"): 3, ("cache_hits", "/audio-features"): 1}
+
+def test_server_errors_are_retried_then_raised(tmp_path):
+    """Test that a 5xx is retried with backoff and a persistent one raises HTTPError, not KeyError."""
+    session = FakeSpotifySession()
+    collector = make_collector(session, tmp_path)
+    healthy_get = session.get
+    failures = [503]
+    session.get = lambda url, headers=None, params=None: (
+        FakeResponse({"error": {"status": failures.pop()}}, status_code=503) if failures else healthy_get(url, headers, params))
+    with patch("scripts.data_collection.spotify_api_collector.time.sleep") as sleep:
+        assert collector.get_artists(["a"]) == [{"id": "a"}]
+        assert sleep.call_count == 1
+
+        session.get = lambda url, headers=None, params=None: FakeResponse({"error": {"status": 503}}, status_code=503)
+        with pytest.raises(requests.HTTPError):
+            collector.get_artists(["b"])
+        assert sleep.call_count == collector.max_retries
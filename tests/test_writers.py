@@ -0,0 +1,58 @@
+# tests/test_writers.py
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+
+from scripts.data_collection.snapshot_manifest import SnapshotManifest
+from scripts.data_collection.writers import atomic_open, iter_records, save_records
+
+RECORDS = [{"name": "Song", "artist": {"#text": "Björk"}, "rank": i} for i in range(100)]
+
+@pytest.mark.parametrize("fmt", ["json", "ndjson"])
+@pytest.mark.parametrize("compression", ["none", "gzip", "zstd"])
+def test_save_records_round_trip(tmp_path, fmt, compression):
+    """Test that every format/compression combination reads back unchanged."""
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    file_path = save_records(iter(RECORDS), tmp_path, "tracks", fmt=fmt, compression=compression)
+    assert file_path.name.startswith("tracks_")
+    assert list(iter_records(file_path)) == RECORDS
+
+def test_plain_json_output_stays_a_loadable_list(tmp_path):
+    """Test that the default JSON output is still a JSON array, only compact."""
+    file_path = save_records(RECORDS, tmp_path, "tracks", fmt="json", compression="none")
+    with open(file_path, encoding="utf-8") as f:
+        assert json.load(f) == RECORDS
+    assert file_path.stat().st_size < len(json.dumps(RECORDS, indent=2))
+
+def test_failed_write_leaves_no_partial_file(tmp_path):
+    """Test that an interrupted write neither creates the target nor leaves a temp file."""
+    target = tmp_path / "tracks.ndjson"
+    with pytest.raises(RuntimeError):
+        with atomic_open(target) as f:
+            f.write("{}\n")
+            raise RuntimeError("collector crashed")
+    assert list(tmp_path.iterdir()) == []
+
+def test_unchanged_snapshot_is_skipped(tmp_path):
+    """Test that the manifest drops a snapshot whose content matches the previous one."""
+    manifest = SnapshotManifest(tmp_path / "state" / "manifest.json")
+    first = save_records(iter(RECORDS), tmp_path, "tracks", fmt="ndjson", manifest=manifest)
+    with patch("scripts.data_collection.writers.time.time", return_value=time.time() + 60):
+        assert save_records(iter(RECORDS), tmp_path, "tracks", fmt="ndjson", manifest=manifest) is None
+        changed = save_records(iter(RECORDS[:10]), tmp_path, "tracks", fmt="ndjson", manifest=manifest)
+    assert changed != first
+    assert sorted(p.name for p in tmp_path.glob("tracks_*")) == sorted([first.name, changed.name])
+    assert manifest.get(str(tmp_path / "tracks.ndjson"))["records"] == 10
+
+def test_unchanged_snapshot_is_never_published(tmp_path):
+    """Test that an unchanged snapshot is discarded as a temp file instead of being renamed into place."""
+    manifest = SnapshotManifest(tmp_path / "state" / "manifest.json")
+    save_records(iter(RECORDS), tmp_path, "tracks", fmt="ndjson", manifest=manifest)
+    with patch("scripts.data_collection.writers.time.time", return_value=time.time() + 60), \
+            patch("scripts.data_collection.writers.os.replace") as replace:
+        assert save_records(iter(RECORDS), tmp_path, "tracks", fmt="ndjson", manifest=manifest) is None
+    assert not replace.called
+    assert len(list(tmp_path.glob("tracks_*"))) == 1 and not list(tmp_path.glob(".tracks_*"))